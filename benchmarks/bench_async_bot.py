@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Async bot benchmark
+Posts and user lookups through the sync TwitterBot (one request at a time)
+and through AsyncTwitterBot at several concurrency limits, all against the
+fake X API served over real HTTP on localhost with a fixed per-request
+latency standing in for the network.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_api import FakeAPIConfig, fake_x_server, redirect_requests, RedirectSession
+from benchmarks.run_benchmarks import FAKE_ENV
+from bot.rate_limits import RateLimitManager
+from bot.sentiment_analyzer import SentimentAnalyzer
+
+
+def contents(run, n):
+    return [f"{run}-{i} GPUs keep getting faster and my laptop keeps getting louder." for i in range(n)]
+
+
+def bench_sync(base_url, posts, lookups, analyzer):
+    from bot.twitter_bot import TwitterBot
+
+    with redirect_requests(base_url):
+        bot = TwitterBot(rate_limits=RateLimitManager(None))
+        bot.sentiment_analyzer = analyzer
+        start = time.perf_counter()
+        results = [bot.post_tweet(text) for text in contents("sync", posts)]
+        users = [bot.get_user_info() for _ in range(lookups)]
+        elapsed = time.perf_counter() - start
+    return elapsed, sum(r["success"] for r in results), sum(u is not None for u in users)
+
+
+async def bench_async(base_url, posts, lookups, concurrency, analyzer):
+    from bot.async_twitter_bot import AsyncTwitterBot
+
+    session = RedirectSession(aiohttp.ClientSession(), base_url)
+    bot = AsyncTwitterBot(rate_limits=RateLimitManager(None), max_concurrency=concurrency, session=session,
+                          sentiment_analyzer=analyzer)
+    try:
+        await bot.start()
+        start = time.perf_counter()
+        results, users = await asyncio.gather(
+            bot.post_many(contents(f"async{concurrency}", posts)),
+            asyncio.gather(*(bot.get_user_info() for _ in range(lookups))))
+        elapsed = time.perf_counter() - start
+    finally:
+        await session.close()
+    return elapsed, sum(r["success"] for r in results), sum(u is not None for u in users)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=50, help="get_user_info calls mixed in")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    os.environ.update(FAKE_ENV)
+    logging.disable(logging.WARNING)
+    analyzer = SentimentAnalyzer()
+    requests_total = args.posts + args.lookups
+
+    def row(elapsed, posted, looked_up):
+        return {"seconds": round(elapsed, 3), "requests_per_second": round(requests_total / elapsed, 1),
+                "posted": posted, "lookups": looked_up}
+
+    results = {"benchmark": "async_bot", "posts": args.posts, "lookups": args.lookups,
+               "latency_ms": args.latency_ms}
+    with fake_x_server(FakeAPIConfig(latency_ms=args.latency_ms)) as (x_api, base_url):
+        results["sync"] = row(*bench_sync(base_url, args.posts, args.lookups, analyzer))
+        for concurrency in args.concurrency:
+            results[f"async_c{concurrency}"] = row(
+                *asyncio.run(bench_async(base_url, args.posts, args.lookups, concurrency, analyzer)))
+        results["tweets_received"] = len(x_api.tweets)
+    for key in [key for key in results if key.startswith("async_c")]:
+        results[key]["speedup"] = round(results["sync"]["seconds"] / results[key]["seconds"], 1)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
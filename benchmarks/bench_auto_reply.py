@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Auto-reply benchmark
+Measures how many mentions per minute the keyword/sentiment/budget pipeline handles
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.auto_reply import AutoReplyEngine
+from bot.sentiment_analyzer import SentimentAnalyzer
+from benchmarks.fake_clients import FakeTwitterClient, make_tweet
+
+KEYWORDS = ["AI", "automation", "python", "bot"]
+PHRASES = [
+    "Loving this new {kw} project, great work!",
+    "Honestly the worst {kw} take I've read all week.",
+    "Anyone else using {kw} for their side projects?",
+    "Nothing to do with the topic, just saying hi",
+    "Said it before: the weekend is too short",
+    "Your {kw} thread was super helpful, thanks!",
+]
+
+
+def make_mentions(count, distinct):
+    """Build mentions from a pool of `distinct` texts so repeats hit the sentiment cache"""
+    random.seed(7)
+    pool = [random.choice(PHRASES).format(kw=random.choice(KEYWORDS)) + f" #{i}" for i in range(distinct)]
+    return [make_tweet({"id": str(1958000000000000000 + i), "text": random.choice(pool), "author_id": "2"})
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mentions", type=int, default=5000, help="Number of mentions to process")
+    parser.add_argument("--distinct", type=int, default=1000, help="Number of distinct mention texts")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.sentiment_analyzer").setLevel(logging.WARNING)
+    mentions = make_mentions(args.mentions, args.distinct)
+    client = FakeTwitterClient()
+    # Budget covers every mention so the full pipeline is timed, not the early exit
+    engine = AutoReplyEngine(client, SentimentAnalyzer(), KEYWORDS,
+                             max_daily_replies=args.mentions, batch_size=args.batch_size)
+
+    start = time.perf_counter()
+    engine.process_mentions(mentions)
+    elapsed = time.perf_counter() - start
+
+    results = {
+        "benchmark": "auto_reply",
+        "mentions": args.mentions,
+        "distinct_texts": args.distinct,
+        "elapsed_seconds": round(elapsed, 4),
+        "mentions_per_minute": round(args.mentions / elapsed * 60),
+        "sentiment_cache_hits": engine.sentiment.hits,
+        "sentiment_cache_misses": engine.sentiment.misses,
+        "stats": engine.stats,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Engagement collector benchmark
+Simulates weeks of posting and 15-minute collection passes against recorded
+metrics, comparing lookup requests with re-fetching every posted tweet on
+every pass
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.engagement import EngagementCollector
+from bot.state_store import FileBackend
+from benchmarks.fake_clients import FakeMetricsClient
+
+BASE_ID = 1958000000000000000
+PASS_SECONDS = 15 * 60
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30, help="Simulated days of posting")
+    parser.add_argument("--posts-per-day", type=int, default=16)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    client = FakeMetricsClient.from_fixture()
+    start_time = 1755000000
+    post_every = 86400 / args.posts_per_day
+    passes = args.days * 86400 // PASS_SECONDS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collector = EngagementCollector(FileBackend(tmp))
+        posted = requests = naive_requests = 0
+        active_peak = 0
+        started = time.perf_counter()
+        for n in range(passes):
+            now = start_time + n * PASS_SECONDS
+            while start_time + posted * post_every <= now:
+                tweet_id = BASE_ID + posted
+                client.register(tweet_id, start_time + posted * post_every)
+                collector.track(tweet_id, start_time + posted * post_every, now=now)
+                posted += 1
+            client.now = now
+            stats = collector.poll(client, now=now)
+            requests += stats["requests"]
+            naive_requests += math.ceil(posted / 100)
+            active_peak = max(active_peak, len(collector.due))
+        elapsed = time.perf_counter() - started
+        collector.save()
+        state_bytes = os.path.getsize(os.path.join(tmp, "engagement.json"))
+        report = collector.report()
+
+    results = {
+        "benchmark": "engagement",
+        "days": args.days,
+        "passes": passes,
+        "tweets_posted": posted,
+        "active_peak": active_peak,
+        "lookup_requests": requests,
+        "naive_lookup_requests": naive_requests,
+        "request_reduction": round(naive_requests / max(requests, 1), 2),
+        "samples_stored": report["samples"],
+        "state_bytes": state_bytes,
+        "seconds": round(elapsed, 3),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
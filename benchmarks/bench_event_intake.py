@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Event intake benchmark
+Sends signed mention events to bot.events.WebhookReceiver on localhost
+(each mention also lands in the fake mention timeline, as on X) and times
+mention-to-reply latency through AutoReplyEngine, against the same stream
+picked up by polling at --poll-interval. Also checks the CRC answer, that
+unsigned posts are refused, and that a burst overflowing the bounded queue
+is recovered by the reconcile poll with every mention answered once.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import Counter
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_clients import FakeTwitterClient
+from benchmarks.run_benchmarks import percentile
+from bot.auto_reply import AutoReplyEngine
+from bot.events import MentionIntake, SIGNATURE_HEADER, WEBHOOK_PATH, crc_response, emit, sign, tweet_create_event
+from bot.sentiment_analyzer import SentimentAnalyzer
+from utils.metrics import metrics
+
+SECRET = "bench-consumer-secret"
+USER_ID = "1"
+KEYWORDS = ["AI", "automation", "python", "bot"]
+
+
+class TimedClient(FakeTwitterClient):
+    """Records when each mention was answered"""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.replied_at = {}
+        self.replies = Counter()
+
+    def create_tweet(self, text=None, **params):
+        response = super().create_tweet(text=text, **params)
+        mention_id = str(params.get("in_reply_to_tweet_id"))
+        with self.lock:
+            self.replied_at.setdefault(mention_id, time.time())
+            self.replies[mention_id] += 1
+        return response
+
+
+def run(args, analyzer, webhook, mentions, rate, queue_size=1000, burst=False):
+    client = TimedClient()
+    engine = AutoReplyEngine(client, analyzer, KEYWORDS, max_daily_replies=10 ** 6)
+    config = {"webhook_port": 0 if webhook else None, "webhook_host": "127.0.0.1", "queue_size": queue_size,
+              "poll_interval": args.poll_interval, "max_poll_interval": args.max_poll_interval,
+              "reconcile_interval": args.reconcile_interval}
+    intake = MentionIntake(engine, USER_ID, receiver_config=config, secret=SECRET)
+    intake.start()
+    url = f"http://127.0.0.1:{intake.receiver.port}{WEBHOOK_PATH}" if webhook else None
+    if webhook and burst:
+        # Let the start-up poll pass so the burst can only come back through the reconcile poll
+        time.sleep(0.5)
+
+    rng = random.Random(5)
+    sent_at = {}
+    session = requests.Session()
+    burst_event = {"for_user_id": USER_ID, "tweet_create_events": []}
+    for i in range(mentions):
+        mention_id = str(1960000000000000000 + i)
+        text = f"Loving this {rng.choice(KEYWORDS)} thread, thanks! #{i}"
+        sent_at[mention_id] = time.time()
+        client.mentions.append({"id": mention_id, "text": text, "author_id": "2"})
+        event = tweet_create_event(USER_ID, mention_id, text)
+        if burst:
+            burst_event["tweet_create_events"] += event["tweet_create_events"]
+            continue
+        if webhook:
+            body = json.dumps(event).encode("utf-8")
+            session.post(url, data=body, timeout=5, headers={SIGNATURE_HEADER: sign(body, SECRET)})
+        time.sleep(rng.expovariate(rate))
+    if burst:
+        # One delivery carrying every mention: all but queue_size are dropped, and the
+        # overflow makes the consumer poll right away
+        emit(url, burst_event, SECRET)
+
+    deadline = time.time() + args.max_poll_interval * 2 + 5
+    while len(client.replied_at) < mentions and time.time() < deadline:
+        time.sleep(0.05)
+    elapsed = max(time.time() - min(sent_at.values()), 1e-9)
+    intake.stop()
+
+    latencies = [client.replied_at[m] - sent for m, sent in sent_at.items() if m in client.replied_at]
+    return {
+        "mentions": mentions,
+        "answered": len(client.replied_at),
+        "answered_twice": sum(n > 1 for n in client.replies.values()),
+        "latency_ms": {"p50": round(percentile(latencies, 50) * 1000, 1),
+                       "p99": round(percentile(latencies, 99) * 1000, 1),
+                       "max": round(max(latencies, default=0) * 1000, 1)},
+        "seconds": round(elapsed, 2),
+        "mention_polls": intake.polls,
+        "duplicates_skipped": engine.stats["duplicate"],
+    }
+
+
+def check_endpoints():
+    client = TimedClient()
+    engine = AutoReplyEngine(client, SentimentAnalyzer(), KEYWORDS)
+    intake = MentionIntake(engine, USER_ID, receiver_config={"webhook_port": 0, "reconcile_interval": 900},
+                           secret=SECRET)
+    intake.start()
+    url = f"http://127.0.0.1:{intake.receiver.port}{WEBHOOK_PATH}"
+    try:
+        crc = requests.get(url, params={"crc_token": "abc"}, timeout=5).json() == crc_response("abc", SECRET)
+        unsigned = requests.post(url, json=tweet_create_event(USER_ID, 1, "hi AI"), timeout=5).status_code
+        forged = emit(url, tweet_create_event(USER_ID, 2, "hi AI"), "wrong-secret")
+        signed = emit(url, tweet_create_event(USER_ID, 3, "hi AI"), SECRET)
+    finally:
+        intake.stop()
+    return {"crc_ok": crc, "unsigned_status": unsigned, "forged_status": forged, "signed_status": signed}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mentions", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=20.0, help="Mean mentions per second")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Base poll interval for the polling run (the bot's default is 60 s)")
+    parser.add_argument("--max-poll-interval", type=float, default=8.0)
+    parser.add_argument("--reconcile-interval", type=float, default=900.0)
+    parser.add_argument("--burst", type=int, default=80, help="Mentions sent at once against a queue of 10")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.sentiment_analyzer").setLevel(logging.WARNING)
+    analyzer = SentimentAnalyzer()
+    endpoints = check_endpoints()
+    webhook = run(args, analyzer, True, args.mentions, args.rate)
+    polling = run(args, analyzer, False, max(args.mentions // 10, 1), args.rate / 10)
+    dropped_before = metrics.counters.get(("webhook_dropped_total", ()), 0)
+    overflow = run(args, analyzer, True, args.burst, args.rate, queue_size=10, burst=True)
+    overflow_dropped = metrics.counters.get(("webhook_dropped_total", ()), 0) - dropped_before
+
+    ok = (endpoints == {"crc_ok": True, "unsigned_status": 403, "forged_status": 403, "signed_status": 200}
+          and overflow_dropped > 0
+          and all(r["answered"] == r["mentions"] and not r["answered_twice"] for r in (webhook, polling, overflow)))
+    results = {
+        "benchmark": "event_intake",
+        "endpoints": endpoints,
+        "webhook": webhook,
+        "polling": {"poll_interval_s": args.poll_interval, "max_poll_interval_s": args.max_poll_interval, **polling},
+        "overflow": {"queue_size": 10, "dropped_by_queue": overflow_dropped, **overflow},
+        "p50_latency_speedup": round(polling["latency_ms"]["p50"] / max(webhook["latency_ms"]["p50"], 0.1), 1),
+        "ok": ok,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
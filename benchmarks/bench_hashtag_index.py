@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Hashtag index benchmark
+Builds bot.hashtag_index from 80% of the logged posts, then times
+recommend() on the held-out posts that carried hashtags and scores its
+picks against the hashtags those posts actually used (and against always
+suggesting the most used hashtags).
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.hashtag_index import HashtagIndex, HASHTAG_PATTERN, logged_posts
+from bot.state_store import FileBackend
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def strip_tags(text):
+    return HASHTAG_PATTERN.sub("", text).strip()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=3, help="Hashtags recommended per post")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.output_format").setLevel(logging.ERROR)
+    logging.getLogger("bot.hashtag_index").setLevel(logging.WARNING)
+
+    store = FileBackend(REPO_ROOT)
+    start = time.perf_counter()
+    texts = logged_posts(store)
+    corpus = HashtagIndex()
+    corpus.add_many(texts)
+    full_build_seconds = time.perf_counter() - start
+
+    train = [t for t in texts if zlib.crc32(t.encode("utf-8")) % 5]
+    test = [t for t in texts if not zlib.crc32(t.encode("utf-8")) % 5 and HASHTAG_PATTERN.search(t)]
+    index = HashtagIndex()
+    index.add_many(train)
+    popular = HashtagIndex()
+    popular.tags = index.tags
+
+    hits = popular_hits = any_hit = 0
+    latencies = []
+    for text in test:
+        actual = {tag.lower() for tag in HASHTAG_PATTERN.findall(text)}
+        body = strip_tags(text)
+        start = time.perf_counter()
+        picks = index.recommend(body, args.n)
+        latencies.append(time.perf_counter() - start)
+        found = sum(tag[1:].lower() in actual for tag in picks)
+        hits += found
+        any_hit += found > 0
+        popular_hits += sum(tag[1:].lower() in actual for tag in popular.recommend(body, args.n))
+
+    results = {
+        "benchmark": "hashtag_index",
+        "posts_indexed": corpus.docs,
+        "hashtags": len(corpus.tags),
+        "keywords": len(corpus.keywords),
+        "full_build_ms": round(full_build_seconds * 1000, 1),
+        "holdout_posts": len(test),
+        "recommend_us_median": round(statistics.median(latencies) * 1e6, 1),
+        "recommend_us_p99": round(sorted(latencies)[int(len(latencies) * 0.99)] * 1e6, 1),
+        f"precision_at_{args.n}": round(hits / (len(test) * args.n), 4),
+        "posts_with_a_correct_tag": round(any_hit / len(test), 4),
+        f"most_used_baseline_precision_at_{args.n}": round(popular_hits / (len(test) * args.n), 4),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
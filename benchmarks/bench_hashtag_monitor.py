@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Hashtag monitor benchmark
+Compares API calls of batched since_id polling against one query per hashtag
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.hashtag_monitor import HashtagMonitor
+from benchmarks.fake_clients import FakeSearchClient
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hashtags", type=int, default=40, help="Number of monitored hashtags")
+    parser.add_argument("--polls", type=int, default=50, help="Number of polling passes")
+    parser.add_argument("--max-new", type=int, default=30, help="Max new tweets published between polls")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    random.seed(42)
+    hashtags = [f"#Topic{i}" for i in range(args.hashtags)]
+    client = FakeSearchClient.from_fixture()
+    next_id = 1956000000000000000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        monitor = HashtagMonitor(client, hashtags, state_file=os.path.join(tmp, "state.json"))
+        published = 0
+        matched = 0
+        start = time.perf_counter()
+        for _ in range(args.polls):
+            new = []
+            for _ in range(random.randint(0, args.max_new)):
+                next_id += 1
+                tags = " ".join(random.sample(hashtags, 2))
+                new.append({"id": next_id, "text": f"Something happened {tags}", "author_id": "1"})
+            client.publish(new)
+            published += len(new)
+            matched += len(monitor.poll())
+        elapsed = time.perf_counter() - start
+
+    results = {
+        "benchmark": "hashtag_monitor",
+        "hashtags": args.hashtags,
+        "queries_per_poll": len(monitor.queries),
+        "polls": args.polls,
+        "tweets_published": published,
+        "tweets_matched": matched,
+        "api_calls": monitor.api_calls,
+        "api_calls_per_hashtag_polling": args.hashtags * args.polls,
+        "elapsed_seconds": round(elapsed, 4),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Lease queue stress test
+Drains one bot.leases queue with 1, 2, 4 and 8 worker processes, each
+post taking --latency-ms (the X request) and failing --failure-rate of the
+time, and checks that no item is posted twice, every item is posted once,
+and throughput scales with workers. Also runs:
+
+  crash       a worker claims items and dies without completing them; the
+              others take them over once the lease expires
+  heartbeat   posts take twice the lease length, so only heartbeats keep
+              other workers from taking the items over mid-post
+  quota       the daily limit caps posts exactly, in-flight leases included
+  document    the old flow (load scheduled_tweets, post, save the rest)
+              with the same workers, to count its double posts
+
+Exits 1 if any lease run posts an item twice or leaves one unposted.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.leases import LeaseQueue, drain
+from bot.post_queue import PRIORITY_CLASSES
+
+UNLIMITED = {"posting_limits": {"daily_limit": 10 ** 6, "reservations": {}}}
+
+
+def make_tweets(n):
+    rng = random.Random(3)
+    return [{"text": f"stress tweet {i}", "priority": rng.choice(PRIORITY_CLASSES), "enqueued": float(i)}
+            for i in range(n)]
+
+
+def lease_worker(path, config, owner, latency, failure_rate, lease_seconds, ready, results):
+    """Drain the queue once every worker has started up (process spawn and imports are not timed)"""
+    rng = random.Random(owner)
+    queue = LeaseQueue(path, config)
+
+    def post(tweet):
+        time.sleep(latency)
+        return rng.random() >= failure_rate
+
+    ready.wait()
+    try:
+        results.put(drain(queue, owner, post, lease_seconds=lease_seconds))
+    finally:
+        queue.close()
+
+
+def crash_worker(args):
+    """Claim items and exit without completing or releasing them"""
+    path, count, lease_seconds = args
+    queue = LeaseQueue(path, UNLIMITED)
+    queue.claim("crashed", count, lease_seconds)
+    os._exit(0)
+
+
+def document_worker(args):
+    """The scheduled_tweets flow: load the document, post the head, write back the rest"""
+    path, owner, latency = args
+    posted = []
+    while True:
+        with open(path, encoding="utf-8") as f:
+            tweets = json.load(f)
+        if not tweets:
+            return posted
+        time.sleep(latency)
+        posted.append(tweets[0]["text"])
+        tmp_path = f"{path}.{owner}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(tweets[1:], f)
+        os.replace(tmp_path, path)
+
+
+def run_leases(name, pool_size, tweets, args, workdir, config=UNLIMITED, crash=0, latency_ms=None):
+    path = os.path.join(workdir, f"{name}-{pool_size}.sqlite3")
+    queue = LeaseQueue(path, config)
+    queue.add(tweets)
+    ctx = multiprocessing.get_context("spawn")
+    if crash:
+        process = ctx.Process(target=crash_worker, args=((path, crash, args.lease_seconds),))
+        process.start()
+        process.join()
+    ready, results_queue = ctx.Barrier(pool_size + 1), ctx.Queue()
+    workers = [ctx.Process(target=lease_worker, args=(path, config, f"worker-{i}", (latency_ms or args.latency_ms) / 1000,
+                                                      args.failure_rate, args.lease_seconds, ready, results_queue))
+               for i in range(pool_size)]
+    for worker in workers:
+        worker.start()
+    ready.wait()
+    start = time.perf_counter()
+    results = [results_queue.get() for _ in workers]
+    seconds = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+    posted = Counter(key for result in results for key in result["posted"])
+    counts = queue.counts()
+    queue.close()
+    return {
+        "workers": pool_size,
+        "items": len(tweets),
+        "seconds": round(seconds, 2),
+        "posts_per_second": round(sum(posted.values()) / seconds, 1),
+        "posted": sum(posted.values()),
+        "duplicates": sum(n - 1 for n in posted.values()),
+        "failed_attempts": sum(result["failed"] for result in results),
+        "leases_lost": sum(result["lost"] for result in results),
+        "left": {state: sum(per_class.values()) for state, per_class in counts.items() if state != "done"},
+    }
+
+
+def run_document(pool_size, tweets, args, workdir):
+    path = os.path.join(workdir, f"scheduled-{pool_size}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tweets, f)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(pool_size) as pool:
+        results = pool.map(document_worker, [(path, f"worker-{i}", args.latency_ms / 1000)
+                                             for i in range(pool_size)])
+    posted = Counter(text for result in results for text in result)
+    return {"workers": pool_size, "posted": sum(posted.values()),
+            "duplicates": sum(n - 1 for n in posted.values()),
+            "never_posted": len(tweets) - len(posted)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Time one post takes")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Fraction of posts that fail and are retried")
+    parser.add_argument("--lease-seconds", type=float, default=1.0)
+    parser.add_argument("--daily-limit", type=int, default=50, help="Limit for the quota run")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    tweets = make_tweets(args.items)
+    pool_sizes = [int(n) for n in args.workers.split(",")]
+    with tempfile.TemporaryDirectory() as workdir:
+        scaling = [run_leases("scaling", n, tweets, args, workdir) for n in pool_sizes]
+        crash = run_leases("crash", max(pool_sizes), tweets, args, workdir, crash=8)
+        slow = run_leases("heartbeat", max(pool_sizes), tweets[:2 * max(pool_sizes)], args, workdir,
+                          latency_ms=2000 * args.lease_seconds)
+        quota_config = {"posting_limits": {"daily_limit": args.daily_limit, "reservations": {}}}
+        quota = run_leases("quota", max(pool_sizes), tweets, args, workdir, quota_config)
+        document = run_document(max(pool_sizes), tweets, args, workdir)
+
+    base = scaling[0]["posts_per_second"]
+    for run in scaling:
+        run["speedup"] = round(run["posts_per_second"] / base, 2)
+    lease_runs = scaling + [crash, slow]
+    # Every item ends posted exactly once, or given up on after max_attempts failed posts
+    # (a lost lease means another worker posted the item as well)
+    ok = (all(run["duplicates"] == 0 and run["leases_lost"] == 0
+              and run["posted"] + run["left"].get("failed", 0) == run["items"]
+              and not run["left"].get("queued") and not run["left"].get("leased") for run in lease_runs)
+          and quota["duplicates"] == 0 and quota["posted"] == min(args.daily_limit, args.items))
+    results = {
+        "benchmark": "leases",
+        "items": args.items,
+        "latency_ms": args.latency_ms,
+        "failure_rate": args.failure_rate,
+        "scaling": scaling,
+        "crash_recovery": crash,
+        "heartbeat": slow,
+        "quota": {"daily_limit": args.daily_limit, **quota},
+        "document_rewrite_baseline": document,
+        "ok": ok,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Metrics overhead benchmark
+Measures the per-call cost of @timed and its share of the sentiment hot path
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import metrics, timed
+from bot.sentiment_analyzer import SentimentAnalyzer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def per_call_ns(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def sentiment_seconds(analyzer, texts, repeats):
+    """Best-of-N wall time for one pass over texts, alternating metrics off/on to cancel drift"""
+    best = {False: float("inf"), True: float("inf")}
+    for _ in range(repeats):
+        for enabled in (False, True):
+            metrics.enabled = enabled
+            start = time.perf_counter()
+            for text in texts:
+                analyzer.analyze_sentiment(text)
+            best[enabled] = min(best[enabled], time.perf_counter() - start)
+    metrics.enabled = True
+    return best[False], best[True]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000, help="Calls for the decorator micro-benchmark")
+    parser.add_argument("--repeats", type=int, default=15, help="Passes over the corpus; best is kept")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.sentiment_analyzer").setLevel(logging.WARNING)
+
+    def bare():
+        pass
+
+    @timed("overhead_probe_seconds")
+    def instrumented():
+        pass
+
+    bare_ns = per_call_ns(bare, args.calls)
+    instrumented_ns = per_call_ns(instrumented, args.calls)
+
+    with open(os.path.join(REPO_ROOT, "tweet_post_log.txt"), encoding="utf-8") as f:
+        texts = [line.split(": ", 1)[-1].strip() for line in f if "Posted tweet:" in line]
+    analyzer = SentimentAnalyzer()
+    off, on = sentiment_seconds(analyzer, texts, args.repeats)
+
+    results = {
+        "benchmark": "metrics_overhead",
+        "decorator_overhead_ns": round(instrumented_ns - bare_ns, 1),
+        "sentiment_texts": len(texts),
+        "sentiment_seconds_metrics_off": round(off, 4),
+        "sentiment_seconds_metrics_on": round(on, 4),
+        "sentiment_overhead_percent": round((on - off) / off * 100, 3),
+        "sentiment_overhead_percent_from_decorator": round((instrumented_ns - bare_ns) * 1e-9 * len(texts) / off * 100, 4),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
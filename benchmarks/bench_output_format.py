@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Output format benchmark
+Parses every batch in raw_response_log.txt with the old per-batch
+'Post N:' regex and with bot.output_format, and times the JSON path on the
+same posts
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.output_format import parse_posts, HEADER_PATTERN
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH_HEADER = re.compile(r"^(?:.*: )?Batch \d+ response:[ \t]*$", re.MULTILINE)
+
+
+def legacy_parse(raw_text):
+    """generate_scheduled_tweets.py before the output format engine, regex compiled per batch"""
+    pattern = re.compile(r"Post \d+:\s*\n((?:.*\n)*?)(?=\nPost \d+:\s*\n|\Z)", re.DOTALL)
+    return [match.strip() for match in pattern.findall(raw_text)]
+
+
+def engine_parse(raw_text, fmt):
+    return [post["text"] for post in parse_posts(raw_text, fmt)]
+
+
+def run(parse, batches, repeats):
+    """Best-of-N seconds for one pass, plus the posts from the last pass"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = [parse(batch) for batch in batches]
+        best = min(best, time.perf_counter() - start)
+    posts = [post for result in results for post in result]
+    return {
+        "seconds": round(best, 6),
+        "batches_per_second": round(len(batches) / best, 1),
+        "megabytes_per_second": round(sum(len(b.encode("utf-8")) for b in batches) / best / 1e6, 2),
+        "posts": len(posts),
+        "empty_batches": sum(1 for result in results if not result),
+        # A post that still contains a header swallowed its neighbours
+        "merged_posts": sum(1 for post in posts if HEADER_PATTERN.search(post)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--log", default=os.path.join(REPO_ROOT, "raw_response_log.txt"))
+    parser.add_argument("--repeats", type=int, default=20, help="Passes over the log; best is kept")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.output_format").setLevel(logging.ERROR)
+
+    with open(args.log, encoding="utf-8") as f:
+        batches = [b for b in BATCH_HEADER.split(f.read()) if b.strip()]
+
+    text = run(lambda b: engine_parse(b, "text"), batches, args.repeats)
+    as_json = [json.dumps({"posts": [{"text": t, "image_suggestion": None} for t in engine_parse(b, "text")]})
+               for b in batches]
+
+    results = {
+        "benchmark": "output_format",
+        "batches": len(batches),
+        "log_bytes": sum(len(b.encode("utf-8")) for b in batches),
+        "legacy_regex": run(legacy_parse, batches, args.repeats),
+        "engine_text": text,
+        "engine_json": run(lambda b: engine_parse(b, "json"), as_json, args.repeats),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
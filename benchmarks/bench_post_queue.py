@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Post queue benchmark
+Times bot.post_queue.PostQueue push/pop at 100k queued items against a
+plain list scanned for the best aged key (and the old FIFO list.pop(0)),
+then replays an overloaded arrival stream to compare the longest wait per
+class with aging and with strict priority (no aging).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.post_queue import PostQueue, PRIORITY_CLASSES, AGING_SECONDS
+
+
+def make_tweets(n, rng):
+    return [{"text": f"tweet {i}", "priority": rng.choice(PRIORITY_CLASSES), "enqueued": float(i)}
+            for i in range(n)]
+
+
+def bench_heap(tweets, pops):
+    queue = PostQueue()
+    start = time.perf_counter()
+    for tweet in tweets:
+        queue.push(tweet)
+    push_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(pops):
+        queue.pop()
+    return push_seconds, time.perf_counter() - start
+
+
+def bench_list_scan(tweets, pops):
+    """Same ordering from a list: append, then a linear scan and list.pop per dequeue"""
+    items = []
+    start = time.perf_counter()
+    for tweet in tweets:
+        items.append((tweet["enqueued"] + PRIORITY_CLASSES.index(tweet["priority"]) * AGING_SECONDS, tweet))
+    push_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(pops):
+        best = min(range(len(items)), key=lambda i: items[i][0])
+        items.pop(best)
+    return push_seconds, time.perf_counter() - start
+
+
+def bench_fifo(tweets, pops):
+    items = list(tweets)
+    start = time.perf_counter()
+    for _ in range(pops):
+        items.pop(0)
+    return time.perf_counter() - start
+
+
+def max_waits(aging_seconds, hours, rng):
+    """
+    Hourly ticks post 2 tweets while ~2.25 arrive (1 manual/campaign, 1 scheduled, 0.25 fallback);
+    returns the longest wait in hours per class, counting tweets still queued at the end
+    """
+    queue = PostQueue(aging_seconds=aging_seconds)
+    waits = {priority: 0.0 for priority in PRIORITY_CLASSES}
+    posted = {priority: 0 for priority in PRIORITY_CLASSES}
+    n = 0
+    for hour in range(hours):
+        now = hour * 3600.0
+        arrivals = ["manual" if rng.random() < 0.3 else "campaign", "scheduled"]
+        if rng.random() < 0.25:
+            arrivals.append("fallback")
+        for priority in arrivals:
+            n += 1
+            queue.push({"text": f"t{n}", "enqueued": now}, priority)
+        for _ in range(2):
+            tweet = queue.pop()
+            if tweet:
+                posted[tweet["priority"]] += 1
+                waits[tweet["priority"]] = max(waits[tweet["priority"]], (now - tweet["enqueued"]) / 3600)
+    for tweet in queue.tweets():
+        waits[tweet["priority"]] = max(waits[tweet["priority"]], (now - tweet["enqueued"]) / 3600)
+    return {priority: round(wait, 1) for priority, wait in waits.items()}, posted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--pops", type=int, default=2000, help="Dequeues timed for the list baselines")
+    parser.add_argument("--hours", type=int, default=24 * 14, help="Length of the overload replay")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    tweets = make_tweets(args.items, rng)
+
+    heap_push, heap_pop_all = bench_heap(tweets, args.items)
+    scan_push, scan_pop = bench_list_scan(tweets, args.pops)
+    fifo_pop = bench_fifo(tweets, args.pops)
+
+    def us(seconds, ops):
+        return round(seconds / ops * 1e6, 2)
+
+    aged, aged_posted = max_waits(AGING_SECONDS, args.hours, random.Random(11))
+    strict, strict_posted = max_waits(1e12, args.hours, random.Random(11))
+    results = {
+        "benchmark": "post_queue",
+        "items": args.items,
+        "heap_push_us": us(heap_push, args.items),
+        "heap_pop_us": us(heap_pop_all, args.items),
+        "list_scan_push_us": us(scan_push, args.items),
+        "list_scan_pop_us": us(scan_pop, args.pops),
+        "fifo_list_pop0_us": us(fifo_pop, args.pops),
+        "pop_speedup_vs_scan": round(scan_pop / args.pops / (heap_pop_all / args.items), 1),
+        "overload_replay_hours": args.hours,
+        "max_wait_hours_aging": aged,
+        "max_wait_hours_strict": strict,
+        "posted_aging": aged_posted,
+        "posted_strict": strict_posted,
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Record memory benchmark
+Per-record footprint of tweet history and sentiment results as the dicts
+the code used to keep versus bot.records slotted records and columnar
+batches. Tweet text is shared by every layout and not counted.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.records import TweetRecord, TweetColumns, SentimentRecord, SentimentColumns
+
+BASE_ID = 1950000000000000000
+LABELS = ("positive", "neutral", "negative")
+
+
+def measure(build):
+    """Bytes still allocated by build() once it returns, and the object it built"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def legacy_tweets(contents, start):
+    # AnalyticsTracker.record_tweet before bot.records
+    return [{"id": str(BASE_ID + i), "content": content, "type": "intelligent_v2",
+             "timestamp": datetime.fromtimestamp(start + i).isoformat()}
+            for i, content in enumerate(contents)]
+
+
+def record_tweets(contents, start):
+    return [TweetRecord.create(BASE_ID + i, content, "intelligent_v2", start + i)
+            for i, content in enumerate(contents)]
+
+
+def sentiment_results(n):
+    """Random analyze_sentiment() results, built outside the measured region"""
+    rng = random.Random(7)
+    results = []
+    for _ in range(n):
+        neg, pos = rng.random() * 0.3, rng.random() * 0.5
+        compound, polarity = rng.uniform(-1, 1), rng.uniform(-1, 1)
+        combined = (compound + polarity) / 2
+        results.append((LABELS[rng.randrange(3)], abs(combined), neg, 1 - neg - pos, pos, compound, polarity,
+                        combined))
+    return results
+
+
+def legacy_sentiment(raw):
+    # SentimentAnalyzer.analyze_sentiment result dicts
+    return [{"sentiment": label, "confidence": confidence,
+             "vader_scores": {"neg": neg, "neu": neu, "pos": pos, "compound": compound},
+             "textblob_polarity": polarity, "combined_score": combined}
+            for label, confidence, neg, neu, pos, compound, polarity, combined in raw]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    n = args.records
+
+    contents = [f"Tweet number {i} about AI chips and robots" for i in range(n)]
+    start = int(time.time()) - n
+    raw = sentiment_results(n)
+    # Legacy dicts built from the same floats so only container overhead differs
+    legacy_source = legacy_sentiment(raw)
+
+    layouts = {}
+    layouts["tweet_dict"], _ = measure(lambda: legacy_tweets(contents, start))
+    layouts["tweet_record"], records = measure(lambda: record_tweets(contents, start))
+    layouts["tweet_columns"], _ = measure(lambda: TweetColumns(records))
+    layouts["sentiment_dict"], _ = measure(lambda: legacy_sentiment(raw))
+    layouts["sentiment_record"], sentiments = measure(
+        lambda: [SentimentRecord.from_result(result) for result in legacy_source])
+    layouts["sentiment_columns"], _ = measure(lambda: SentimentColumns(sentiments))
+
+    per_record = {name: round(size / n, 1) for name, size in layouts.items()}
+    results = {
+        "benchmark": "records",
+        "records": n,
+        "bytes_per_record": per_record,
+        "tweet_reduction_record": round(per_record["tweet_dict"] / per_record["tweet_record"], 2),
+        "tweet_reduction_columns": round(per_record["tweet_dict"] / per_record["tweet_columns"], 2),
+        "sentiment_reduction_record": round(per_record["sentiment_dict"] / per_record["sentiment_record"], 2),
+        "sentiment_reduction_columns": round(per_record["sentiment_dict"] / per_record["sentiment_columns"], 2),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Re-screen benchmark
+Queues posts, sentences and words from the logs (bot.distilled_sentiment
+fragments) with their stored component scores, then times applying a set
+of screening policies with bot.screening.rescreen against analyzing every
+text again, reports how many items each policy change moved, and checks
+that the stored-score decisions match a full re-analysis.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.distilled_sentiment import load_corpus, fragments
+from bot.screening import SCORES_KEY, ScreeningPolicy, raw_scores, rescreen
+from bot.sentiment_analyzer import SentimentAnalyzer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+POLICIES = [
+    ScreeningPolicy(),
+    ScreeningPolicy(block_confidence=0.3),
+    ScreeningPolicy(block_confidence=0.2, label_threshold=0.2),
+    ScreeningPolicy(block_confidence=0.3, vader_weight=0.8),
+    ScreeningPolicy(block_negative=False),
+    ScreeningPolicy(),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.sentiment_analyzer").setLevel(logging.WARNING)
+    texts = fragments(load_corpus(os.path.join(REPO_ROOT, "raw_response_log.txt"),
+                                  os.path.join(REPO_ROOT, "tweet_post_log.txt")))[:args.items]
+    analyzer = SentimentAnalyzer(backend="lexicon")
+
+    start = time.perf_counter()
+    results = analyzer.analyze_batch(texts)
+    analyze_seconds = time.perf_counter() - start
+    tweets = [{"text": text, SCORES_KEY: raw_scores(result)} for text, result in zip(texts, results)]
+
+    # The default policy on stored scores must decide like the inline check it replaced did on a fresh analysis
+    default = ScreeningPolicy()
+    checked = [dict(tweet) for tweet in tweets]
+    stored = rescreen(checked, default)
+    mismatches = sum(bool(tweet.get("blocked")) != (result["sentiment"] == "negative" and result["confidence"] > 0.5)
+                     for tweet, result in zip(checked, results))
+
+    passes = []
+    timings = []
+    for policy in POLICIES:
+        start = time.perf_counter()
+        report = rescreen(tweets, policy)
+        timings.append(time.perf_counter() - start)
+        passes.append({"policy": asdict(policy), **report, "ms": round(timings[-1] * 1000, 2)})
+
+    rescreen_seconds = sorted(timings)[len(timings) // 2]
+    output = {
+        "benchmark": "rescreen",
+        "items": len(tweets),
+        "full_analysis_seconds": round(analyze_seconds, 3),
+        "rescreen_ms_median": round(rescreen_seconds * 1000, 2),
+        "speedup_vs_reanalysis": round(analyze_seconds / rescreen_seconds),
+        "blocked_by_default_policy": stored["blocked"],
+        "decision_mismatches_vs_reanalysis": mismatches,
+        "passes": passes,
+    }
+    print(json.dumps(output, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Sentiment backend benchmark
+Times SentimentAnalyzer's VADER/TextBlob engine against the distilled
+linear model (bot.distilled_sentiment) over our own posts, one text at a
+time and as one batch, and reports how often the two agree.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.sentiment_analyzer import SentimentAnalyzer
+from bot.distilled_sentiment import DistilledSentiment, DEFAULT_MODEL_FILE, load_corpus, split_corpus, fragments, agreement
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(run, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.path.join(REPO_ROOT, DEFAULT_MODEL_FILE),
+                        help="Distilled weights; trained into a temp file if missing")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes per engine; best is kept")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.sentiment_analyzer").setLevel(logging.WARNING)
+    texts = load_corpus(os.path.join(REPO_ROOT, "raw_response_log.txt"), os.path.join(REPO_ROOT, "tweet_post_log.txt"))
+    lexicon = SentimentAnalyzer(backend="lexicon")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_file = args.model
+        if not os.path.exists(model_file):
+            train, _ = split_corpus(texts)
+            pieces = fragments(train)
+            model_file = os.path.join(tmp, "model.npz")
+            DistilledSentiment.train(pieces, [lexicon.analyze_sentiment(t)["combined_score"] for t in pieces]).save(model_file)
+        distilled = SentimentAnalyzer(backend="distilled", model_file=model_file)
+
+    teacher_scores = [result["combined_score"] for result in lexicon.analyze_batch(texts)]
+    student_scores = [result["combined_score"] for result in distilled.analyze_batch(texts)]
+    lexicon_seconds = best_of(lambda: [lexicon.analyze_sentiment(text) for text in texts], args.repeats)
+    single_seconds = best_of(lambda: [distilled.analyze_sentiment(text) for text in texts], args.repeats)
+    batch_seconds = best_of(lambda: distilled.analyze_batch(texts), args.repeats)
+
+    def rate(seconds):
+        return {"seconds": round(seconds, 4), "texts_per_second": round(len(texts) / seconds, 1),
+                "us_per_text": round(seconds / len(texts) * 1e6, 1)}
+
+    results = {
+        "benchmark": "sentiment",
+        "texts": len(texts),
+        "lexicon": rate(lexicon_seconds),
+        "distilled_per_text": rate(single_seconds),
+        "distilled_batch": rate(batch_seconds),
+        "speedup_per_text": round(lexicon_seconds / single_seconds, 1),
+        "speedup_batch": round(lexicon_seconds / batch_seconds, 1),
+        # Whole corpus, training posts included; `python -m bot.distilled_sentiment report` splits them
+        "agreement": {key: value for key, value in agreement(teacher_scores, student_scores).items()
+                      if key != "confusion"},
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
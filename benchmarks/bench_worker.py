@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Resident worker benchmark
+Wall-clock time of post_tweet.py and generate_fallback_tweet.py invocations
+run cold (BOT_WORKER=off: every run imports and loads everything) versus as
+thin clients of a warm bot.worker, both against the fake X and LLM APIs.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.run_benchmarks import FAKE_ENV
+from utils.worker_client import request
+
+
+def serve_fake(socket):
+    """Worker process body: bot.worker behind the fake network"""
+    from benchmarks.fake_api import FakeAPIConfig, fake_network
+    from bot.worker import serve
+
+    with fake_network(FakeAPIConfig(latency_ms=0, jitter_ms=0)):
+        sys.exit(serve(socket))
+
+
+def run_fake(script):
+    """Client process body: one script run behind the fake network, as the cold path needs"""
+    import runpy
+    from benchmarks.fake_api import FakeAPIConfig, fake_network
+
+    with fake_network(FakeAPIConfig(latency_ms=0, jitter_ms=0)):
+        runpy.run_path(str(REPO_ROOT / script), run_name="__main__")
+
+
+def invoke(script, env, cold, cwd):
+    """Seconds for one script process; cold runs go through run_fake so they hit the fake APIs"""
+    if cold:
+        command = [sys.executable, __file__, "--run", script]
+    else:
+        command = [sys.executable, str(REPO_ROOT / script)]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"{script} failed: {completed.stdout}{completed.stderr}")
+    return elapsed
+
+
+def summarize(samples):
+    return {"median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1), "max_ms": round(max(samples) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve_fake(args.serve)
+    if args.run:
+        return run_fake(args.run)
+
+    results = {"benchmark": "worker", "iterations": args.iterations}
+    with tempfile.TemporaryDirectory() as tmp:
+        socket = os.path.join(tmp, "worker.sock")
+        env = dict(os.environ, **FAKE_ENV, BOT_WORKER_SOCKET=socket, PROMPT="GPU prices",
+                   TWEET_CONTENT="Shipping the resident worker today", FORCE_POST="true",
+                   PYTHONPATH=str(REPO_ROOT))
+        cold_env = dict(env, BOT_WORKER="off")
+
+        for script in ("generate_fallback_tweet.py", "post_tweet.py"):
+            results[f"{script} cold"] = summarize(
+                [invoke(script, cold_env, True, tmp) for _ in range(args.iterations)])
+
+        started = time.perf_counter()
+        worker = subprocess.Popen([sys.executable, __file__, "--serve", socket], cwd=tmp, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(socket):
+                if worker.poll() is not None:
+                    raise RuntimeError("Worker exited during startup")
+                time.sleep(0.01)
+            results["worker_startup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            # Socket round trip alone; warm script runs add interpreter startup on top
+            for command, command_args in (("ping", {}), ("screen", {"texts": ["Shipping the resident worker today"]})):
+                samples = []
+                for _ in range(args.iterations):
+                    started = time.perf_counter()
+                    request(command, path=socket, **command_args)
+                    samples.append(time.perf_counter() - started)
+                results[f"{command} round trip"] = summarize(samples)
+            for script in ("generate_fallback_tweet.py", "post_tweet.py"):
+                results[f"{script} warm"] = summarize(
+                    [invoke(script, env, False, tmp) for _ in range(args.iterations)])
+        finally:
+            worker.terminate()
+            worker.wait(timeout=10)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
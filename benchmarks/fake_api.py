@@ -0,0 +1,407 @@
+"""
+In-process fake X API and LLM provider endpoints
+Every requests.Session (tweepy, openai, plain requests) is routed to these
+handlers while fake_network() is active; unknown hosts fail fast so a
+benchmark can never reach the real network.
+"""
+
+import io
+import json
+import time
+import types
+import calendar
+import random
+import itertools
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from bot.rate_limits import endpoint_key
+from utils import clock
+
+# 1x1 transparent PNG
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360000002000005000157a1f5d10000000049454e44ae426082"
+)
+
+TOPICS = ["Nvidia", "OpenAI", "DeepMind", "AMD", "Intel", "Apple", "Tesla", "Anthropic", "Meta", "Google"]
+
+
+class FakeAPIConfig:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=1234,
+                 lost_response_rate=0.0, rate_limits=None, rate_limit_window=900):
+        """
+        Behaviour shared by all fake endpoints
+
+        Args:
+            latency_ms (float): Fixed delay added to every request
+            jitter_ms (float): Extra uniformly random delay (0..jitter_ms)
+            error_rate (float): Probability that a request fails with error_status
+            error_status (int): HTTP status returned for injected errors
+            seed (int): Seed for jitter and error injection
+            lost_response_rate (float): Probability that a request is handled but answered
+                with error_status anyway, like a timeout after the server committed
+            rate_limits (dict): X endpoint key ('POST /2/tweets') -> requests allowed per window;
+                these endpoints send x-rate-limit-* headers and answer 429 once spent
+            rate_limit_window (float): Window length in seconds
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.lost_response_rate = lost_response_rate
+        self.rate_limits = rate_limits or {}
+        self.rate_limit_window = rate_limit_window
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        if self.latency_ms or jitter:
+            clock.sleep((self.latency_ms + jitter) / 1000)
+
+    def should_fail(self):
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def should_lose_response(self):
+        if not self.lost_response_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.lost_response_rate
+
+
+class FakeXAPI:
+    """/2/users/me, /2/users/:id/tweets, /2/tweets, /2/trends/by/woeid and /1.1/media/upload.json"""
+
+    def __init__(self, rate_limits=None, rate_limit_window=900):
+        self.tweets = []
+        self.media = []
+        self.timeline_requests = 0
+        self.rate_limits = rate_limits or {}
+        self.rate_limit_window = rate_limit_window
+        self.rate_limited = 0
+        # endpoint -> [used, reset epoch]
+        self._windows = {}
+        self._ids = itertools.count(1960000000000000000)
+        self._media_ids = itertools.count(1700000000000000000)
+        self._lock = threading.Lock()
+
+    def handle(self, method, path, body, headers=None, query=""):
+        endpoint = endpoint_key(method, path)
+        limit = self.rate_limits.get(endpoint)
+        if limit is None:
+            return self._handle(method, path, body, headers, query)
+        with self._lock:
+            now = clock.time()
+            window = self._windows.get(endpoint)
+            if window is None or window[1] <= now:
+                window = self._windows[endpoint] = [0, int(now + self.rate_limit_window)]
+            allowed = window[0] < limit
+            if allowed:
+                window[0] += 1
+            limit_headers = {"x-rate-limit-limit": str(limit), "x-rate-limit-remaining": str(limit - window[0]),
+                             "x-rate-limit-reset": str(window[1])}
+        if not allowed:
+            self.rate_limited += 1
+            return 429, {"title": "Too Many Requests", "detail": "Too Many Requests"}, limit_headers
+        status, payload, *extra = self._handle(method, path, body, headers, query)
+        return status, payload, {**(extra[0] if extra else {}), **limit_headers}
+
+    def _handle(self, method, path, body, headers=None, query=""):
+        if method == "GET" and path.startswith("/2/trends/by/woeid/"):
+            etag = '"trends-v1"'
+            if (headers or {}).get("If-None-Match") == etag:
+                return 304, b"", {"ETag": etag}
+            trends = [{"trend_name": name, "tweet_count": 1000 * (len(TOPICS) - i)} for i, name in enumerate(TOPICS)]
+            return 200, {"data": trends}, {"ETag": etag}
+        if method == "GET" and path == "/2/users/me":
+            return 200, {"data": {"id": "1", "name": "Fake Bot", "username": "fake_bot"}}
+        if method == "GET" and path.startswith("/2/users/") and path.endswith("/tweets"):
+            # Newest first from start_time on; the token is the oldest ID returned, so a page
+            # posted to meanwhile does not shift the next one
+            params = parse_qs(query)
+            max_results = int(params.get("max_results", ["100"])[0])
+            until_id = int(params.get("pagination_token", [0])[0])
+            start_time = params.get("start_time", [None])[0]
+            since = calendar.timegm(time.strptime(start_time, "%Y-%m-%dT%H:%M:%SZ")) if start_time else 0
+            with self._lock:
+                hits = [t for t in reversed(self.tweets)
+                        if t["posted_at"] >= since and (not until_id or int(t["id"]) < until_id)]
+            self.timeline_requests += 1
+            page = [{"id": t["id"], "text": t.get("text", "")} for t in hits[:max_results]]
+            meta = {"result_count": len(page)}
+            if len(hits) > max_results:
+                meta["next_token"] = page[-1]["id"]
+            return 200, {"data": page, "meta": meta}
+        if method == "POST" and path == "/2/tweets":
+            payload = json.loads(body or b"{}")
+            with self._lock:
+                tweet_id = str(next(self._ids))
+                self.tweets.append({"id": tweet_id, "posted_at": clock.time(), **payload})
+            return 201, {"data": {"id": tweet_id, "text": payload.get("text", "")}}
+        if method == "POST" and path == "/1.1/media/upload.json":
+            with self._lock:
+                media_id = next(self._media_ids)
+                self.media.append(media_id)
+            return 200, {"media_id": media_id, "media_id_string": str(media_id), "size": len(PNG_BYTES)}
+        return 404, {"title": "Not Found Error", "detail": f"No fake route for {method} {path}"}
+
+
+class FakeLLMAPI:
+    """OpenAI / OpenRouter chat completions, Gemini generateContent and DALL-E images"""
+
+    def __init__(self):
+        self.calls = {"openai": 0, "openrouter": 0, "gemini": 0, "images": 0}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            return next(self._counter)
+
+    def generate_text(self, prompt):
+        """Answer in the shape the prompt asks for"""
+        n = self._next()
+        wants_json = '{"posts"' in prompt
+        if "Post 1:" in prompt or wants_json:
+            posts = []
+            for i in range(1, 6):
+                topic = TOPICS[(n + i) % len(TOPICS)]
+                body = (f"{topic}'s latest research drop #{n}-{i}: a new architecture that trims inference "
+                        f"cost while keeping accuracy flat on every public benchmark.\n"
+                        f"→ {2 + i}.{n % 10}× faster training on the same cluster\n"
+                        f"→ {30 + i}% lower energy per token in production workloads\n"
+                        f"→ Open weights promised for academic labs later this quarter\n"
+                        f"Analysts expect competitors to answer within months as the race for efficient "
+                        f"frontier models keeps accelerating across the industry.\n"
+                        f"The Economic Times")
+                posts.append(body)
+            if wants_json:
+                return json.dumps({"posts": [{"text": body, "image_suggestion": None} for body in posts]})
+            return "---\n" + "\n".join(f"Post {i}:\n{body}\n" for i, body in enumerate(posts, 1)) + "---"
+        topic = TOPICS[n % len(TOPICS)]
+        return f"{topic} just made my GPU feel old again. Upgrade cycle #{n} begins.\n\n\n#AI #Tech"
+
+    def handle(self, provider, method, path, body):
+        payload = json.loads(body or b"{}") if body else {}
+        with self._lock:
+            self.calls[provider] += 1
+        if provider == "images":
+            return 200, {"data": [{"url": "https://fake-images.local/generated.png"}]}
+        if provider == "gemini":
+            prompt = payload["contents"][0]["parts"][0]["text"]
+            return 200, {"candidates": [{"content": {"parts": [{"text": self.generate_text(prompt)}]}}]}
+        prompt = payload["messages"][-1]["content"]
+        return 200, {
+            "id": f"chatcmpl-{self._next()}",
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.generate_text(prompt)},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 200, "total_tokens": len(prompt) // 4 + 200}
+        }
+
+
+class FakeNetworkAdapter(BaseAdapter):
+    """requests transport adapter that answers from the fake APIs"""
+
+    def __init__(self, config, x_api, llm_api):
+        super().__init__()
+        self.config = config
+        self.x_api = x_api
+        self.llm_api = llm_api
+
+    def route(self, method, url, body, headers=None):
+        parsed = urlparse(url)
+        host, path = parsed.hostname, parsed.path
+        if host in ("api.twitter.com", "upload.twitter.com", "api.x.com"):
+            return self.x_api.handle(method, path, body, headers, parsed.query)
+        if host == "api.openai.com":
+            provider = "images" if path.startswith("/v1/images") else "openai"
+            return self.llm_api.handle(provider, method, path, body)
+        if host == "openrouter.ai":
+            return self.llm_api.handle("openrouter", method, path, body)
+        if host == "generativelanguage.googleapis.com":
+            return self.llm_api.handle("gemini", method, path, body)
+        if host == "fake-images.local":
+            return 200, PNG_BYTES
+        raise requests.ConnectionError(f"Offline benchmark: no fake for host {host}")
+
+    def send(self, request, **kwargs):
+        self.config.delay()
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not request.headers.get("Content-Type", "").startswith("application/json"):
+            body = None
+        if self.config.should_fail():
+            status, payload, extra = self.config.error_status, {"title": "Service Unavailable", "detail": "injected"}, []
+        else:
+            status, payload, *extra = self.route(request.method, request.url, body, request.headers)
+            if self.config.should_lose_response():
+                status, payload, extra = self.config.error_status, {"title": "Service Unavailable", "detail": "lost"}, []
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = "OK" if status < 400 else "Error"
+        response.url = request.url
+        response.request = request
+        if isinstance(payload, bytes):
+            response.raw = io.BytesIO(payload)
+            response.headers = CaseInsensitiveDict({"Content-Type": "image/png"})
+        else:
+            response.raw = io.BytesIO(json.dumps(payload).encode("utf-8"))
+            response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        if extra:
+            response.headers.update(extra[0])
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+def make_fake_genai(llm_api, config):
+    """Module standing in for google.generativeai, backed by the fake Gemini endpoint"""
+    genai = types.ModuleType("google.generativeai")
+
+    class GenerativeModel:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, generation_config=None):
+            config.delay()
+            if config.should_fail():
+                raise RuntimeError("503 Service Unavailable (injected)")
+            body = json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode("utf-8")
+            _, payload = llm_api.handle("gemini", "POST", f"/v1beta/models/{self.model_name}:generateContent", body)
+            return types.SimpleNamespace(text=payload["candidates"][0]["content"]["parts"][0]["text"])
+
+    genai.configure = lambda api_key=None, **kwargs: None
+    genai.GenerativeModel = GenerativeModel
+    return genai
+
+
+@contextmanager
+def fake_network(config=None):
+    """
+    Route every requests.Session through the fake APIs
+
+    Yields:
+        tuple: (FakeXAPI, FakeLLMAPI) so callers can inspect what was posted
+    """
+    config = config or FakeAPIConfig()
+    x_api = FakeXAPI(config.rate_limits, config.rate_limit_window)
+    llm_api = FakeLLMAPI()
+    adapter = FakeNetworkAdapter(config, x_api, llm_api)
+    original_get_adapter = requests.Session.get_adapter
+    requests.Session.get_adapter = lambda self, url: adapter
+    try:
+        yield x_api, llm_api
+    finally:
+        requests.Session.get_adapter = original_get_adapter
+
+
+@contextmanager
+def fake_x_server(config=None):
+    """
+    Serve the fake X API over real HTTP on 127.0.0.1, for comparing HTTP
+    clients (requests vs aiohttp) on equal terms: sockets, keep-alive and
+    server-side latency included
+
+    Yields:
+        tuple: (FakeXAPI, base URL)
+    """
+    config = config or FakeAPIConfig()
+    x_api = FakeXAPI(config.rate_limits, config.rate_limit_window)
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so pooled client connections are reused as against the real API
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; Nagle would hold the body for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def serve(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            config.delay()
+            if config.should_fail():
+                status, payload, extra = config.error_status, {"title": "Service Unavailable", "detail": "injected"}, []
+            else:
+                parsed = urlparse(self.path)
+                status, payload, *extra = x_api.handle(self.command, parsed.path, body, self.headers, parsed.query)
+            data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (extra[0] if extra else {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = serve
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-x-server", daemon=True)
+    thread.start()
+    try:
+        yield x_api, f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class RedirectAdapter(HTTPAdapter):
+    """requests transport that sends every request to base_url, keeping path and query"""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        parsed = urlparse(request.url)
+        request.url = self.base_url + parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        return super().send(request, **kwargs)
+
+
+@contextmanager
+def redirect_requests(base_url):
+    """Route every requests.Session to a fake_x_server"""
+    adapter = RedirectAdapter(base_url)
+    original_get_adapter = requests.Session.get_adapter
+    requests.Session.get_adapter = lambda self, url: adapter
+    try:
+        yield adapter
+    finally:
+        requests.Session.get_adapter = original_get_adapter
+        adapter.close()
+
+
+class RedirectSession:
+    """Stands in for the aiohttp.ClientSession given to tweepy's AsyncClient, sending requests to base_url"""
+
+    def __init__(self, session, base_url):
+        self.session = session
+        self.base_url = base_url
+
+    def request(self, method, url, **kwargs):
+        import yarl
+        url = url if isinstance(url, yarl.URL) else yarl.URL(url)
+        return self.session.request(method, yarl.URL(self.base_url + url.raw_path_qs, encoded=True), **kwargs)
+
+    async def close(self):
+        await self.session.close()
@@ -0,0 +1,137 @@
+"""
+Offline fakes for the tweepy client used by the benchmarks
+Replay recorded fixtures so nothing touches the network
+"""
+
+import json
+import re
+import itertools
+from collections import namedtuple
+from pathlib import Path
+from types import SimpleNamespace
+
+# Same shape as tweepy.Response
+Response = namedtuple("Response", ["data", "includes", "errors", "meta"])
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def make_tweet(tweet):
+    """Wrap a fixture dict in an object with tweepy.Tweet-style attributes"""
+    return SimpleNamespace(**tweet)
+
+
+class FakeSearchClient:
+    """
+    Answers search_recent_tweets from an in-memory tweet stream.
+    Tweets are kept newest-first, like the real endpoint returns them.
+    """
+
+    def __init__(self, tweets=None):
+        self.tweets = []
+        self.calls = []
+        self._tokens = {}
+        if tweets:
+            self.publish(tweets)
+
+    @classmethod
+    def from_fixture(cls, name="hashtag_search.json"):
+        with (FIXTURES_DIR / name).open("r", encoding="utf-8") as f:
+            return cls(json.load(f)["tweets"])
+
+    def publish(self, tweets):
+        """Add tweets to the stream (as if they were just posted)"""
+        self.tweets.extend({**t, "id": str(t["id"])} for t in tweets)
+        self.tweets.sort(key=lambda t: int(t["id"]), reverse=True)
+
+    def search_recent_tweets(self, query, *, user_auth=False, **params):
+        self.calls.append((query, dict(params)))
+        terms = [t.lower() for t in re.findall(r"#\w+", query)]
+        since_id = int(params.get("since_id") or 0)
+        max_results = params.get("max_results", 10)
+        # A token stands for the oldest tweet already returned, so pages stay stable while tweets arrive
+        until_id = self._tokens.get(params.get("next_token"))
+
+        hits = [t for t in self.tweets
+                if int(t["id"]) > since_id and (until_id is None or int(t["id"]) < until_id) and
+                any(term in t["text"].lower() for term in terms)]
+        return self._page(hits, max_results, "t")
+
+    def _page(self, hits, max_results, prefix):
+        page = hits[:max_results]
+        meta = {"result_count": len(page)}
+        if page:
+            meta["newest_id"] = page[0]["id"]
+            meta["oldest_id"] = page[-1]["id"]
+        if len(hits) > max_results:
+            token = f"{prefix}{page[-1]['id']}"
+            self._tokens[token] = int(page[-1]["id"])
+            meta["next_token"] = token
+        return Response([make_tweet(t) for t in page] or None, {}, [], meta)
+
+
+class FakeTwitterClient(FakeSearchClient):
+    """Adds the write and mention endpoints on top of FakeSearchClient"""
+
+    def __init__(self, tweets=None, mentions=None):
+        super().__init__(tweets)
+        self.mentions = list(mentions or [])
+        self.posted = []
+        self._ids = itertools.count(1957000000000000000)
+
+    def get_me(self, **params):
+        return Response(SimpleNamespace(id="1", username="fake_bot", name="Fake Bot"), {}, [], {})
+
+    def create_tweet(self, text=None, **params):
+        tweet_id = str(next(self._ids))
+        self.posted.append({"id": tweet_id, "text": text, **params})
+        return Response({"id": tweet_id, "text": text}, {}, [], {})
+
+    def get_users_mentions(self, user_id, *, user_auth=False, **params):
+        """Newest first, max_results per page, paged with next_token/pagination_token like the real endpoint"""
+        since_id = int(params.get("since_id") or 0)
+        until_id = self._tokens.get(params.get("pagination_token"))
+        hits = sorted((m for m in list(self.mentions)
+                       if int(m["id"]) > since_id and (until_id is None or int(m["id"]) < until_id)),
+                      key=lambda m: int(m["id"]), reverse=True)
+        return self._page(hits, params.get("max_results", 10), "m")
+
+
+class FakeMetricsClient:
+    """
+    Answers get_tweets with public_metrics replayed from recorded snapshots.
+    Any registered tweet ID is mapped onto one of the recorded tweets, and the
+    metrics returned are that tweet's last snapshot at the ID's current age.
+    """
+
+    def __init__(self, recorded, now=0.0):
+        self.recorded = recorded
+        self.now = now
+        self.posted = {}
+        self.calls = []
+
+    @classmethod
+    def from_fixture(cls, name="engagement_lookup.json"):
+        with (FIXTURES_DIR / name).open("r", encoding="utf-8") as f:
+            return cls(json.load(f)["tweets"])
+
+    def register(self, tweet_id, posted_at):
+        self.posted[str(tweet_id)] = posted_at
+
+    def _metrics(self, tweet_id):
+        snapshots = self.recorded[int(tweet_id) % len(self.recorded)]["snapshots"]
+        age_hours = (self.now - self.posted[tweet_id]) / 3600
+        metrics = {name: 0 for name in snapshots[0]["public_metrics"]}
+        for snapshot in snapshots:
+            if snapshot["age_hours"] > age_hours:
+                break
+            metrics = snapshot["public_metrics"]
+        return metrics
+
+    def get_tweets(self, ids, *, user_auth=False, **params):
+        if len(ids) > 100:
+            raise ValueError("GET /2/tweets accepts at most 100 IDs")
+        self.calls.append(list(ids))
+        data = [make_tweet({"id": str(i), "public_metrics": self._metrics(str(i))})
+                for i in ids if str(i) in self.posted]
+        return Response(data or None, {}, [], {})
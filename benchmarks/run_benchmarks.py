@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite
+Runs the real pipeline entry points against the in-process fake X API and
+LLM providers and writes throughput and p50/p99 latency to JSON
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import importlib
+import contextlib
+import runpy
+import types
+from pathlib import Path
+from datetime import datetime
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.fake_api import FakeAPIConfig, fake_network, make_fake_genai
+from utils.metrics import metrics
+
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+
+FAKE_ENV = {
+    "TWITTER_CONSUMER_KEY": "fake-consumer-key",
+    "TWITTER_CONSUMER_SECRET": "fake-consumer-secret",
+    "TWITTER_ACCESS_TOKEN": "fake-access-token",
+    "TWITTER_ACCESS_TOKEN_SECRET": "fake-access-token-secret",
+    "TWITTER_BEARER_TOKEN": "fake-bearer-token",
+    "OPENAI_API_KEY": "fake-openai-key",
+    "GOOGLE_GEMINI": "fake-gemini-key",
+}
+
+# ~550 characters, like the scheduled generator's posts; goes out as a thread
+LONG_POST = (
+    "Nvidia's Jetson Thor: The New Robot Brain. Nvidia just dropped Jetson Thor, its most capable "
+    "robotics computer yet, and the numbers matter for anyone building humanoids.\n"
+    "→ 7.5× more AI compute than Jetson Orin\n"
+    "→ 3.1× more CPU power for planning stacks\n"
+    "→ 2× memory for bigger on-device models\n"
+    "Early partners include Boston Dynamics, Figure and Agility, and developer kits ship later this "
+    "year. Expect a wave of on-robot foundation models as the compute budget finally catches up.\n"
+    "The Economic Times"
+)
+
+POSITIVE_CONTENT = [
+    "Excited to share my Python Twitter automation bot! Sentiment analysis working perfectly! #Python #AI",
+    "Amazing results from my intelligent Twitter bot! Love this project! #TwitterBot #Python",
+    "Building the future of social media automation - smart, efficient, and effective! #innovation #tech",
+]
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(name, latencies, items, errors, elapsed, **extra):
+    latencies_ms = [s * 1000 for s in latencies]
+    return {
+        "name": name,
+        "runs": len(latencies),
+        "items": items,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_per_second": round(items / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 3),
+            "p99": round(percentile(latencies_ms, 99), 3),
+            "mean": round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else 0.0,
+            "max": round(max(latencies_ms), 3) if latencies_ms else 0.0,
+        },
+        **extra
+    }
+
+
+@contextlib.contextmanager
+def quiet(verbose):
+    """Swallow the scripts' print/log output unless --verbose"""
+    if verbose:
+        yield
+        return
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def bench_sentiment(args):
+    """SentimentAnalyzer.analyze_sentiment over the posted-tweet log"""
+    from bot.sentiment_analyzer import SentimentAnalyzer
+
+    with (REPO_ROOT / "tweet_post_log.txt").open(encoding="utf-8") as f:
+        texts = [line.split(": ", 1)[-1].strip() for line in f if "Posted tweet:" in line]
+    texts = (texts * (args.sentiment_texts // max(len(texts), 1) + 1))[:args.sentiment_texts]
+
+    with quiet(args.verbose):
+        analyzer = SentimentAnalyzer()
+        latencies = []
+        start = time.perf_counter()
+        for text in texts:
+            t0 = time.perf_counter()
+            analyzer.analyze_sentiment(text)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+    return summarize("sentiment_analyzer", latencies, len(texts), 0, elapsed)
+
+
+def bench_generate_scheduled(args, llm_api):
+    """generate_scheduled_tweets.py end to end, one fresh schedule per run"""
+    script = str(REPO_ROOT / "generate_scheduled_tweets.py")
+    if args.provider == "gemini":
+        genai = make_fake_genai(llm_api, args.fake_config)
+        google = sys.modules.setdefault("google", types.ModuleType("google"))
+        google.generativeai = genai
+        sys.modules["google.generativeai"] = genai
+    else:
+        # Make the Gemini import fail so the script falls back to OpenAI
+        sys.modules["google.generativeai"] = None
+
+    latencies, items, errors = [], 0, 0
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        Path("scheduled_tweets.json").unlink(missing_ok=True)
+        sys.argv = [script, "--max-tweets", str(args.max_tweets), "--batch-size", "5"]
+        t0 = time.perf_counter()
+        with quiet(args.verbose):
+            try:
+                runpy.run_path(script, run_name="__main__")
+            except SystemExit as e:
+                if e.code:
+                    errors += 1
+        latencies.append(time.perf_counter() - t0)
+        if Path("scheduled_tweets.json").exists():
+            with open("scheduled_tweets.json", encoding="utf-8") as f:
+                items += len(json.load(f)["tweets"])
+    elapsed = time.perf_counter() - start
+    sys.modules.pop("google.generativeai", None)
+    return summarize("generate_scheduled_tweets", latencies, items, errors, elapsed,
+                     provider=args.provider, llm_calls=dict(llm_api.calls))
+
+
+def bench_post_tweets(args, x_api):
+    """post_scheduled_tweet.post_tweets draining a freshly written schedule"""
+    from tenacity import wait_none
+    from bot import scheduled_poster
+    from bot.post_queue import QUOTA_KEY
+
+    with quiet(args.verbose):
+        module = importlib.import_module("post_scheduled_tweet")
+    module.poster.image_probability = args.image_probability
+    if not args.real_retry_waits:
+        module.poster.retrying.wait = wait_none()
+        if module.poster.images:
+            scheduled_poster.generate_image.retry.wait = wait_none()
+
+    random.seed(99)
+    latencies, items = [], 0
+    posted_before = len(x_api.tweets)
+    start = time.perf_counter()
+    for run in range(args.iterations):
+        # Run/index prefix keeps every text (and every thread's first part) unique
+        tweets = [{"text": f"{run}-{i} "
+                   + (LONG_POST if i < args.post_count * args.thread_fraction else "Benchmark tweet"),
+                   "image_suggestion": "A chip on fire" if i % 2 else None}
+                  for i in range(args.post_count)]
+        with open("scheduled_tweets.json", "w", encoding="utf-8") as f:
+            json.dump({"date": datetime.utcnow().strftime("%Y-%m-%d"), "tweets": tweets}, f)
+        # Every run starts the day's quota afresh (bot/post_queue.py, and today's posts in the lease
+        # queue, bot/leases.py); the benchmark measures throughput
+        module.state.delete(QUOTA_KEY)
+        os.environ["LEASE_DB"] = f".state/leases-{run}.sqlite3"
+        t0 = time.perf_counter()
+        with quiet(args.verbose):
+            items += module.post_tweets(args.post_count)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    attempted = args.iterations * args.post_count
+    # Later thread parts repeat across threads, so a duplicate is the same text replying to the same tweet
+    texts = [(tweet.get("text"), str(tweet.get("reply"))) for tweet in x_api.tweets[posted_before:]]
+    return summarize("post_scheduled_tweet.post_tweets", latencies, items, attempted - items, elapsed,
+                     create_tweet_requests=len(texts), duplicate_posts=len(texts) - len(set(texts)),
+                     media_uploads=len(x_api.media), rate_limited=x_api.rate_limited)
+
+
+def bench_production_bot(args):
+    """ProductionBotV2.schedule_and_post_content with the inter-post wait disabled; deferred posts are queued"""
+    from production_bot_v2 import ProductionBotV2
+    from bot.analytics import AnalyticsTracker
+
+    with quiet(args.verbose):
+        bot = ProductionBotV2()
+    bot.post_interval_seconds = 0
+
+    latencies, items = [], 0
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        with quiet(args.verbose):
+            bot.analytics = AnalyticsTracker()
+        t0 = time.perf_counter()
+        with quiet(args.verbose):
+            items += bot.schedule_and_post_content(POSITIVE_CONTENT)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    attempted = args.iterations * len(POSITIVE_CONTENT)
+    return summarize("ProductionBotV2.schedule_and_post_content", latencies, items, attempted - items, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks")
+    parser.add_argument("--iterations", type=int, default=20, help="Runs per benchmark")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake API latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random fake API latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake requests that fail")
+    parser.add_argument("--lost-response-rate", type=float, default=0.0,
+                        help="Fraction of fake requests that succeed but answer 503 (checks duplicate posts)")
+    parser.add_argument("--tweet-rate-limit", type=int,
+                        help="Fake POST /2/tweets limit per 15-minute window (sends x-rate-limit headers)")
+    parser.add_argument("--provider", choices=["gemini", "openai"], default="gemini",
+                        help="LLM backend used by generate_scheduled_tweets.py")
+    parser.add_argument("--max-tweets", type=int, default=50, help="--max-tweets passed to the generator")
+    parser.add_argument("--llm-cache", choices=["off", "exact", "variation"], default="variation",
+                        help="LLM_CACHE_MODE for the scripts; the cache persists across iterations")
+    parser.add_argument("--post-count", type=int, default=8, help="Tweets posted per post_tweets run")
+    parser.add_argument("--image-probability", type=float, default=0.2)
+    parser.add_argument("--thread-fraction", type=float, default=0.25,
+                        help="Share of scheduled posts long enough to go out as threads")
+    parser.add_argument("--sentiment-texts", type=int, default=2000)
+    parser.add_argument("--real-retry-waits", action="store_true",
+                        help="Keep tenacity's 5 s retry waits instead of retrying immediately")
+    parser.add_argument("--only", nargs="+", choices=["sentiment", "generate", "post", "production"],
+                        help="Run only these benchmarks")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/e2e-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show script output")
+    args = parser.parse_args()
+    args.fake_config = FakeAPIConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                                     lost_response_rate=args.lost_response_rate,
+                                     rate_limits={"POST /2/tweets": args.tweet_rate_limit} if args.tweet_rate_limit else None)
+    selected = set(args.only or ["sentiment", "generate", "post", "production"])
+
+    os.environ.update(FAKE_ENV)
+    os.environ["LLM_CACHE_MODE"] = args.llm_cache
+    output = Path(args.output) if args.output else RESULTS_DIR / f"e2e-{datetime.utcnow():%Y%m%dT%H%M%SZ}.json"
+    output = output.resolve()
+    original_argv, original_cwd = list(sys.argv), os.getcwd()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir, fake_network(args.fake_config) as (x_api, llm_api):
+        os.chdir(workdir)
+        try:
+            if "sentiment" in selected:
+                results.append(bench_sentiment(args))
+            if "generate" in selected:
+                results.append(bench_generate_scheduled(args, llm_api))
+            if "post" in selected:
+                results.append(bench_post_tweets(args, x_api))
+            if "production" in selected:
+                results.append(bench_production_bot(args))
+        finally:
+            os.chdir(original_cwd)
+            sys.argv = original_argv
+
+    report = {
+        "benchmark": "e2e",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fake_api": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "lost_response_rate": args.lost_response_rate,
+            "tweet_rate_limit": args.tweet_rate_limit,
+        },
+        "iterations": args.iterations,
+        "results": results,
+        "metrics": metrics.summary(),
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for result in results:
+        latency = result["latency_ms"]
+        print(f"{result['name']:<45} {result['throughput_per_second']:>10.2f}/s  "
+              f"p50 {latency['p50']:>9.3f} ms  p99 {latency['p99']:>9.3f} ms  errors {result['errors']}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Pipeline simulation
+Replays weeks of hourly cron ticks against the in-process fake X and LLM
+APIs under a SimulatedClock (utils.clock), so a month of scheduling, quota
+and queue behaviour runs in seconds:
+
+  scheduled   the scheduled workflow: generate_scheduled_tweets.py at
+              00:00 UTC, post_scheduled_tweet.py --slots every hour
+  production  ProductionBotV2.schedule_and_post_content on a fresh batch of
+              content every hour, its 30 s inter-post waits included
+
+Reports posts per day, quota violations (daily/monthly limits, X 429s,
+duplicate posts), queue starvation and latency distributions, and exits 1
+on any violation so capacity changes can be checked automatically.
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import runpy
+import argparse
+import tempfile
+import importlib
+from pathlib import Path
+from collections import Counter
+from datetime import datetime, timezone
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.fake_api import FakeAPIConfig, fake_network, make_fake_genai
+from benchmarks.run_benchmarks import FAKE_ENV, POSITIVE_CONTENT, percentile, quiet
+from bot.outbox import Outbox, POSTED
+from bot.slots import SLOTS_KEY, SlotPlanner, Timetable
+from config.settings import get_bot_config
+from utils.clock import SimulatedClock, use_clock
+
+HOUR = 3600
+
+
+def distribution(samples, scale=1.0, digits=1):
+    """p50/p90/p99/max of samples, multiplied by scale"""
+    scaled = [s * scale for s in samples]
+    return {"count": len(scaled),
+            "p50": round(percentile(scaled, 50), digits),
+            "p90": round(percentile(scaled, 90), digits),
+            "p99": round(percentile(scaled, 99), digits),
+            "max": round(max(scaled), digits) if scaled else 0.0}
+
+
+def limit_violations(per_day, daily_limit, monthly_limit):
+    """Days over the daily limit and rolling 30-day windows over the monthly one"""
+    days = sorted(per_day)
+    over_daily = {day: count for day, count in per_day.items() if count > daily_limit}
+    over_monthly = []
+    for i, day in enumerate(days):
+        window = sum(per_day[d] for d in days[i:i + 30])
+        if window > monthly_limit:
+            over_monthly.append({"from": day, "posts": window})
+    return over_daily, over_monthly
+
+
+class ScheduledSimulation:
+    """State carried across the scheduled workflow's ticks"""
+
+    def __init__(self, args, clock, llm_api, fake_config):
+        self.args = args
+        self.clock = clock
+        genai = make_fake_genai(llm_api, fake_config)
+        google = sys.modules.setdefault("google", types.ModuleType("google"))
+        google.generativeai = genai
+        sys.modules["google.generativeai"] = genai
+        with quiet(args.verbose):
+            self.post_module = importlib.import_module("post_scheduled_tweet")
+        self.state = self.post_module.state
+        self.planner, self.quota = SlotPlanner.from_config()
+        self.generated_at = {}
+        self.counted = set()
+        self.queue_waits = []
+        self.slot_lateness = []
+        self.starved_ticks = 0
+        self.starved_slots = 0
+        self.missed_slots = 0
+        self.dropped = 0
+        self.generated = 0
+
+    def queue(self):
+        return [tweet["text"] for tweet in (self.state.load_json("scheduled_tweets") or {}).get("tweets", [])]
+
+    def generate(self):
+        """The once-daily generator run; an earlier day's leftovers are replaced, not kept"""
+        before = set(self.queue())
+        script = str(REPO_ROOT / "generate_scheduled_tweets.py")
+        sys.argv = [script, "--max-tweets", str(self.args.max_tweets), "--batch-size", "5"]
+        with quiet(self.args.verbose):
+            try:
+                runpy.run_path(script, run_name="__main__")
+            except SystemExit:
+                pass
+        after = self.queue()
+        new = [text for text in after if text not in self.generated_at]
+        self.generated += len(new)
+        for text in new:
+            self.generated_at[text] = self.clock.time()
+        self.dropped += len(before - set(after))
+
+    def post(self):
+        """One hourly post run; returns how many scheduled tweets went out"""
+        now = self.clock.time()
+        saved = self.state.load_json(SLOTS_KEY)
+        previous = Timetable.from_dict(saved) if saved else None
+        with quiet(self.args.verbose):
+            posted = self.post_module.post_due_slots(self.args.post_count)
+            self.post_module.rate_limits.save()
+        timetable = Timetable.from_dict(self.state.load_json(SLOTS_KEY))
+
+        if previous and previous.day != timetable.day:
+            self.missed_slots += len(previous.slots) - previous.consumed
+            previous = None
+        consumed_before = previous.consumed if previous else 0
+        self.slot_lateness += [now - slot for slot in timetable.slots[consumed_before:timetable.consumed]]
+        backlog = timetable.due(now)
+        if backlog:
+            self.starved_slots += min(backlog, self.args.post_count)
+            if not self.queue() and not Outbox(self.state).queued():
+                self.starved_ticks += 1
+
+        outbox = Outbox(self.state)
+        for key, item in outbox.items.items():
+            if item["state"] == POSTED and key not in self.counted:
+                self.counted.add(key)
+                if item["text"] in self.generated_at:
+                    self.queue_waits.append(item["updated"] - self.generated_at[item["text"]])
+        return posted
+
+    def finish(self):
+        saved = self.state.load_json(SLOTS_KEY)
+        timetable = Timetable.from_dict(saved) if saved else None
+        return {
+            "generated": self.generated,
+            "dropped_unposted": self.dropped,
+            "left_in_queue": len(self.queue()),
+            "missed_slots": self.missed_slots + (timetable.due(self.clock.time()) if timetable else 0),
+            "starved_ticks": self.starved_ticks,
+            "unfilled_due_slots": self.starved_slots,
+            "queue_wait_hours": distribution(self.queue_waits, 1 / HOUR),
+            "slot_lateness_minutes": distribution(self.slot_lateness, 1 / 60),
+        }
+
+
+class ProductionSimulation:
+    """ProductionBotV2 given a fresh batch of content every tick"""
+
+    def __init__(self, args, clock):
+        from production_bot_v2 import ProductionBotV2
+
+        self.args = args
+        self.clock = clock
+        with quiet(args.verbose):
+            self.bot = ProductionBotV2()
+        self.tick = 0
+
+    def post(self):
+        self.tick += 1
+        contents = [f"{self.tick}-{i} {POSITIVE_CONTENT[i % len(POSITIVE_CONTENT)]}"
+                    for i in range(self.args.post_count)]
+        with quiet(self.args.verbose):
+            return self.bot.schedule_and_post_content(contents)
+
+    def finish(self):
+        return {"simulated_sleep_hours": round(self.clock.slept / HOUR, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay hourly cron ticks under a simulated clock")
+    parser.add_argument("--pipeline", choices=["scheduled", "production"], default="scheduled")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--start", default="2024-01-01", help="UTC date the simulation starts at midnight of")
+    parser.add_argument("--post-count", type=int, default=2,
+                        help="--count per post run (scheduled) or contents per tick (production)")
+    parser.add_argument("--max-tweets", type=int, default=50, help="--max-tweets passed to the generator")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Simulated fake API latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake requests that fail")
+    parser.add_argument("--tweet-rate-limit", type=int,
+                        help="Fake POST /2/tweets limit per 15-minute window (sends x-rate-limit headers)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show script output")
+    args = parser.parse_args()
+
+    limits = get_bot_config()["posting_limits"]
+    fake_config = FakeAPIConfig(args.latency_ms, error_rate=args.error_rate,
+                                rate_limits={"POST /2/tweets": args.tweet_rate_limit} if args.tweet_rate_limit else None)
+    start = datetime.strptime(args.start, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    clock = SimulatedClock(start)
+
+    os.environ.update(FAKE_ENV)
+    os.environ["LLM_CACHE_MODE"] = "off"
+    os.environ["STATE_BACKEND"] = "file"
+    original_argv, original_cwd = list(sys.argv), os.getcwd()
+    tick_seconds, per_tick = [], []
+    wall_start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir, use_clock(clock), fake_network(fake_config) as (x_api, llm_api):
+        os.chdir(workdir)
+        try:
+            if args.pipeline == "scheduled":
+                simulation = ScheduledSimulation(args, clock, llm_api, fake_config)
+            else:
+                simulation = ProductionSimulation(args, clock)
+            for tick in range(args.days * 24):
+                clock.advance_to(start + tick * HOUR)
+                t0 = time.perf_counter()
+                if args.pipeline == "scheduled" and clock.utcnow().hour == 0:
+                    simulation.generate()
+                per_tick.append(simulation.post())
+                tick_seconds.append(time.perf_counter() - t0)
+            details = simulation.finish()
+        finally:
+            os.chdir(original_cwd)
+            sys.argv = original_argv
+            sys.modules.pop("google.generativeai", None)
+    wall_seconds = time.perf_counter() - wall_start
+
+    # Local days of the posting timezone, as the daily limit is meant; a day whose
+    # posting window the simulation did not reach the end of is left out
+    planner, _ = SlotPlanner.from_config()
+    end = start + len(per_tick) * HOUR
+    posts_per_day = Counter()
+    for tick, posted in enumerate(per_tick):
+        day = planner.today(start + tick * HOUR)
+        if planner.window(day)[1] < end:
+            posts_per_day[day.isoformat()] += posted
+    requests_per_day = Counter(datetime.fromtimestamp(tweet["posted_at"], timezone.utc).date().isoformat()
+                               for tweet in x_api.tweets)
+    over_daily, over_monthly = limit_violations(posts_per_day, limits["daily_limit"], limits["monthly_limit"])
+    counts = list(posts_per_day.values())
+    # Later thread parts repeat across threads, so a duplicate is the same text replying to the same tweet
+    texts = [(tweet.get("text"), str(tweet.get("reply"))) for tweet in x_api.tweets]
+    duplicates = len(texts) - len(set(texts))
+
+    results = {
+        "benchmark": "simulate_pipeline",
+        "pipeline": args.pipeline,
+        "days": args.days,
+        "ticks": len(per_tick),
+        "wall_seconds": round(wall_seconds, 2),
+        "simulated_to_wall": round(args.days * 86400 / wall_seconds),
+        "limits": {"daily": limits["daily_limit"], "monthly": limits["monthly_limit"],
+                   "tweet_rate_limit_15min": args.tweet_rate_limit},
+        "posts": sum(per_tick),
+        "create_tweet_requests": len(x_api.tweets),
+        "posts_per_day": {"min": min(counts), "mean": round(sum(counts) / len(counts), 2), "max": max(counts)},
+        "create_tweet_requests_per_day_max": max(requests_per_day.values(), default=0),
+        "violations": {
+            "days_over_daily_limit": over_daily,
+            "windows_over_monthly_limit": over_monthly,
+            "x_rate_limited_responses": x_api.rate_limited,
+            "duplicate_posts": duplicates,
+        },
+        "details": details,
+        "tick_runtime_ms": distribution(tick_seconds, 1000, 2),
+        "daily": dict(sorted(posts_per_day.items())),
+    }
+    violated = bool(over_daily or over_monthly or x_api.rate_limited or duplicates)
+    results["ok"] = not violated
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if violated else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,21 @@
 import logging
-from datetime import datetime
+
+from bot.records import TweetRecord, TweetColumns
+from utils import clock
 
 logger = logging.getLogger(__name__)
 
 class AnalyticsTracker:
-    def __init__(self):
+    def __init__(self, columnar=False):
+        """
+        Initialize analytics tracker
+
+        Args:
+            columnar (bool): Keep each day's tweets in a TweetColumns batch instead of a
+                list of TweetRecords; smaller for very long histories
+        """
         self.daily_stats = {}
+        self.columnar = columnar
         logger.info("AnalyticsTracker initialized")
 
     def get_daily_stats(self, date_str):
@@ -15,15 +25,15 @@ class AnalyticsTracker:
         """
         return self.daily_stats.get(date_str, {})
 
+    def get_daily_tweets(self, date_str):
+        """Tweets recorded on date_str in the original dict form"""
+        return [record.to_dict() for record in self.get_daily_stats(date_str).get("tweets", [])]
+
     def record_tweet(self, tweet_id, content, tweet_type="intelligent_v2"):
-        date_str = datetime.now().date().isoformat()
+        now = clock.now()
+        date_str = now.date().isoformat()
         if date_str not in self.daily_stats:
-            self.daily_stats[date_str] = {"tweets_posted": 0, "tweets": []}
+            self.daily_stats[date_str] = {"tweets_posted": 0, "tweets": TweetColumns() if self.columnar else []}
         self.daily_stats[date_str]["tweets_posted"] += 1
-        self.daily_stats[date_str]["tweets"].append({
-            "id": tweet_id,
-            "content": content,
-            "type": tweet_type,
-            "timestamp": datetime.now().isoformat()
-        })
+        self.daily_stats[date_str]["tweets"].append(TweetRecord.create(tweet_id, content, tweet_type, now))
         logger.info(f"Recorded tweet: {tweet_id}")
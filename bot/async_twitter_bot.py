@@ -0,0 +1,219 @@
+"""
+Async Twitter Bot Module
+TwitterBot's post_tweet/get_user_info contract on tweepy's aiohttp-based
+AsyncClient, so posts and lookups for one or many accounts overlap their
+network waits instead of queueing behind each other. Every request of a
+bot goes through one semaphore (bounded concurrency), and bots can share
+one aiohttp session and one RateLimitManager.
+
+Requires tweepy's async extra (aiohttp, async_lru).
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+import aiohttp
+import tweepy
+from tweepy.asynchronous import AsyncClient
+
+from .sentiment_analyzer import SentimentAnalyzer
+from .screening import ScreeningPolicy
+from .rate_limits import RateLimitManager, RateLimitDeferred, DEFAULT_ACCOUNT, CREATE_TWEET
+from config.settings import get_api_credentials
+from utils.metrics import timer, inc
+
+logger = logging.getLogger(__name__)
+
+
+class ObservedAsyncClient(AsyncClient):
+    """AsyncClient that waits for a semaphore slot per request and feeds response headers to a RateLimitManager"""
+
+    def __init__(self, *args, semaphore, rate_limits, account=DEFAULT_ACCOUNT, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.semaphore = semaphore
+        self.rate_limits = rate_limits
+        self.account = account
+
+    async def request(self, method, route, params=None, json=None, user_auth=False):
+        async with self.semaphore:
+            try:
+                response = await super().request(method, route, params=params, json=json, user_auth=user_auth)
+            except tweepy.HTTPException as e:
+                self._observe(e.response)
+                raise
+        self._observe(response)
+        return response
+
+    def _observe(self, response):
+        self.rate_limits.observe_headers(response.method, response.url, response.status, response.headers,
+                                         self.account)
+
+
+class AsyncTwitterBot:
+    def __init__(self, rate_limits=None, max_concurrency=8, session=None, semaphore=None,
+                 sentiment_analyzer=None, credentials=None, account=DEFAULT_ACCOUNT, screening=None):
+        """
+        Initialize async Twitter bot; call await start() (or use async with) before posting
+
+        Args:
+            rate_limits (RateLimitManager): Shared across bots and with the sync TwitterBot if given
+            max_concurrency (int): Requests this bot keeps in flight at once
+            session (aiohttp.ClientSession): Shared session; the bot opens and closes its own if None
+            semaphore (asyncio.Semaphore): Shared limit across bots; overrides max_concurrency
+            sentiment_analyzer (SentimentAnalyzer): Shared analyzer; a new one if None
+            credentials (dict): API credentials for this account; from the environment if None
+            account (str): Account name for rate-limit tracking
+            screening (ScreeningPolicy): Post screening; from the bot config if None, as TwitterBot
+        """
+        self.rate_limits = rate_limits or RateLimitManager()
+        self.max_concurrency = max_concurrency
+        self.session = session
+        self._owns_session = session is None
+        self.semaphore = semaphore
+        self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
+        self.screening = screening or ScreeningPolicy.from_config()
+        self.credentials = credentials or get_api_credentials()
+        self.account = account
+        self.client = None
+        self.user = None
+
+    async def start(self):
+        """Open the session and authenticate; leaves self.client None on failure, like TwitterBot"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        # Created here: a semaphore belongs to the running event loop
+        self.semaphore = self.semaphore or asyncio.Semaphore(self.max_concurrency)
+        client = ObservedAsyncClient(
+            bearer_token=self.credentials.get('bearer_token') or None,
+            consumer_key=self.credentials['consumer_key'],
+            consumer_secret=self.credentials['consumer_secret'],
+            access_token=self.credentials['access_token'],
+            access_token_secret=self.credentials['access_token_secret'],
+            semaphore=self.semaphore,
+            rate_limits=self.rate_limits,
+            account=self.account
+        )
+        client.session = self.session
+        try:
+            me = await client.get_me()
+            if me.data:
+                self.user = me.data
+                self.client = client
+                logger.info(f"Successfully authenticated as: @{me.data.username}")
+            else:
+                logger.error("Authentication failed - no user data returned")
+        except Exception as e:
+            logger.error(f"Failed to initialize async Twitter API: {e}")
+        return self
+
+    async def close(self):
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def post_tweet(self, content, force_post=False):
+        """
+        Post a tweet with sentiment analysis
+
+        Args:
+            content (str): Tweet content
+            force_post (bool): Skip sentiment check if True
+
+        Returns:
+            dict: Result with success status and tweet info (same shape as TwitterBot.post_tweet)
+        """
+        if not self.client:
+            return {
+                'success': False,
+                'error': 'Twitter API not initialized'
+            }
+
+        if not force_post:
+            sentiment_result = self.sentiment_analyzer.analyze_sentiment(content)
+            if self.screening.blocks(sentiment_result):
+                return {
+                    'success': False,
+                    'error': 'Blocked due to negative sentiment',
+                    'sentiment': sentiment_result
+                }
+
+        try:
+            self.rate_limits.check(CREATE_TWEET, self.account)
+            with timer("create_tweet_seconds"):
+                response = await self.client.create_tweet(text=content)
+            tweet_id = response.data['id']
+            inc("tweets_posted_total")
+            logger.info(f"Tweet posted successfully! ID: {tweet_id}")
+            return {
+                'success': True,
+                'tweet_id': tweet_id,
+                'url': f"https://twitter.com/i/web/status/{tweet_id}",
+                'content': content,
+                'timestamp': datetime.now().isoformat()
+            }
+        except (RateLimitDeferred, tweepy.TooManyRequests) as e:
+            logger.warning(f"Tweet deferred: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'retry_after': self.rate_limits.retry_after(CREATE_TWEET, self.account)
+            }
+        except Exception as e:
+            logger.error(f"Failed to post tweet: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    async def get_user_info(self):
+        """Get authenticated user information"""
+        if not self.client:
+            return None
+        try:
+            me = await self.client.get_me()
+            return {
+                'id': me.data.id,
+                'username': me.data.username,
+                'name': me.data.name
+            }
+        except Exception as e:
+            logger.error(f"Failed to get user info: {e}")
+            return None
+
+    async def post_many(self, contents, force_post=False):
+        """post_tweet for each content concurrently (bounded by the semaphore); results in input order"""
+        return await asyncio.gather(*(self.post_tweet(content, force_post) for content in contents))
+
+
+async def post_for_accounts(accounts, contents, max_concurrency=8, force_post=False):
+    """
+    Post the same contents from several accounts over one session and one concurrency limit
+
+    Args:
+        accounts (dict): Account name -> credentials dict
+        contents (list): Tweet texts each account posts
+        max_concurrency (int): Requests in flight across all accounts
+
+    Returns:
+        dict: Account name -> list of post_tweet results
+    """
+    rate_limits = RateLimitManager()
+    analyzer = SentimentAnalyzer()
+    screening = ScreeningPolicy.from_config()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async with aiohttp.ClientSession() as session:
+        bots = [AsyncTwitterBot(rate_limits=rate_limits, session=session, semaphore=semaphore,
+                                sentiment_analyzer=analyzer, screening=screening, credentials=credentials,
+                                account=name)
+                for name, credentials in accounts.items()]
+        await asyncio.gather(*(bot.start() for bot in bots))
+        results = await asyncio.gather(*(bot.post_many(contents, force_post) for bot in bots))
+    rate_limits.save()
+    return dict(zip(accounts, results))
@@ -0,0 +1,355 @@
+"""
+Auto-Reply Module
+Matches incoming mentions against the reply keywords in a single pass and
+replies within the daily reply budget. The mention cursor, the day's budget and
+the recently seen mention IDs are kept in the state store, so a restart neither
+re-answers mentions nor starts the day's budget over
+"""
+
+import random
+import logging
+from collections import OrderedDict, deque
+
+from bot.records import SentimentRecord
+from bot.screening import ScreeningPolicy
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = "auto_reply_state"
+
+DEFAULT_REPLIES = [
+    "Thanks for the mention! Always happy to talk {keyword}.",
+    "Appreciate you bringing up {keyword}! Great point.",
+    "Love seeing more people excited about {keyword}!",
+]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton for case-insensitive whole-word keyword matching"""
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(k.lower() for k in keywords if k))
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for keyword in self.keywords:
+            self._add(keyword)
+        self._build()
+
+    def _add(self, keyword):
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(keyword)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """
+        Return the keywords found in text, in order of first occurrence.
+        Matches must not be embedded inside a longer word ('AI' does not match 'said').
+        """
+        text = text.lower()
+        found = []
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                for keyword in out[state]:
+                    start = i - len(keyword) + 1
+                    if ((start == 0 or not text[start - 1].isalnum()) and
+                            (i + 1 == len(text) or not text[i + 1].isalnum()) and
+                            keyword not in found):
+                        found.append(keyword)
+        return found
+
+
+class CachedSentiment:
+    """LRU cache in front of SentimentAnalyzer.analyze_sentiment, holding compact SentimentRecords"""
+
+    def __init__(self, analyzer, maxsize=4096):
+        self.analyzer = analyzer
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze_sentiment(self, text):
+        result = self._cache.get(text)
+        if result is not None:
+            self._cache.move_to_end(text)
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = SentimentRecord.from_result(self.analyzer.analyze_sentiment(text))
+        self._cache[text] = result
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return result
+
+
+class ReplyBudget:
+    """Daily reply counter that resets when the date changes"""
+
+    def __init__(self, max_daily_replies):
+        self.max_daily_replies = max_daily_replies
+        self.date = clock.now().date()
+        self.used = 0
+
+    def _roll(self):
+        today = clock.now().date()
+        if today != self.date:
+            self.date = today
+            self.used = 0
+
+    def remaining(self):
+        self._roll()
+        return max(0, self.max_daily_replies - self.used)
+
+    def consume(self):
+        """Take one reply from today's budget; False if it is exhausted"""
+        if self.remaining() <= 0:
+            return False
+        self.used += 1
+        return True
+
+    def refund(self):
+        """Give back a reply that was taken but not sent"""
+        self._roll()
+        self.used = max(self.used - 1, 0)
+
+    def to_dict(self):
+        return {"date": self.date.isoformat(), "used": self.used}
+
+    def restore(self, data):
+        """Take over a saved day's count; one from an earlier day is ignored"""
+        if data and data.get("date") == clock.now().date().isoformat():
+            self.date = clock.now().date()
+            self.used = data.get("used", 0)
+
+
+class AutoReplyEngine:
+    def __init__(self, client, sentiment_analyzer, keywords, max_daily_replies=50,
+                 batch_size=100, screening=None, replies=None, seen_size=10000, store=None,
+                 saved_seen=1000, max_reply_attempts=3):
+        """
+        Initialize auto-reply engine
+
+        Args:
+            client: tweepy.Client used for mention lookups and replies
+            sentiment_analyzer: SentimentAnalyzer (wrapped in an LRU cache)
+            keywords (list): Reply keywords from the bot config
+            max_daily_replies (int): Daily reply budget
+            batch_size (int): Mentions processed per batch
+            screening (ScreeningPolicy): Gate for negative mentions; from the bot config if None
+            replies (list): Reply templates, formatted with {keyword}
+            seen_size (int): Recent handled (answered or screened out) mention IDs remembered, so
+                one delivered by both the webhook and a poll (bot/events.py) is answered once
+            store: State backend the cursor, budget and seen IDs are kept in; see attach()
+            saved_seen (int): Newest seen IDs written to the store
+            max_reply_attempts (int): Failed replies to one mention before it is given up on
+        """
+        self.client = client
+        self.sentiment = CachedSentiment(sentiment_analyzer)
+        self.automaton = KeywordAutomaton(keywords)
+        self.budget = ReplyBudget(max_daily_replies)
+        self.batch_size = batch_size
+        self.screening = screening or ScreeningPolicy.from_config()
+        self.replies = replies or DEFAULT_REPLIES
+        self.since_id = None
+        self.seen = OrderedDict()
+        self.seen_size = seen_size
+        self.saved_seen = saved_seen
+        self.max_reply_attempts = max_reply_attempts
+        # Mention ID -> failed replies so far; retried until max_reply_attempts
+        self.failures = {}
+        self.store = None
+        self.stats = {"processed": 0, "duplicate": 0, "matched": 0, "negative": 0, "replied": 0,
+                      "over_budget": 0, "failed": 0}
+        if store is not None:
+            self.attach(store)
+        logger.info(f"Auto-reply engine initialized with {len(self.automaton.keywords)} keywords")
+
+    def attach(self, store):
+        """
+        Restore the cursor, budget and seen IDs from a state backend and save to it from now on.
+        Attach from the thread that replies; the SQLite backend's connection is per-thread.
+        """
+        self.store = store
+        data = store.load_json(STATE_KEY) or {}
+        self.since_id = data.get("since_id") or self.since_id
+        self.budget.restore(data.get("budget"))
+        for mention_id in data.get("seen", []):
+            self.seen[mention_id] = True
+        while len(self.seen) > self.seen_size:
+            self.seen.popitem(last=False)
+
+    def save_state(self):
+        """Write the cursor, budget and newest seen IDs to the attached store, if any"""
+        if self.store is None:
+            return
+        # Every handled ID past the cursor, so a re-fetch does not answer it again, and the newest
+        # saved_seen for webhook deliveries that arrive after their poll
+        newest = set(list(self.seen)[-self.saved_seen:]) if self.saved_seen else set()
+        cursor = int(self.since_id) if self.since_id else 0
+        seen = [mention_id for mention_id in self.seen
+                if mention_id in newest or (mention_id.isdigit() and int(mention_id) > cursor)]
+        self.store.save_json(STATE_KEY, {"since_id": self.since_id, "budget": self.budget.to_dict(),
+                                         "seen": seen})
+
+    def select_candidates(self, mentions):
+        """
+        Keyword and sentiment gate for one batch of mentions
+
+        Returns:
+            list: (mention, keywords) pairs worth replying to
+        """
+        candidates = []
+        for mention in mentions:
+            self.stats["processed"] += 1
+            keywords = self.automaton.find(mention.text)
+            if not keywords:
+                self.remember(mention)
+                continue
+            self.stats["matched"] += 1
+            sentiment_result = self.sentiment.analyze_sentiment(mention.text)
+            if self.screening.blocks_scores(sentiment_result.scores()):
+                self.stats["negative"] += 1
+                self.remember(mention)
+                continue
+            candidates.append((mention, keywords))
+        return candidates
+
+    def reply(self, mention, keywords):
+        """Post a reply to a mention; returns the reply tweet ID or None"""
+        text = random.choice(self.replies).format(keyword=keywords[0])
+        try:
+            response = self.client.create_tweet(text=text, in_reply_to_tweet_id=mention.id)
+            self.stats["replied"] += 1
+            return response.data['id']
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Failed to reply to {mention.id}: {e}")
+            return None
+
+    def unseen(self, mentions):
+        """Drop mentions already answered or screened out, and repeats within the batch"""
+        fresh, ids = [], set()
+        for mention in mentions:
+            mention_id = str(mention.id)
+            if mention_id in self.seen or mention_id in ids:
+                self.stats["duplicate"] += 1
+                continue
+            ids.add(mention_id)
+            fresh.append(mention)
+        return fresh
+
+    def remember(self, mention):
+        """Mark a mention handled: answered, screened out or given up on"""
+        mention_id = str(mention.id)
+        self.seen[mention_id] = True
+        self.failures.pop(mention_id, None)
+        while len(self.seen) > self.seen_size:
+            self.seen.popitem(last=False)
+
+    def _reply_failed(self, mention):
+        """Refund the budget; the mention is retried unless it has failed too often"""
+        self.budget.refund()
+        mention_id = str(mention.id)
+        self.failures[mention_id] = self.failures.get(mention_id, 0) + 1
+        if self.failures[mention_id] >= self.max_reply_attempts:
+            logger.warning(f"Giving up on mention {mention_id} after {self.failures[mention_id]} failed replies")
+            self.remember(mention)
+
+    def process_mentions(self, mentions, save=True):
+        """
+        Screen and answer mentions in batches of batch_size. A mention over the budget or whose
+        reply failed is not remembered, so a later delivery or poll tries it again
+
+        Args:
+            mentions (list): Mentions with id and text
+            save (bool): Save the engine's state to its store afterwards
+
+        Returns:
+            list: Reply result dicts
+        """
+        mentions = self.unseen(mentions)
+        if not mentions:
+            return []
+        results = []
+        for start in range(0, len(mentions), self.batch_size):
+            if self.budget.remaining() <= 0:
+                self.stats["over_budget"] += len(mentions) - start
+                break
+            for mention, keywords in self.select_candidates(mentions[start:start + self.batch_size]):
+                if not self.budget.consume():
+                    self.stats["over_budget"] += 1
+                    continue
+                reply_id = self.reply(mention, keywords)
+                if reply_id is None:
+                    self._reply_failed(mention)
+                else:
+                    self.remember(mention)
+                results.append({
+                    'mention_id': str(mention.id),
+                    'keywords': keywords,
+                    'reply_id': reply_id,
+                    'success': reply_id is not None
+                })
+        if save:
+            self.save_state()
+        return results
+
+    def poll_mentions(self, user_id):
+        """
+        Fetch every mention newer than the cursor, page by page, and process them oldest first
+
+        The cursor only moves past mentions that were handled, so one over the budget or whose
+        reply failed is fetched again by the next poll; after a failed page it stays put.
+        """
+        params = {"max_results": 100, "tweet_fields": ["author_id", "created_at"], "user_auth": True}
+        if self.since_id:
+            params["since_id"] = self.since_id
+        mentions, complete = [], False
+        while True:
+            try:
+                response = self.client.get_users_mentions(user_id, **params)
+            except Exception as e:
+                logger.error(f"Failed to fetch mentions: {e}")
+                break
+            mentions.extend(response.data or [])
+            next_token = (response.meta or {}).get("next_token")
+            if not next_token:
+                complete = True
+                break
+            params["pagination_token"] = next_token
+        if not mentions:
+            return []
+        mentions.sort(key=lambda mention: int(mention.id))
+        results = self.process_mentions(mentions, save=False)
+        if complete:
+            pending = [mention for mention in mentions if str(mention.id) not in self.seen]
+            self.since_id = str(int(pending[0].id) - 1) if pending else str(mentions[-1].id)
+        self.save_state()
+        return results
@@ -0,0 +1,262 @@
+"""
+Distilled Sentiment
+A linear model over hashed word unigrams and bigrams, trained offline to
+reproduce SentimentAnalyzer's combined VADER/TextBlob score on our own
+posts (raw_response_log.txt, tweet_post_log.txt). Weights are one NumPy
+vector, so scoring a batch is one sparse dot product instead of two
+pure-Python lexicon passes per text. Same thresholds and result shape as
+the lexicon engine; select it with SENTIMENT_BACKEND=distilled.
+
+    python -m bot.distilled_sentiment train     # writes models/sentiment_distilled.npz
+    python -m bot.distilled_sentiment report    # agreement with the lexicon engine
+"""
+
+import re
+import zlib
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_FILE = "models/sentiment_distilled.npz"
+DEFAULT_BITS = 18
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+|[!?]|[\U0001F300-\U0001FAFF☀-➿]")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+BATCH_HEADER = re.compile(r"^(?:.*: )?Batch \d+ response:[ \t]*$", re.MULTILINE)
+BIAS = "<bias>"
+
+
+def tokens(text):
+    """Lowercased words, ! and ? and emoji, plus a marker per ALL-CAPS word (VADER's emphasis cue)"""
+    words = TOKEN_PATTERN.findall(text.lower())
+    caps = sum(1 for word in text.split() if len(word) > 1 and word.isupper())
+    return words + ["<caps>"] * caps
+
+
+def features(text, mask):
+    """Hashed unigram and bigram bucket indices for one text, bias first"""
+    words = tokens(text)
+    grams = [BIAS] + words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(gram.encode("utf-8")) & mask for gram in grams]
+
+
+def featurize(texts, bits=DEFAULT_BITS):
+    """
+    Batch of texts as a CSR-style sparse matrix of feature counts
+
+    Returns:
+        tuple: (indices, values, row_ids) int64/float32/int64 arrays, one entry per feature occurrence
+    """
+    mask = (1 << bits) - 1
+    rows = [features(text, mask) for text in texts]
+    lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+    indices = np.fromiter((index for row in rows for index in row), dtype=np.int64, count=int(lengths.sum()))
+    # Raw counts: length-normalizing them fit the teacher worse on held-out posts
+    values = np.ones(len(indices), dtype=np.float32)
+    row_ids = np.repeat(np.arange(len(rows)), lengths)
+    return indices, values, row_ids
+
+
+def sparse_dot(matrix, weights, n_rows):
+    indices, values, row_ids = matrix
+    return np.bincount(row_ids, weights=values * weights[indices], minlength=n_rows)
+
+
+def sparse_dot_transpose(matrix, vector, size):
+    indices, values, row_ids = matrix
+    return np.bincount(indices, weights=values * vector[row_ids], minlength=size)
+
+
+class DistilledSentiment:
+    def __init__(self, weights, bits=DEFAULT_BITS):
+        """
+        Initialize distilled model
+
+        Args:
+            weights (np.ndarray): float32 vector of 2**bits hashed feature weights
+            bits (int): Hash width
+        """
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bits = bits
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_FILE):
+        with np.load(path) as data:
+            return cls(data["weights"], int(data["bits"]))
+
+    def save(self, path=DEFAULT_MODEL_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            np.savez_compressed(f, weights=self.weights, bits=self.bits)
+        tmp_path.replace(path)
+
+    @classmethod
+    def train(cls, texts, scores, bits=DEFAULT_BITS, l2=0.3, iterations=200):
+        """
+        Ridge regression onto the teacher's combined scores, solved by conjugate gradient
+
+        Args:
+            texts (list): Training texts
+            scores (list): SentimentAnalyzer combined_score for each text
+            l2 (float): Ridge penalty
+            iterations (int): Conjugate gradient steps
+
+        Returns:
+            DistilledSentiment
+        """
+        size = 1 << bits
+        matrix = featurize(texts, bits)
+        n = len(texts)
+        y = np.asarray(scores, dtype=np.float64)
+
+        def normal(w):
+            return sparse_dot_transpose(matrix, sparse_dot(matrix, w, n), size) + l2 * w
+
+        w = np.zeros(size)
+        residual = sparse_dot_transpose(matrix, y, size)
+        direction = residual.copy()
+        rs = residual @ residual
+        for _ in range(iterations):
+            step = normal(direction)
+            alpha = rs / (direction @ step)
+            w += alpha * direction
+            residual -= alpha * step
+            rs_next = residual @ residual
+            if rs_next < 1e-10:
+                break
+            direction = residual + (rs_next / rs) * direction
+            rs = rs_next
+        return cls(w.astype(np.float32), bits)
+
+    def scores(self, texts):
+        """Predicted combined scores for a batch, clipped to [-1, 1]"""
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        return np.clip(sparse_dot(featurize(texts, self.bits), self.weights, len(texts)), -1.0, 1.0)
+
+    def analyze_batch(self, texts):
+        """Result dicts shaped like SentimentAnalyzer.analyze_sentiment's"""
+        texts = [text or "" for text in texts]
+        results = []
+        for text, score in zip(texts, self.scores(texts).tolist()):
+            if not text or not text.strip():
+                score = 0.0
+            results.append({
+                "sentiment": label(score),
+                "confidence": abs(score),
+                "vader_scores": {},
+                "textblob_polarity": 0.0,
+                "combined_score": score,
+                "backend": "distilled",
+            })
+        return results
+
+
+def label(score):
+    if score >= POSITIVE_THRESHOLD:
+        return "positive"
+    if score <= NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+def load_corpus(raw_log="raw_response_log.txt", post_log="tweet_post_log.txt"):
+    """Unique post texts from the LLM response log and the posted-tweet log"""
+    from bot.output_format import parse_posts
+
+    texts = []
+    if Path(raw_log).exists():
+        raw = Path(raw_log).read_text(encoding="utf-8")
+        for batch in BATCH_HEADER.split(raw):
+            if batch.strip():
+                texts.extend(post["text"] for post in parse_posts(batch, "text"))
+    if Path(post_log).exists():
+        with open(post_log, encoding="utf-8") as f:
+            texts.extend(line.split(": ", 1)[-1].strip() for line in f if "Posted tweet:" in line)
+    return list(dict.fromkeys(text for text in texts if text.strip()))
+
+
+def split_corpus(texts, holdout=0.2):
+    """Deterministic train/holdout split by text hash"""
+    cut = int(holdout * 1000)
+    train, test = [], []
+    for text in texts:
+        (test if zlib.crc32(text.encode("utf-8")) % 1000 < cut else train).append(text)
+    return train, test
+
+
+def fragments(texts):
+    """
+    Each post, its sentences and its distinct words, so the model also learns
+    the teacher's judgement of each phrase and word on its own
+    """
+    pieces = []
+    words = set()
+    for text in texts:
+        pieces.append(text)
+        sentences = [s.strip() for s in SENTENCE_PATTERN.split(text) if len(s.strip()) > 3]
+        if len(sentences) > 1:
+            pieces.extend(sentences)
+        words.update(TOKEN_PATTERN.findall(text.lower()))
+    return list(dict.fromkeys(pieces + sorted(words)))
+
+
+def agreement(teacher_scores, student_scores):
+    """Label agreement, confusion counts and score error between the two engines"""
+    teacher = [label(score) for score in teacher_scores]
+    student = [label(score) for score in student_scores]
+    confusion = {}
+    for t, s in zip(teacher, student):
+        confusion.setdefault(t, {}).setdefault(s, 0)
+        confusion[t][s] += 1
+    errors = np.abs(np.asarray(teacher_scores) - np.asarray(student_scores))
+    return {
+        "texts": len(teacher),
+        "agreement": round(sum(t == s for t, s in zip(teacher, student)) / max(len(teacher), 1), 4),
+        # The case post_tweet.py blocks on: negative with confidence >= 0.5
+        "blocking_agreement": round(sum((t <= -0.5) == (s <= -0.5) for t, s in zip(teacher_scores, student_scores))
+                                    / max(len(teacher), 1), 4),
+        "mean_abs_error": round(float(errors.mean()), 4) if len(errors) else 0.0,
+        "confusion": confusion,
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    from bot.sentiment_analyzer import SentimentAnalyzer
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the distilled sentiment model")
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("--model", default=DEFAULT_MODEL_FILE)
+    parser.add_argument("--raw-log", default="raw_response_log.txt")
+    parser.add_argument("--post-log", default="tweet_post_log.txt")
+    parser.add_argument("--bits", type=int, default=DEFAULT_BITS)
+    parser.add_argument("--l2", type=float, default=0.3)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of posts kept out of training")
+    args = parser.parse_args()
+
+    logging.getLogger("bot.sentiment_analyzer").setLevel(logging.WARNING)
+    teacher = SentimentAnalyzer(backend="lexicon")
+    train_texts, test_texts = split_corpus(load_corpus(args.raw_log, args.post_log), args.holdout)
+
+    def teacher_scores(texts):
+        return [teacher.analyze_sentiment(text).get("combined_score", 0.0) for text in texts]
+
+    if args.command == "train":
+        pieces = fragments(train_texts)
+        model = DistilledSentiment.train(pieces, teacher_scores(pieces), args.bits, args.l2)
+        model.save(args.model)
+        print(f"✅ Trained on {len(pieces)} texts from {len(train_texts)} posts; saved {args.model}")
+    report = {"model": args.model}
+    model = DistilledSentiment.load(args.model)
+    for name, texts in (("train", train_texts), ("holdout", test_texts)):
+        report[name] = agreement(teacher_scores(texts), model.scores(texts).tolist())
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,276 @@
+"""
+Engagement Collector
+Fetches public metrics for posted tweets with the 100-ID tweet lookup.
+Each tweet is polled on a schedule that thins out with age (fresh tweets
+every 15 minutes, day-old ones every few hours, week-old ones retired), so
+a pass only looks at due tweets and its cost follows the number of active
+tweets rather than the whole history. Samples are kept as int64 arrays and
+only appended when a metric changed.
+"""
+
+import sys
+import zlib
+import heapq
+import base64
+import logging
+from array import array
+from datetime import datetime
+
+from utils.metrics import inc, set_gauge
+from utils import clock
+from bot.rate_limits import TWEET_LOOKUP
+
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_KEY = "engagement"
+BATCH_SIZE = 100  # GET /2/tweets accepts up to 100 IDs
+METRICS = ("like_count", "retweet_count", "reply_count", "quote_count", "impression_count")
+# (maximum age, poll interval) in seconds; older than the last tier is retired
+TIERS = (
+    (6 * 3600, 15 * 60),
+    (48 * 3600, 2 * 3600),
+    (7 * 86400, 24 * 3600),
+)
+
+
+def engagement_score(metrics):
+    """Likes, replies and quotes count once, retweets twice; impressions are not engagement"""
+    likes, retweets, replies, quotes = metrics[:4]
+    return likes + 2 * retweets + replies + quotes
+
+
+class EngagementSeries:
+    """Metric samples for one tweet: a time column and len(METRICS) values per sample"""
+
+    __slots__ = ("posted", "times", "values")
+
+    def __init__(self, posted, times=(), values=()):
+        self.posted = int(posted)
+        self.times = array("q", times)
+        self.values = array("q", values)
+
+    def append(self, at, public_metrics):
+        """Record a sample; returns False (and stores nothing) if no metric changed"""
+        sample = [int(public_metrics.get(name, 0) or 0) for name in METRICS]
+        if self.values and list(self.values[-len(METRICS):]) == sample:
+            return False
+        self.times.append(int(at))
+        self.values.extend(sample)
+        return True
+
+    def latest(self):
+        return tuple(self.values[-len(METRICS):]) if self.values else None
+
+    def __len__(self):
+        return len(self.times)
+
+    def to_dict(self):
+        """Sample times as offsets from posting, packed with the values into one zlib/base64 string"""
+        packed = array("q", (t - self.posted for t in self.times)) + self.values
+        if sys.byteorder == "big":
+            packed.byteswap()
+        return {"posted": self.posted, "n": len(self.times),
+                "data": base64.b64encode(zlib.compress(packed.tobytes())).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, data):
+        packed = array("q")
+        if data.get("n"):
+            packed.frombytes(zlib.decompress(base64.b64decode(data["data"])))
+            if sys.byteorder == "big":
+                packed.byteswap()
+        n = data.get("n", 0)
+        return cls(data["posted"], (data["posted"] + offset for offset in packed[:n]), packed[n:])
+
+
+class EngagementCollector:
+    def __init__(self, store, key=ENGAGEMENT_KEY, tiers=TIERS, batch_size=BATCH_SIZE, rate_limits=None):
+        """
+        Initialize engagement collector
+
+        Args:
+            store: bot.state_store backend the series and poll schedule are kept in
+            key (str): State key
+            tiers (tuple): (maximum age, poll interval) pairs in seconds, youngest first
+            batch_size (int): IDs per lookup request (X allows 100)
+            rate_limits (RateLimitManager): Stops a pass early once tweet lookup is spent
+        """
+        self.store = store
+        self.key = key
+        self.tiers = tiers
+        self.batch_size = batch_size
+        self.rate_limits = rate_limits
+        data = store.load_json(key, {})
+        self.series = {tweet_id: EngagementSeries.from_dict(entry)
+                       for tweet_id, entry in data.get("series", {}).items()}
+        # tweet ID -> next poll time, for active tweets only; the heap may hold stale entries
+        self.due = {tweet_id: float(at) for tweet_id, at in data.get("due", {}).items()}
+        self._heap = [(at, tweet_id) for tweet_id, at in self.due.items()]
+        heapq.heapify(self._heap)
+
+    def interval(self, age):
+        """Poll interval for a tweet of this age, or None once it is retired"""
+        for max_age, interval in self.tiers:
+            if age < max_age:
+                return interval
+        return None
+
+    def _schedule(self, tweet_id, now):
+        interval = self.interval(now - self.series[tweet_id].posted)
+        if interval is None:
+            self.due.pop(tweet_id, None)
+            return
+        self.due[tweet_id] = now + interval
+        heapq.heappush(self._heap, (now + interval, tweet_id))
+
+    def track(self, tweet_id, posted_at=None, now=None):
+        """Start following a posted tweet; a no-op for tweets already known"""
+        tweet_id = str(tweet_id)
+        if tweet_id in self.series:
+            return False
+        now = now if now is not None else clock.time()
+        posted = posted_at if posted_at is not None else now
+        self.series[tweet_id] = EngagementSeries(posted)
+        if self.interval(now - posted) is not None:
+            # First sample once the tweet has had one interval to collect engagement
+            self.due[tweet_id] = posted + self.tiers[0][1]
+            heapq.heappush(self._heap, (self.due[tweet_id], tweet_id))
+        return True
+
+    def sync_outbox(self, outbox_key="outbox"):
+        """Track every posted outbox item (a thread by its first tweet)"""
+        added = 0
+        for item in self.store.load_json(outbox_key, {}).get("items", {}).values():
+            if item.get("state") == "posted" and item.get("tweet_ids"):
+                added += self.track(item["tweet_ids"][0], item.get("updated"))
+        return added
+
+    def _pop_due(self, now):
+        batch = []
+        while self._heap and self._heap[0][0] <= now:
+            at, tweet_id = heapq.heappop(self._heap)
+            if self.due.get(tweet_id) == at:
+                batch.append(tweet_id)
+        return batch
+
+    def poll(self, client, now=None):
+        """
+        Fetch metrics for every tweet that is due, batch_size IDs per request
+
+        Args:
+            client: tweepy.Client (or any object with get_tweets)
+            now (float): Current time; the wall clock if None
+
+        Returns:
+            dict: due, requests, samples (changed metrics) and retired counts
+        """
+        now = now if now is not None else clock.time()
+        due = self._pop_due(now)
+        stats = {"due": len(due), "requests": 0, "samples": 0, "retired": 0}
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            if self.rate_limits and not self.rate_limits.available(TWEET_LOOKUP):
+                logger.info(f"Tweet lookup rate-limited; {len(due) - start} due tweets wait for the next pass")
+                for tweet_id in due[start:]:
+                    heapq.heappush(self._heap, (self.due[tweet_id], tweet_id))
+                break
+            try:
+                response = client.get_tweets(batch, tweet_fields=["public_metrics"], user_auth=True)
+            except Exception as e:
+                logger.error(f"Engagement lookup failed for {len(batch)} tweets: {e}")
+                for tweet_id in batch:
+                    heapq.heappush(self._heap, (self.due[tweet_id], tweet_id))
+                continue
+            stats["requests"] += 1
+            inc("engagement_lookups_total")
+            found = set()
+            for tweet in response.data or []:
+                tweet_id = str(tweet.id)
+                found.add(tweet_id)
+                stats["samples"] += self.series[tweet_id].append(now, tweet.public_metrics or {})
+            for tweet_id in batch:
+                if tweet_id in found:
+                    self._schedule(tweet_id, now)
+                else:
+                    # Deleted or protected: stop asking
+                    self.due.pop(tweet_id, None)
+                if tweet_id not in self.due:
+                    stats["retired"] += 1
+        set_gauge("engagement_active_tweets", len(self.due))
+        logger.info(f"Engagement pass: {stats['due']} due, {stats['requests']} requests, "
+                    f"{len(self.due)} active of {len(self.series)} tracked")
+        return stats
+
+    def save(self):
+        self.store.save_json(self.key, {
+            "series": {tweet_id: series.to_dict() for tweet_id, series in self.series.items()},
+            "due": self.due,
+        })
+
+    def hourly_weights(self, tz=None):
+        """
+        Mean latest engagement score by posting hour, for bot.slots.SlotPlanner.plan(weights=...)
+
+        Args:
+            tz: pytz timezone the hours are in; local time if None
+
+        Returns:
+            dict: Hour (0-23) -> mean score, only for hours with sampled tweets
+        """
+        totals, counts = {}, {}
+        for series in self.series.values():
+            latest = series.latest()
+            if latest is None:
+                continue
+            hour = datetime.fromtimestamp(series.posted, tz).hour
+            totals[hour] = totals.get(hour, 0) + engagement_score(latest)
+            counts[hour] = counts.get(hour, 0) + 1
+        return {hour: totals[hour] / counts[hour] for hour in totals}
+
+    def report(self):
+        scored = [(tweet_id, engagement_score(series.latest())) for tweet_id, series in self.series.items()
+                  if series.latest() is not None]
+        return {
+            "tracked": len(self.series),
+            "active": len(self.due),
+            "samples": sum(len(series) for series in self.series.values()),
+            "top": [{"id": tweet_id, "score": score}
+                    for tweet_id, score in sorted(scored, key=lambda item: item[1], reverse=True)[:10]],
+        }
+
+
+if __name__ == "__main__":
+    import os
+    import json
+    import argparse
+
+    import tweepy
+
+    from bot.rate_limits import RateLimitManager
+    from bot.state_store import get_state_backend
+
+    parser = argparse.ArgumentParser(description="Collect or show tweet engagement")
+    parser.add_argument("command", choices=["collect", "report"])
+    args = parser.parse_args()
+
+    state = get_state_backend()
+    try:
+        if args.command == "report":
+            print(json.dumps(EngagementCollector(state).report(), indent=2))
+        else:
+            rate_limits = RateLimitManager(".state/rate_limits.json")
+            client = rate_limits.attach(tweepy.Client(
+                consumer_key=os.getenv("TWITTER_CONSUMER_KEY"),
+                consumer_secret=os.getenv("TWITTER_CONSUMER_SECRET"),
+                access_token=os.getenv("TWITTER_ACCESS_TOKEN"),
+                access_token_secret=os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
+            ))
+            collector = EngagementCollector(state, rate_limits=rate_limits)
+            added = collector.sync_outbox()
+            stats = collector.poll(client)
+            collector.save()
+            rate_limits.save()
+            print(f"✅ Engagement: {added} new tweets tracked, {stats['due']} due, "
+                  f"{stats['requests']} lookups, {stats['samples']} changed")
+    finally:
+        state.close()
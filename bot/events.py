@@ -0,0 +1,333 @@
+"""
+Event Intake
+Push-based mention intake for the reply engine. A small webhook receiver
+(X Account Activity API style: CRC challenge on GET, HMAC-SHA256 signed
+POSTs) puts mentions on a bounded in-process queue that the consumer
+thread hands to AutoReplyEngine as they arrive, instead of waiting for
+the next mention poll. Polling stays as the fallback: while the receiver
+runs it drops to an occasional reconcile pass that catches anything a
+full queue or a missed delivery lost (the engine skips mentions it has
+already seen); without a receiver it polls from the base interval,
+backing off while the mention timeline is quiet.
+"""
+
+import hmac
+import json
+import queue
+import base64
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+from urllib.parse import urlparse, parse_qs
+
+from bot.rate_limits import USER_MENTIONS
+from utils import clock
+from utils.metrics import inc, observe
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = "/webhook"
+SIGNATURE_HEADER = "x-twitter-webhooks-signature"
+# Account Activity deliveries are a few KB; anything much larger is refused unread
+MAX_BODY_BYTES = 64 * 1024
+
+
+def sign(body, secret):
+    """'sha256=' + base64 HMAC-SHA256 of body under the app's consumer secret"""
+    digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return "sha256=" + base64.b64encode(digest).decode("ascii")
+
+
+def crc_response(crc_token, secret):
+    """Answer to X's challenge-response check, sent on registration and periodically after"""
+    return {"response_token": sign(crc_token.encode("utf-8"), secret)}
+
+
+def verify_signature(body, signature, secret):
+    return bool(signature) and hmac.compare_digest(sign(body, secret), signature)
+
+
+def mentions_from_event(event):
+    """
+    Mentions of the subscribed user in an Account Activity payload
+
+    Returns:
+        list: tweepy.Tweet-like objects ('id', 'text', 'author_id'); the user's own tweets are left out
+    """
+    user_id = str(event.get("for_user_id", ""))
+    mentions = []
+    for tweet in event.get("tweet_create_events", []):
+        author_id = str(tweet.get("user", {}).get("id_str", ""))
+        mentioned = {str(user.get("id_str")) for user in tweet.get("entities", {}).get("user_mentions", [])}
+        if author_id == user_id or user_id not in mentioned:
+            continue
+        text = tweet.get("extended_tweet", {}).get("full_text") or tweet.get("text", "")
+        mentions.append(SimpleNamespace(id=str(tweet["id_str"]), text=text, author_id=author_id))
+    return mentions
+
+
+class WebhookReceiver:
+    def __init__(self, events, secret, host="127.0.0.1", port=0):
+        """
+        Initialize webhook receiver
+
+        Args:
+            events (queue.Queue): Bounded queue mentions are put on as (mention, received_at)
+            secret (str): App consumer secret, for CRC answers and signatures
+            host (str): Interface to listen on
+            port (int): Port to listen on; 0 picks a free one (see .port)
+        """
+        # Kept out of module import, like the metrics endpoint
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.events = events
+        self.secret = secret
+        # Set when a mention was dropped on a full queue; the consumer polls to recover it
+        self.overflow = threading.Event()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status, payload=None):
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                token = parse_qs(url.query).get("crc_token")
+                if url.path != WEBHOOK_PATH or not token:
+                    self._reply(404)
+                    return
+                inc("webhook_crc_total")
+                self._reply(200, crc_response(token[0], receiver.secret))
+
+            def do_POST(self):
+                if urlparse(self.path).path != WEBHOOK_PATH:
+                    self._reply(404)
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_BYTES:
+                    inc("webhook_rejected_total", reason="size")
+                    # The body is left unread, so the connection cannot be reused
+                    self.close_connection = True
+                    self._reply(413 if length > 0 else 400)
+                    return
+                body = self.rfile.read(length)
+                if not verify_signature(body, self.headers.get(SIGNATURE_HEADER), receiver.secret):
+                    inc("webhook_rejected_total", reason="signature")
+                    self._reply(403)
+                    return
+                try:
+                    event = json.loads(body)
+                except ValueError:
+                    inc("webhook_rejected_total", reason="json")
+                    self._reply(400)
+                    return
+                receiver.accept(event)
+                self._reply(200)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def accept(self, event):
+        """Queue the mentions in one delivered event"""
+        received_at = clock.time()
+        for mention in mentions_from_event(event):
+            try:
+                self.events.put_nowait((mention, received_at))
+                inc("webhook_events_total")
+            except queue.Full:
+                inc("webhook_dropped_total")
+                self.overflow.set()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="webhook-http", daemon=True)
+        self.thread.start()
+        logger.info(f"Webhook receiver listening on port {self.port}{WEBHOOK_PATH}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MentionIntake:
+    def __init__(self, engine, user_id, shutdown_event=None, receiver_config=None, secret=None, rate_limits=None,
+                 persist_state=False):
+        """
+        Initialize mention intake for an AutoReplyEngine
+
+        Args:
+            engine (AutoReplyEngine): Engine that screens and answers mentions
+            user_id (str): Account whose mentions are polled
+            shutdown_event (threading.Event): Stops the consumer when set
+            receiver_config (dict): The 'event_intake' config section; a webhook receiver runs
+                only if it has a 'webhook_port'
+            secret (str): App consumer secret the webhook is signed with
+            rate_limits (RateLimitManager): Skips polls while the mentions window is spent
+            persist_state (bool): Open the state backend in the consumer thread and keep the
+                engine's cursor, budget and seen IDs there across restarts
+        """
+        from config.settings import get_bot_config
+
+        self.engine = engine
+        self.user_id = user_id
+        self.shutdown_event = shutdown_event or threading.Event()
+        self.config = receiver_config or get_bot_config()["event_intake"]
+        self.rate_limits = rate_limits
+        self.persist_state = persist_state
+        self.events = queue.Queue(maxsize=self.config.get("queue_size", 1000))
+        self.receiver = None
+        if self.config.get("webhook_port") is not None and secret:
+            try:
+                self.receiver = WebhookReceiver(self.events, secret, self.config.get("webhook_host", "127.0.0.1"),
+                                                self.config["webhook_port"])
+            except OSError as e:
+                logger.warning(f"Webhook receiver unavailable, polling mentions instead: {e}")
+        self.poll_interval = self.config.get("poll_interval", 60)
+        self.poll_delay = self.poll_interval
+        self.polls = 0
+        self.thread = None
+
+    def next_poll_delay(self, found):
+        """Seconds to the next poll: the reconcile interval while pushed, else back off on a quiet timeline"""
+        if self.receiver:
+            return self.config.get("reconcile_interval", 900)
+        if found:
+            self.poll_delay = self.poll_interval
+        else:
+            self.poll_delay = min(self.poll_delay * 2, self.config.get("max_poll_interval", 900))
+        return self.poll_delay
+
+    def poll(self):
+        """One mention poll; returns the delay before the next"""
+        if self.rate_limits and not self.rate_limits.available(USER_MENTIONS):
+            return max(self.rate_limits.retry_after(USER_MENTIONS), 1)
+        before = self.engine.stats["processed"] + self.engine.stats["duplicate"]
+        self.engine.poll_mentions(self.user_id)
+        self.polls += 1
+        inc("mention_polls_total", mode="reconcile" if self.receiver else "fallback")
+        return self.next_poll_delay(self.engine.stats["processed"] + self.engine.stats["duplicate"] > before)
+
+    def handle(self, batch):
+        self.engine.process_mentions([mention for mention, _ in batch])
+        now = clock.time()
+        for _, received_at in batch:
+            observe("mention_intake_seconds", now - received_at, source="webhook")
+
+    def run(self):
+        store = None
+        if self.persist_state:
+            from bot.state_store import get_state_backend
+
+            store = get_state_backend()
+            self.engine.attach(store)
+        try:
+            self._consume()
+        finally:
+            if store is not None:
+                self.engine.save_state()
+                self.engine.store = None
+                store.close()
+
+    def _consume(self):
+        # Poll once at start to pick up mentions from while the bot was down
+        next_poll = clock.time()
+        while not self.shutdown_event.is_set():
+            timeout = min(max(next_poll - clock.time(), 0), 1.0)
+            try:
+                batch = [self.events.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.engine.batch_size:
+                try:
+                    batch.append(self.events.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self.handle(batch)
+            if self.receiver and self.receiver.overflow.is_set():
+                self.receiver.overflow.clear()
+                next_poll = clock.time()
+            if clock.time() >= next_poll:
+                next_poll = clock.time() + self.poll()
+
+    def start(self):
+        if self.receiver:
+            self.receiver.start()
+        self.thread = threading.Thread(target=self.run, name="mention-intake", daemon=True)
+        self.thread.start()
+        logger.info(f"Mention intake started ({'webhook' if self.receiver else 'polling'})")
+        return self.thread
+
+    def stop(self):
+        self.shutdown_event.set()
+        if self.thread:
+            self.thread.join()
+        if self.receiver:
+            self.receiver.stop()
+
+
+def tweet_create_event(user_id, tweet_id, text, author_id="2", screen_name="bot"):
+    """Account Activity payload for one mention of user_id, as the local emitter sends it"""
+    return {
+        "for_user_id": str(user_id),
+        "tweet_create_events": [{
+            "id_str": str(tweet_id),
+            "text": f"@{screen_name} {text}",
+            "user": {"id_str": str(author_id)},
+            "entities": {"user_mentions": [{"id_str": str(user_id), "screen_name": screen_name}]},
+        }],
+    }
+
+
+def emit(url, event, secret, timeout=5):
+    """POST a signed event to a webhook receiver, as X does; returns the HTTP status"""
+    import requests
+
+    body = json.dumps(event).encode("utf-8")
+    response = requests.post(url, data=body, timeout=timeout,
+                             headers={"Content-Type": "application/json", SIGNATURE_HEADER: sign(body, secret)})
+    return response.status_code
+
+
+if __name__ == "__main__":
+    import os
+    import time
+    import argparse
+    import requests
+
+    parser = argparse.ArgumentParser(description="Local event emitter for the mention webhook")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{os.getenv('WEBHOOK_PORT', '8443')}{WEBHOOK_PATH}")
+    parser.add_argument("--secret", default=os.getenv("TWITTER_CONSUMER_SECRET", ""))
+    sub = parser.add_subparsers(dest="command", required=True)
+    crc = sub.add_parser("crc", help="Send a CRC challenge and check the answer")
+    crc.add_argument("--token", default="local-crc-check")
+    mention = sub.add_parser("mention", help="Send signed mention events")
+    mention.add_argument("text")
+    mention.add_argument("--user-id", required=True, help="The bot account's user ID")
+    mention.add_argument("--count", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == "crc":
+        answer = requests.get(args.url, params={"crc_token": args.token}, timeout=5).json()
+        ok = answer == crc_response(args.token, args.secret)
+        print(f"{'✅' if ok else '❌'} CRC response {answer.get('response_token')}")
+    else:
+        for i in range(args.count):
+            status = emit(args.url, tweet_create_event(args.user_id, time.time_ns(), args.text), args.secret)
+            print(f"{'✅' if status == 200 else '❌'} Event {i + 1}: HTTP {status}")
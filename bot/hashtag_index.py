@@ -0,0 +1,237 @@
+"""
+Hashtag Index
+Inverted index from content keywords to the hashtags our past posts used
+with them. Each keyword has a co-occurrence count per hashtag; its top
+hashtags are kept precomputed, so recommending hashtags for a new tweet is
+a few dictionary lookups and no LLM call. Posts are added incrementally
+(deduplicated by content hash) from the post and raw-response logs, and the
+index is saved in the state store between runs.
+"""
+
+import re
+import math
+import heapq
+import hashlib
+import logging
+
+from bot.threads import MAX_WEIGHTED_LENGTH, weighted_length
+from utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = "hashtag_index"
+TOP_PER_KEYWORD = 16
+# Added to a keyword's post count so a word seen once with a tag doesn't outvote well-supported ones
+SMOOTHING = 8
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9']{2,}")
+# A log entry starts with the timestamp log_event writes
+ENTRY_START = re.compile(r"^\d{4}-\d\d-\d\d[ T][\d:.]+: ")
+BATCH_HEADER = re.compile(r"^(?:.*: )?Batch \d+ response:[ \t]*$", re.MULTILINE)
+POST_ID_SUFFIX = re.compile(r"\s*\(ID: \d+\)\s*$")
+STOPWORDS = frozenset("""
+the and for are but not you your yours with this that these those from have has had was were will would
+can could should just like what when where which who whom why how all any each few more most other some such
+only own same than too very its it's into out over under again then once here there about above below
+between both during before after off our ours they them their theirs she her his him himself herself itself
+myself yourself what's i'm don't can't won't isn't aren't doesn't didn't let's one get got make made new now
+also even still really much many way day time thing things know think see say says said going gonna want
+""".split())
+
+
+def keywords(text):
+    """Distinct content words of a post, hashtags excluded"""
+    return set(WORD_PATTERN.findall(HASHTAG_PATTERN.sub(" ", text.lower()))) - STOPWORDS
+
+
+def post_hash(text):
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def posted_texts(lines):
+    """Tweet texts from tweet_post_log lines; an entry's continuation lines belong to it"""
+    entries = []
+    for line in lines:
+        if ENTRY_START.match(line) or not entries:
+            entries.append([line])
+        else:
+            entries[-1].append(line)
+    texts = []
+    for entry in entries:
+        first = entry[0].split(": ", 1)[-1]
+        if not first.startswith("Posted tweet: "):
+            continue
+        body = [first[len("Posted tweet: "):]] + [line for line in entry[1:]
+                                                  if not line.startswith("Image suggestion:")]
+        texts.append(POST_ID_SUFFIX.sub("", "\n".join(body)).strip())
+    return texts
+
+
+def logged_posts(store, limit=100000):
+    """Post texts from the store's tweet_post_log and raw_response_log (generated batches)"""
+    from bot.output_format import parse_posts
+
+    texts = posted_texts(store.read_log("tweet_post_log", limit))
+    raw = "\n".join(store.read_log("raw_response_log", limit))
+    for batch in BATCH_HEADER.split(raw):
+        if batch.strip():
+            texts.extend(post["text"] for post in parse_posts(batch, "text"))
+    return list(dict.fromkeys(text for text in texts if text.strip()))
+
+
+class HashtagIndex:
+    def __init__(self, data=None, top_per_keyword=TOP_PER_KEYWORD):
+        """
+        Initialize hashtag index
+
+        Args:
+            data (dict): Output of to_dict(), or None for an empty index
+            top_per_keyword (int): Hashtags precomputed per keyword
+        """
+        data = data or {}
+        self.top_per_keyword = top_per_keyword
+        self.docs = data.get("docs", 0)
+        # lowercase tag -> [display form, posts using it]
+        self.tags = data.get("tags", {})
+        # keyword -> [posts containing it, {lowercase tag: posts containing both}]
+        self.keywords = data.get("keywords", {})
+        self.seen = set(data.get("seen", []))
+        # keyword -> [(weight, lowercase tag)], rebuilt lazily after the keyword changes
+        self._top = {}
+
+    def add(self, text):
+        """
+        Index one post; a post seen before is skipped
+
+        Returns:
+            bool: True if the post was new
+        """
+        key = post_hash(text)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self.docs += 1
+        tags = {}
+        for tag in HASHTAG_PATTERN.findall(text):
+            tags.setdefault(tag.lower(), tag)
+        for lower, display in tags.items():
+            entry = self.tags.setdefault(lower, [display, 0])
+            entry[1] += 1
+        for word in keywords(text):
+            entry = self.keywords.setdefault(word, [0, {}])
+            entry[0] += 1
+            for lower in tags:
+                entry[1][lower] = entry[1].get(lower, 0) + 1
+            self._top.pop(word, None)
+        return True
+
+    def add_many(self, texts):
+        return sum(self.add(text) for text in texts)
+
+    def _top_tags(self, word):
+        """Precomputed (weight, tag) pairs for a keyword: smoothed P(tag | keyword) * idf(keyword)"""
+        top = self._top.get(word)
+        if top is None:
+            df, pairs = self.keywords[word]
+            idf = math.log((1 + self.docs) / (1 + df)) + 1.0
+            top = heapq.nlargest(self.top_per_keyword, ((count / (df + SMOOTHING) * idf, tag) for tag, count in pairs.items()))
+            self._top[word] = top
+        return top
+
+    @timed("hashtag_recommend_seconds")
+    def recommend(self, text, n=3):
+        """
+        Top hashtags for a post by summed keyword co-occurrence weight
+
+        Args:
+            text (str): Post content
+            n (int): Hashtags wanted
+
+        Returns:
+            list: Hashtags in their most used spelling ('#StartupLife'), best first;
+            tags already in the text are left out
+        """
+        present = {tag.lower() for tag in HASHTAG_PATTERN.findall(text)}
+        scores = {}
+        for word in keywords(text):
+            if word in self.keywords:
+                for weight, tag in self._top_tags(word):
+                    scores[tag] = scores.get(tag, 0.0) + weight
+        for tag in present:
+            scores.pop(tag, None)
+        # Ties (and posts with no known keyword) fall back to the most used hashtags
+        best = heapq.nlargest(n, scores, key=lambda tag: (scores[tag], self.tags[tag][1]))
+        if len(best) < n:
+            popular = heapq.nlargest(n + len(present) + len(best), self.tags, key=lambda tag: self.tags[tag][1])
+            best += [tag for tag in popular if tag not in present and tag not in best][:n - len(best)]
+        return ["#" + self.tags[tag][0] for tag in best]
+
+    def decorate(self, text, n=3):
+        """
+        Text with up to n recommended hashtags appended after a two-line gap (the format prompts asked for),
+        as many as fit in one tweet; the lowest-ranked are left out first
+        """
+        existing = len(set(tag.lower() for tag in HASHTAG_PATTERN.findall(text)))
+        tags = self.recommend(text, n - existing) if existing < n else []
+        # The text already ends in a hashtag line; extend it
+        separator = " " if existing else "\n\n\n"
+        for count in range(len(tags), 0, -1):
+            decorated = f"{text.rstrip()}{separator}{' '.join(tags[:count])}"
+            if weighted_length(decorated) <= MAX_WEIGHTED_LENGTH:
+                return decorated
+        return text
+
+    def refresh(self, store, limit=100000):
+        """
+        Add posts from the state store's logs that are not indexed yet
+
+        Returns:
+            int: Posts added
+        """
+        added = self.add_many(logged_posts(store, limit))
+        if added:
+            logger.info(f"Hashtag index: {added} new posts, {self.docs} posts, {len(self.tags)} hashtags")
+        return added
+
+    def to_dict(self):
+        return {"docs": self.docs, "tags": self.tags, "keywords": self.keywords, "seen": sorted(self.seen)}
+
+    @classmethod
+    def load(cls, store, key=INDEX_KEY):
+        return cls(store.load_json(key))
+
+    def save(self, store, key=INDEX_KEY):
+        store.save_json(key, self.to_dict())
+
+    @classmethod
+    def load_or_build(cls, store, key=INDEX_KEY):
+        """Saved index brought up to date with the logs, saved again only if something was added"""
+        index = cls.load(store, key)
+        if index.refresh(store):
+            index.save(store, key)
+        return index
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    from bot.state_store import get_state_backend
+
+    parser = argparse.ArgumentParser(description="Build the hashtag index or try it on a text")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="Index new posts from the logs")
+    suggest = sub.add_parser("suggest", help="Recommend hashtags for a text")
+    suggest.add_argument("text")
+    suggest.add_argument("-n", type=int, default=3)
+    args = parser.parse_args()
+
+    state = get_state_backend()
+    try:
+        index = HashtagIndex.load_or_build(state)
+        if args.command == "build":
+            print(f"✅ Hashtag index: {index.docs} posts, {len(index.keywords)} keywords, {len(index.tags)} hashtags")
+        else:
+            print(json.dumps(index.recommend(args.text, args.n)))
+    finally:
+        state.close()
@@ -0,0 +1,211 @@
+"""
+Hashtag Monitoring Module
+Polls recent search for the configured hashtags using batched OR-queries
+and incremental since_id cursors. A walk cut short by max_pages is resumed
+from its next_token on the next pass, and the cursors only move once it
+has reached the end
+"""
+
+import re
+import json
+import logging
+from collections import deque
+from pathlib import Path
+
+from .rate_limits import SEARCH_RECENT
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+# Recent search rejects queries longer than 512 characters
+MAX_QUERY_LENGTH = 512
+QUERY_SUFFIX = " -is:retweet"
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+
+
+def normalize_hashtag(tag):
+    """Return a hashtag in canonical '#lowercase' form"""
+    return "#" + tag.lstrip("#").lower()
+
+
+def build_queries(hashtags, max_length=MAX_QUERY_LENGTH):
+    """
+    Pack hashtags into as few OR-queries as the query length limit allows
+
+    Returns:
+        list: (query, [hashtags]) tuples
+    """
+    batches = []
+    current = []
+    for tag in hashtags:
+        candidate = current + [tag]
+        query = "(" + " OR ".join(candidate) + ")" + QUERY_SUFFIX
+        if current and len(query) > max_length:
+            batches.append(current)
+            current = [tag]
+        else:
+            current = candidate
+    if current:
+        batches.append(current)
+    return [("(" + " OR ".join(batch) + ")" + QUERY_SUFFIX, batch) for batch in batches]
+
+
+class HashtagMonitor:
+    def __init__(self, client, hashtags, state_file="hashtag_monitor_state.json",
+                 buffer_size=1000, max_results=100, max_pages=10, rate_limits=None):
+        """
+        Initialize hashtag monitor
+
+        Args:
+            client: tweepy.Client (or any object with search_recent_tweets)
+            hashtags (list): Hashtags to monitor, e.g. ['#AI', '#Python']
+            state_file (str): JSON file holding the per-hashtag since_id cursors and unfinished walks
+            buffer_size (int): Capacity of the in-memory match ring buffer
+            max_results (int): Page size for recent search (10-100)
+            max_pages (int): Upper bound on pages fetched per query per poll; the rest follow next poll
+            rate_limits (RateLimitManager): Stops a pass early once recent search is spent
+        """
+        self.client = client
+        self.hashtags = list(dict.fromkeys(normalize_hashtag(t) for t in hashtags))
+        self.state_file = Path(state_file)
+        self.max_results = max_results
+        self.max_pages = max_pages
+        self.matches = deque(maxlen=buffer_size)
+        # Bounded dedupe window; since_id already prevents repeats across polls
+        self._seen_order = deque(maxlen=buffer_size * 4)
+        self._seen = set()
+        self.queries = build_queries(self.hashtags)
+        # Query -> {'next_token', 'newest_id'} of a walk that hit max_pages
+        self.resume = {}
+        self.cursors = self._load_cursors()
+        self.api_calls = 0
+        self.rate_limits = rate_limits
+        logger.info(f"Hashtag monitor initialized: {len(self.hashtags)} hashtags in {len(self.queries)} queries")
+
+    def _load_cursors(self):
+        """Load persisted since_id cursors and unfinished walks, ignoring a missing or corrupted file"""
+        if not self.state_file.exists():
+            return {}
+        try:
+            with self.state_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            queries = {query for query, _ in self.queries}
+            self.resume = {query: walk for query, walk in data.get("resume", {}).items() if query in queries}
+            cursors = data.get("cursors", {})
+            return {tag: str(since_id) for tag, since_id in cursors.items() if tag in self.hashtags}
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Could not load hashtag cursors: {e}")
+            return {}
+
+    def _save_cursors(self):
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            json.dump({"updated": clock.utcnow().isoformat(), "cursors": self.cursors, "resume": self.resume}, f,
+                      indent=2)
+        tmp_file.replace(self.state_file)
+
+    def _batch_since_id(self, batch):
+        """
+        Lowest cursor in the batch, or None if any hashtag has never been polled.
+        Tweets at or below a hashtag's own cursor are filtered out afterwards.
+        """
+        cursors = [self.cursors.get(tag) for tag in batch]
+        if not all(cursors):
+            return None
+        return min(cursors, key=int)
+
+    def _remember(self, tweet_id):
+        if tweet_id in self._seen:
+            return False
+        if len(self._seen_order) == self._seen_order.maxlen:
+            self._seen.discard(self._seen_order[0])
+        self._seen_order.append(tweet_id)
+        self._seen.add(tweet_id)
+        return True
+
+    def _search(self, query, since_id, next_token=None):
+        """Yield result pages for one query, following next_token while results remain (up to max_pages)"""
+        for _ in range(self.max_pages):
+            params = {
+                "max_results": self.max_results,
+                "tweet_fields": ["author_id", "created_at"],
+                "user_auth": True,
+            }
+            if since_id:
+                params["since_id"] = since_id
+            if next_token:
+                params["next_token"] = next_token
+            response = self.client.search_recent_tweets(query, **params)
+            self.api_calls += 1
+            yield response
+            next_token = (response.meta or {}).get("next_token")
+            if not next_token:
+                break
+
+    def poll(self):
+        """
+        Run one polling pass over all hashtag batches
+
+        Returns:
+            list: New match dicts added to the ring buffer during this pass
+        """
+        new_matches = []
+        for query, batch in self.queries:
+            if self.rate_limits and not self.rate_limits.available(SEARCH_RECENT):
+                # Cursors of the skipped batches are untouched, so the next pass picks them up
+                logger.info("Recent search rate-limited; deferring the remaining hashtag batches")
+                break
+            since_id = self._batch_since_id(batch)
+            batch_set = set(batch)
+            # A walk cut short last pass carries on from its token; its first page set newest_id
+            walk = self.resume.pop(query, None) or {}
+            newest_id = walk.get("newest_id")
+            next_token = None
+            try:
+                for response in self._search(query, since_id, walk.get("next_token")):
+                    meta = response.meta or {}
+                    next_token = meta.get("next_token")
+                    if newest_id is None and meta.get("newest_id"):
+                        newest_id = str(meta["newest_id"])
+                    for tweet in response.data or []:
+                        tweet_id = str(tweet.id)
+                        tags = {normalize_hashtag(t) for t in HASHTAG_PATTERN.findall(tweet.text)}
+                        matched = [t for t in batch if t in tags and
+                                   int(tweet_id) > int(self.cursors.get(t) or 0)]
+                        if not matched and tags & batch_set:
+                            continue
+                        if not self._remember(tweet_id):
+                            continue
+                        match = {
+                            "id": tweet_id,
+                            "text": tweet.text,
+                            "author_id": getattr(tweet, "author_id", None),
+                            "hashtags": matched or batch,
+                            "seen_at": clock.utcnow().isoformat()
+                        }
+                        self.matches.append(match)
+                        new_matches.append(match)
+            except Exception as e:
+                # Cursors are untouched, so the next pass walks the whole range again
+                logger.error(f"Hashtag search failed for {query!r}: {e}")
+                continue
+
+            if next_token:
+                # Older pages are still unfetched: keep the place, not the cursors
+                self.resume[query] = {"next_token": next_token, "newest_id": newest_id}
+                logger.info(f"Hashtag search for {query!r} hit {self.max_pages} pages; resuming next poll")
+                continue
+            if newest_id:
+                for tag in batch:
+                    if int(newest_id) > int(self.cursors.get(tag) or 0):
+                        self.cursors[tag] = newest_id
+
+        if self.cursors or self.resume:
+            self._save_cursors()
+        logger.info(f"Hashtag poll found {len(new_matches)} new tweets ({self.api_calls} API calls total)")
+        return new_matches
+
+    def recent_matches(self, limit=None):
+        """Return buffered matches, newest last"""
+        matches = list(self.matches)
+        return matches[-limit:] if limit else matches
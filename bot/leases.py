@@ -0,0 +1,401 @@
+"""
+Lease Queue
+Queue items claimed under time-limited leases in a shared SQLite database,
+so several posting runners (an hourly cron run overlapping a manual one,
+or N parallel workers) can drain one queue without the lost-update race of
+each loading and rewriting the scheduled_tweets document. A claim marks
+the item with an owner, an expiry and a fencing token inside one
+BEGIN IMMEDIATE transaction; the holder heartbeats while it posts and
+completes or releases the item with the same token, so a runner whose
+lease expired and was taken over cannot overwrite the new holder's state.
+Items are claimed in PostQueue order (bot/post_queue.py) and only while
+the class has quota left, counting in-flight leases as used so parallel
+workers cannot overshoot the daily limit.
+
+Content is still added to the scheduled_tweets document (the generator,
+post_tweet.py, bot.post_queue add); sync() mirrors it into the queue
+before every posting run, and bot/scheduled_poster.py posts only what it
+has claimed here.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+from bot.outbox import content_hash
+from bot.post_queue import AGING_SECONDS, SCHEDULE_KEY, QuotaBook, aged_key, priority_of
+from bot.slots import SlotPlanner
+from utils import clock
+from utils.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+# Queued, then gone from the document: replaced by the next day's generation or blocked
+DROPPED = "dropped"
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+
+
+class LeaseQueue:
+    def __init__(self, path=None, config=None, ledger=None, aging_seconds=AGING_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """
+        Initialize lease queue
+
+        Args:
+            path (str): Database file shared by the workers (LEASE_DB or .state/leases.sqlite3 if None)
+            config (dict): Bot config for the quota ('posting_limits', 'scheduling'); defaults if None
+            ledger: State backend whose quota ledger (manual posts) counts as already used; none if None
+            aging_seconds (float): Wait that lifts an item one class
+            max_attempts (int): Failed posts before an item is given up on
+        """
+        self.path = Path(path or os.getenv("LEASE_DB", ".state/leases.sqlite3"))
+        self.config = config
+        self.ledger = ledger
+        self.aging_seconds = aging_seconds
+        self.max_attempts = max_attempts
+        self.planner, _ = SlotPlanner.from_config(config)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Transactions are explicit; the heartbeat thread shares the connection under the lock
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY, tweet TEXT NOT NULL, "
+                        "priority TEXT NOT NULL, sort_key REAL NOT NULL, state TEXT NOT NULL, owner TEXT, "
+                        "lease_expires REAL, fence INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, "
+                        "day TEXT, updated REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS items_ready ON items (state, sort_key)")
+
+    @contextmanager
+    def _write(self):
+        """One transaction holding SQLite's write lock from the first read, so claims serialize"""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def _rows(self, tweets, now):
+        for tweet in tweets:
+            if tweet.get("blocked"):
+                continue
+            tweet = {**tweet, "priority": priority_of(tweet), "enqueued": tweet.get("enqueued", now)}
+            yield (content_hash(tweet["text"]), json.dumps(tweet, ensure_ascii=False), tweet["priority"],
+                   aged_key(tweet, self.aging_seconds), QUEUED, now)
+
+    def _insert(self, db, rows):
+        # A dropped item that is back (unblocked by a policy change) is queued again
+        before = db.total_changes
+        db.executemany("INSERT INTO items (key, tweet, priority, sort_key, state, updated) VALUES (?, ?, ?, ?, ?, ?) "
+                       "ON CONFLICT (key) DO UPDATE SET tweet = excluded.tweet, priority = excluded.priority, "
+                       "sort_key = excluded.sort_key, state = excluded.state, attempts = 0, "
+                       f"updated = excluded.updated WHERE items.state = '{DROPPED}'", rows)
+        return db.total_changes - before
+
+    def add(self, tweets):
+        """
+        Queue tweets; one already in the queue (same normalized text), posted or not, is skipped,
+        so re-importing the scheduled_tweets document is harmless
+
+        Args:
+            tweets (list): Tweet dicts ('text', optional 'priority', 'enqueued', 'image_suggestion');
+                ones the screening policy blocked are left out
+
+        Returns:
+            int: Items added
+        """
+        rows = list(self._rows(tweets, clock.time()))
+        with self._write() as db:
+            return self._insert(db, rows)
+
+    def sync(self, store, also=()):
+        """
+        Mirror the stored scheduled_tweets document into the queue
+
+        Its new items are queued, and queued items no longer in it are dropped. Items
+        already posted or given up on are pruned from the document, so it keeps showing
+        what is left to post.
+
+        Args:
+            store: State backend holding the document
+            also (list): Tweets to keep queued as if they were in the document (outbox retries)
+
+        Returns:
+            dict: Counts of items added, dropped and pruned from the document
+        """
+        data = store.load_json(SCHEDULE_KEY) or {}
+        tweets = data.get("tweets", [])
+        rows = list(self._rows(list(tweets) + list(also), clock.time()))
+        present = {row[0] for row in rows}
+        with self._write() as db:
+            added = self._insert(db, rows)
+            stale = [key for (key,) in db.execute("SELECT key FROM items WHERE state = ?", (QUEUED,)).fetchall()
+                     if key not in present]
+            db.executemany("UPDATE items SET state = ?, updated = ? WHERE key = ? AND state = ?",
+                           [(DROPPED, clock.time(), key, QUEUED) for key in stale])
+            finished = {key for (key,) in db.execute("SELECT key FROM items WHERE state IN (?, ?)",
+                                                     (DONE, FAILED)).fetchall()}
+        kept = [tweet for tweet in tweets if content_hash(tweet["text"]) not in finished]
+        if len(kept) < len(tweets):
+            if kept:
+                store.save_json(SCHEDULE_KEY, {**data, "tweets": kept})
+            else:
+                store.delete(SCHEDULE_KEY)
+        if added or stale:
+            logger.info(f"Synced the queue: {added} added, {len(stale)} dropped")
+        return {"added": added, "dropped": len(stale), "pruned": len(tweets) - len(kept)}
+
+    def _quota(self, now):
+        book = QuotaBook.from_config(self.ledger, self.config, now)
+        # complete() records into the ledger as well, for post_tweet.py; parallel workers can
+        # lose a ledger update, so today's completions here are the floor
+        for priority, n in self.db.execute("SELECT priority, COUNT(*) FROM items WHERE state = ? AND day = ? "
+                                           "GROUP BY priority", (DONE, book.day)).fetchall():
+            book.used[priority] = max(book.used[priority], n)
+        for priority, n in self.db.execute("SELECT priority, COUNT(*) FROM items WHERE state = ? GROUP BY priority",
+                                           (LEASED,)).fetchall():
+            book.record(priority, n)
+        return book
+
+    def claim(self, owner, count=1, lease_seconds=LEASE_SECONDS, skip=()):
+        """
+        Lease up to count items in priority order, as far as today's quota allows
+
+        Args:
+            owner (str): Worker id
+            count (int): Items wanted
+            lease_seconds (float): Time the worker has to complete or heartbeat
+            skip (iterable): Keys not to take (ones the worker already failed on this run)
+
+        Returns:
+            list: Lease dicts ('key', 'tweet', 'owner', 'fence', 'expires')
+        """
+        now = clock.time()
+        leases = []
+        skip = list(skip)
+        with self._write() as db:
+            # Leases whose holder stopped heartbeating go back in line at their old place
+            reclaimed = db.execute("UPDATE items SET state = ?, owner = NULL, lease_expires = NULL, updated = ? "
+                                   "WHERE state = ? AND lease_expires <= ?", (QUEUED, now, LEASED, now)).rowcount
+            if reclaimed:
+                logger.warning(f"Reclaimed {reclaimed} expired lease(s)")
+                inc("lease_reclaimed_total", reclaimed)
+            quota = self._quota(now)
+            while len(leases) < count:
+                allowed = sorted(quota.allowed())
+                if not allowed:
+                    break
+                row = db.execute(f"SELECT key, tweet, priority, fence FROM items WHERE state = ? AND priority IN "
+                                 f"({', '.join('?' * len(allowed))}) AND key NOT IN ({', '.join('?' * len(skip))}) "
+                                 f"ORDER BY sort_key LIMIT 1", (QUEUED, *allowed, *skip)).fetchone()
+                if not row:
+                    break
+                key, tweet, priority, fence = row
+                expires = now + lease_seconds
+                db.execute("UPDATE items SET state = ?, owner = ?, lease_expires = ?, fence = ?, "
+                           "attempts = attempts + 1, updated = ? WHERE key = ?",
+                           (LEASED, owner, expires, fence + 1, now, key))
+                quota.record(priority)
+                leases.append({"key": key, "tweet": json.loads(tweet), "owner": owner, "fence": fence + 1,
+                               "expires": expires})
+        inc("lease_claimed_total", len(leases))
+        return leases
+
+    def heartbeat(self, leases, lease_seconds=LEASE_SECONDS):
+        """
+        Extend leases the caller still holds
+
+        Returns:
+            list: The leases still held (others expired and were taken over)
+        """
+        expires = clock.time() + lease_seconds
+        held = []
+        with self._write() as db:
+            for lease in leases:
+                if db.execute("UPDATE items SET lease_expires = ? WHERE key = ? AND owner = ? AND fence = ? "
+                              "AND state = ?", (expires, lease["key"], lease["owner"], lease["fence"],
+                                                LEASED)).rowcount:
+                    lease["expires"] = expires
+                    held.append(lease)
+        return held
+
+    def complete(self, lease, record=True):
+        """
+        Mark a leased item posted and record it in the ledger's quota
+
+        Args:
+            lease (dict): Lease from claim()
+            record (bool): Count the post against today's quota (False for content an
+                earlier run already posted)
+
+        Returns:
+            bool: False if the lease was lost to another worker first
+        """
+        now = clock.time()
+        with self._write() as db:
+            done = db.execute("UPDATE items SET state = ?, owner = NULL, lease_expires = NULL, day = ?, updated = ? "
+                              "WHERE key = ? AND owner = ? AND fence = ? AND state = ?",
+                              (DONE, self.planner.today(now).isoformat() if record else None, now, lease["key"],
+                               lease["owner"], lease["fence"], LEASED)).rowcount
+        if not done:
+            logger.warning(f"Lease on {lease['key']} was lost before completing")
+            inc("lease_lost_total")
+        elif record and self.ledger is not None:
+            quota = QuotaBook.from_config(self.ledger, self.config, now)
+            quota.record(priority_of(lease["tweet"]))
+            quota.save(self.ledger)
+        return bool(done)
+
+    def release(self, lease, attempted=True):
+        """
+        Put a leased item back in line after a failed post, or give up on it after max_attempts
+
+        Args:
+            lease (dict): Lease from claim()
+            attempted (bool): False when the item was not sent at all (a deferral), so the
+                claim does not count as an attempt
+        """
+        with self._write() as db:
+            db.execute("UPDATE items SET attempts = attempts - ?, owner = NULL, lease_expires = NULL, updated = ?, "
+                       "state = CASE WHEN attempts - ? >= ? THEN ? ELSE ? END "
+                       "WHERE key = ? AND owner = ? AND fence = ? AND state = ?",
+                       (0 if attempted else 1, clock.time(), 0 if attempted else 1, self.max_attempts, FAILED, QUEUED,
+                        lease["key"], lease["owner"], lease["fence"], LEASED))
+
+    def counts(self):
+        """State -> class -> items"""
+        counts = {}
+        for state, priority, n in self.db.execute("SELECT state, priority, COUNT(*) FROM items "
+                                                  "GROUP BY state, priority").fetchall():
+            counts.setdefault(state, {})[priority] = n
+        return counts
+
+    def quota(self):
+        with self.lock:
+            return self._quota(clock.time()).report()
+
+    def close(self):
+        self.db.close()
+
+
+class Heartbeat:
+    def __init__(self, queue, leases, lease_seconds=LEASE_SECONDS):
+        """
+        Initialize a background thread renewing leases every third of lease_seconds while in a with-block
+
+        Args:
+            queue (LeaseQueue): Queue the leases came from
+            leases (list): Leases to keep alive
+            lease_seconds (float): Lease length each renewal grants
+        """
+        self.queue = queue
+        self.leases = leases
+        self.lease_seconds = lease_seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.lease_seconds / 3):
+            try:
+                self.leases = self.queue.heartbeat(self.leases, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"Lease heartbeat failed: {e}")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def drain(queue, owner, post, limit=None, lease_seconds=LEASE_SECONDS):
+    """
+    Claim and post items one at a time until the queue or the quota runs out
+
+    Args:
+        queue (LeaseQueue): Shared queue
+        owner (str): Worker id
+        post (callable): post(tweet) -> True once the tweet is up
+        limit (int): Stop after this many posts; no limit if None
+        lease_seconds (float): Lease length, renewed while post() runs
+
+    Returns:
+        dict: Posted keys, failures and leases lost to other workers
+    """
+    result = {"posted": [], "failed": 0, "lost": 0}
+    while limit is None or len(result["posted"]) < limit:
+        leases = queue.claim(owner, 1, lease_seconds)
+        if not leases:
+            break
+        lease = leases[0]
+        with Heartbeat(queue, leases, lease_seconds):
+            try:
+                ok = post(lease["tweet"])
+            except Exception as e:
+                logger.error(f"Posting {lease['key']} failed: {e}")
+                ok = False
+        if not ok:
+            result["failed"] += 1
+            queue.release(lease)
+        elif queue.complete(lease):
+            result["posted"].append(lease["key"])
+        else:
+            result["lost"] += 1
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    from bot.state_store import get_state_backend
+
+    parser = argparse.ArgumentParser(description="Shared lease queue for parallel posting workers")
+    parser.add_argument("--db", help="Queue database (default LEASE_DB or .state/leases.sqlite3)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("import", help="Sync the queue with the stored scheduled_tweets document")
+    sub.add_parser("show", help="Items per state and class and today's quota")
+    work = sub.add_parser("work", help="Claim and post items, as post_scheduled_tweet.py does")
+    work.add_argument("--count", type=int, default=8, help="Stop after this many posts")
+    args = parser.parse_args()
+
+    if args.db:
+        os.environ["LEASE_DB"] = args.db
+    state = get_state_backend()
+    if args.command == "work":
+        # The scheduled poster, with its outbox, quota ledger, rate limits and thread handling
+        from bot.scheduled_poster import ScheduledPoster
+
+        try:
+            poster = ScheduledPoster.from_env(state, ".state/rate_limits.json")
+        except ValueError as e:
+            print(f"❌ {e}")
+            state.close()
+            sys.exit(1)
+        try:
+            poster.post_tweets(args.count)
+        finally:
+            poster.rate_limits.save()
+
+    queue = LeaseQueue(ledger=state)
+    try:
+        if args.command == "import":
+            print(f"✅ {json.dumps(queue.sync(state))}")
+        print(json.dumps({"items": queue.counts(), "quota": queue.quota()}, indent=2))
+    finally:
+        queue.close()
+        state.close()
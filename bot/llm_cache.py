@@ -0,0 +1,210 @@
+"""
+LLM Response Cache
+Disk-backed (SQLite) cache of LLM responses keyed by provider, model,
+normalized prompt, temperature and seed, with TTL and size-based eviction.
+
+Modes (LLM_CACHE_MODE):
+    off        never read or write the cache
+    exact      reuse the newest fresh response for the same key
+    variation  reuse cached responses that have not been posted yet, so
+               re-runs and retries only pay for a new call once those run out
+
+A batch response holding several posts is retired once every one of them
+has been posted; until then callers skip the posted ones (is_posted()).
+"""
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+
+from utils.metrics import inc
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = ".cache/llm_cache.sqlite3"
+MODES = ("off", "exact", "variation")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so formatting-only differences share a cache entry"""
+    return WHITESPACE.sub(" ", prompt).strip()
+
+
+def cache_key(provider, model, prompt, temperature=None, seed=None, variant=None):
+    parts = [provider, model or "", normalize_prompt(prompt), repr(temperature), repr(seed)]
+    # Keys made before variant existed stay valid for requests without one
+    if variant is not None:
+        parts.append(str(variant))
+    raw = "\x1f".join(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def text_hash(text):
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=DEFAULT_CACHE_FILE, mode="variation", ttl_seconds=7 * 24 * 3600,
+                 max_bytes=50 * 1024 * 1024, max_serves=3):
+        """
+        Initialize LLM cache
+
+        Args:
+            path (str): SQLite database file
+            mode (str): 'exact' or 'variation' (see module docstring)
+            ttl_seconds (int): Entries older than this are ignored and purged
+            max_bytes (int): Total response size kept before least recently used entries are evicted
+            max_serves (int): In variation mode, a candidate served this often without being posted is retired
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_serves = max_serves
+        # Never hand the same candidate to two batches of one run
+        self._served = set()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                serves INTEGER NOT NULL DEFAULT 0,
+                posted INTEGER NOT NULL DEFAULT 0,
+                parts INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(responses)")}
+        if "parts" not in columns:
+            self.db.execute("ALTER TABLE responses ADD COLUMN parts INTEGER NOT NULL DEFAULT 1")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_key ON responses (key, posted, created)")
+        # Posts published out of each response; a response is retired once all its parts are here
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS posted_texts (
+                entry_id INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (entry_id, hash)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS posted_texts_hash ON posted_texts (hash)")
+        self.db.commit()
+        self.purge_expired()
+
+    @classmethod
+    def from_env(cls):
+        """Cache configured by LLM_CACHE_MODE / LLM_CACHE_FILE, or None when off"""
+        mode = os.getenv("LLM_CACHE_MODE", "variation").lower()
+        if mode == "off":
+            return None
+        return cls(os.getenv("LLM_CACHE_FILE", DEFAULT_CACHE_FILE), mode=mode)
+
+    def get(self, provider, model, prompt, temperature=None, seed=None, variant=None):
+        """
+        Cached response for the request, or None
+
+        In exact mode this is the newest fresh response; in variation mode
+        it is the least recently served response not yet fully posted.
+        variant is any other request input that changes the response.
+        """
+        key = cache_key(provider, model, prompt, temperature, seed, variant)
+        cutoff = clock.time() - self.ttl_seconds
+        if self.mode == "exact":
+            rows = self.db.execute(
+                "SELECT id, response FROM responses WHERE key = ? AND created >= ? "
+                "ORDER BY created DESC LIMIT 1", (key, cutoff)).fetchall()
+        else:
+            rows = self.db.execute(
+                "SELECT id, response FROM responses WHERE key = ? AND created >= ? AND posted = 0 "
+                "AND serves < ? ORDER BY last_used ASC", (key, cutoff, self.max_serves)).fetchall()
+            rows = [row for row in rows if row[0] not in self._served]
+        if not rows:
+            inc("llm_cache_misses_total", provider=provider)
+            return None
+        entry_id, response = rows[0]
+        self._served.add(entry_id)
+        self.db.execute("UPDATE responses SET last_used = ?, serves = serves + 1 WHERE id = ?",
+                        (clock.time(), entry_id))
+        self.db.commit()
+        inc("llm_cache_hits_total", provider=provider)
+        logger.info(f"LLM cache hit for {provider}/{model}")
+        return response
+
+    def put(self, provider, model, prompt, response, temperature=None, seed=None, variant=None, parts=1):
+        """Store a fresh response holding parts posts; it counts as served by this run"""
+        key = cache_key(provider, model, prompt, temperature, seed, variant)
+        now = clock.time()
+        cursor = self.db.execute(
+            "INSERT INTO responses (key, provider, model, response, size, created, last_used, serves, parts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)",
+            (key, provider, model, response, len(response.encode("utf-8")), now, now, max(1, parts)))
+        self._served.add(cursor.lastrowid)
+        self.db.commit()
+        self.evict()
+
+    def mark_posted(self, text):
+        """
+        Record text as posted from every cached response containing it; a response is retired
+        from variation mode once all its parts have been posted
+
+        Returns:
+            int: Responses retired by this call
+        """
+        text = text.strip()
+        # JSON-mode responses hold the post with escaped newlines/quotes
+        variants = sorted({text, json.dumps(text)[1:-1], json.dumps(text, ensure_ascii=False)[1:-1]})
+        match = " OR ".join(["instr(response, ?) > 0"] * len(variants))
+        ids = [row[0] for row in self.db.execute(
+            f"SELECT id FROM responses WHERE posted = 0 AND ({match})", variants)]
+        digest = text_hash(text)
+        self.db.executemany("INSERT OR IGNORE INTO posted_texts (entry_id, hash) VALUES (?, ?)",
+                            [(entry_id, digest) for entry_id in ids])
+        retired = 0
+        for entry_id in ids:
+            retired += self.db.execute(
+                "UPDATE responses SET posted = 1 WHERE id = ? AND "
+                "parts <= (SELECT COUNT(*) FROM posted_texts WHERE entry_id = ?)", (entry_id, entry_id)).rowcount
+        self.db.commit()
+        return retired
+
+    def is_posted(self, text):
+        """Whether text was posted out of a cached response; callers reusing a batch response skip it"""
+        return self.db.execute("SELECT 1 FROM posted_texts WHERE hash = ? LIMIT 1",
+                               (text_hash(text),)).fetchone() is not None
+
+    def purge_expired(self):
+        self.db.execute("DELETE FROM responses WHERE created < ?", (clock.time() - self.ttl_seconds,))
+        self._drop_orphans()
+        self.db.commit()
+
+    def _drop_orphans(self):
+        self.db.execute("DELETE FROM posted_texts WHERE entry_id NOT IN (SELECT id FROM responses)")
+
+    def evict(self):
+        """Drop least recently used responses until the total size fits max_bytes"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for entry_id, size in self.db.execute("SELECT id, size FROM responses ORDER BY last_used ASC").fetchall():
+            self.db.execute("DELETE FROM responses WHERE id = ?", (entry_id,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._drop_orphans()
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,202 @@
+"""
+Outbox
+Durable per-tweet delivery state (queued -> in_flight -> posted) keyed by a
+content hash and committed to a bot.state_store backend on every
+transition. After a crash or an ambiguous failure (timeout, 5xx) the
+in-flight items are reconciled against the account's timeline since the
+oldest of them (100 tweets a request, paged only as far as needed), so a
+tweet that did go out is never posted twice.
+"""
+
+import re
+import html
+import time
+import hashlib
+import logging
+
+import requests
+import tweepy
+
+from utils.metrics import inc
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+QUEUED, IN_FLIGHT, POSTED = "queued", "in_flight", "posted"
+URL_PATTERN = re.compile(r"https?://\S+")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Text as X echoes it back: entities unescaped, URLs (rewritten to t.co) dropped, whitespace collapsed"""
+    return WHITESPACE.sub(" ", URL_PATTERN.sub("", html.unescape(text))).strip()
+
+
+def content_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def is_ambiguous(error):
+    """True when the request may have reached X even though it raised (timeouts, dropped connections, 5xx)"""
+    return isinstance(error, (requests.Timeout, requests.ConnectionError, tweepy.TwitterServerError))
+
+
+def is_duplicate(error):
+    """X rejects an exact repeat of a recent tweet with 403 'duplicate content'"""
+    return isinstance(error, tweepy.Forbidden) and "duplicate" in str(error).lower()
+
+
+class Outbox:
+    def __init__(self, store, key="outbox", retention_days=7, queued_retention_days=3):
+        """
+        Initialize outbox
+
+        Args:
+            store: bot.state_store backend the outbox is committed to
+            key (str): State key holding the outbox
+            retention_days (int): How long posted hashes are kept for dedupe
+            queued_retention_days (int): How long an item released back to the queue is kept
+                without another attempt before it is dropped as stale
+        """
+        self.store = store
+        self.key = key
+        self.retention_days = retention_days
+        self.queued_retention_days = queued_retention_days
+        state = store.load_json(key, {})
+        self.user_id = state.get("user_id")
+        self.items = state.get("items", {})
+        self._prune()
+
+    def _prune(self):
+        now = clock.time()
+        cutoffs = {POSTED: now - self.retention_days * 86400, QUEUED: now - self.queued_retention_days * 86400}
+        expired = [key for key, item in self.items.items()
+                   if item["state"] in cutoffs and item["updated"] < cutoffs[item["state"]]]
+        for key in expired:
+            if self.items[key]["state"] == QUEUED:
+                inc("outbox_expired_total")
+                logger.warning(f"Dropping stale queued outbox item {key}: {self.items[key].get('error')}")
+            del self.items[key]
+
+    def _commit(self):
+        self.store.save_json(self.key, {"user_id": self.user_id, "items": self.items})
+
+    def _set(self, key, **fields):
+        self.items[key].update(fields, updated=clock.time())
+        self._commit()
+
+    def state(self, text):
+        item = self.items.get(content_hash(text))
+        return item["state"] if item else None
+
+    def queued(self):
+        """
+        Tweets released back to the queue by earlier runs, oldest first, as queue items: only the
+        content fields a publisher needs, never the delivery state, error or tweet IDs
+        """
+        pending = sorted((item for item in self.items.values() if item["state"] == QUEUED),
+                         key=lambda item: item["created"])
+        # First queued at created, so a retry keeps its place in line
+        return [{"text": item["text"], "image_suggestion": item.get("image_suggestion"),
+                 "priority": item.get("priority"), "enqueued": item["created"]} for item in pending]
+
+    def in_flight(self):
+        return {key: item for key, item in self.items.items() if item["state"] == IN_FLIGHT}
+
+    def begin(self, tweet):
+        """
+        Mark a tweet in flight before it is sent
+
+        Returns:
+            str: Content hash, or None if this content was already posted
+        """
+        key = content_hash(tweet["text"])
+        item = self.items.get(key)
+        if item and item["state"] == POSTED:
+            inc("outbox_duplicates_skipped_total")
+            return None
+        now = clock.time()
+        self.items[key] = {
+            "state": IN_FLIGHT,
+            "text": tweet["text"],
+            "image_suggestion": tweet.get("image_suggestion"),
+            "priority": tweet.get("priority"),
+            "expect": content_hash(tweet["text"]),
+            "tweet_ids": item["tweet_ids"] if item else [],
+            "attempts": (item["attempts"] if item else 0) + 1,
+            "created": item["created"] if item else now,
+            "updated": now,
+        }
+        self._commit()
+        return key
+
+    def expect(self, key, text):
+        """Record the exact text about to be sent (a thread part), so reconcile can look for it"""
+        self._set(key, expect=content_hash(text))
+
+    def mark_posted(self, key, tweet_ids=None):
+        if tweet_ids is not None:
+            self.items[key]["tweet_ids"] = [str(i) for i in tweet_ids]
+        self._set(key, state=POSTED)
+        inc("outbox_posted_total")
+
+    def release(self, key, error=None):
+        """Return an item to the queue after a failure that certainly did not post it"""
+        self._set(key, state=QUEUED, error=str(error) if error else None)
+
+    def reconcile(self, client, on_thread_part=None, lookback_seconds=600):
+        """
+        Settle every in-flight item against the timeline since the oldest of them
+
+        A single tweet found on the timeline is marked posted. For a thread
+        whose in-flight part is found, on_thread_part(text, tweet_id) lets the
+        caller record the part before the thread is queued to resume. Items
+        not found are queued again.
+
+        Args:
+            client: tweepy.Client with user auth
+            on_thread_part: Callable(thread text, part tweet ID), optional
+            lookback_seconds (float): Slack before the oldest in-flight item
+
+        Returns:
+            dict: Counts of found and requeued items
+        """
+        pending = self.in_flight()
+        if not pending:
+            return {"found": 0, "requeued": 0}
+        if not self.user_id:
+            self.user_id = str(client.get_me().data.id)
+        since = min(item["updated"] for item in pending.values()) - lookback_seconds
+        params = {"max_results": 100, "tweet_fields": ["created_at"], "user_auth": True,
+                  "start_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(since))}
+        # Newest first, back to the oldest in-flight item; stop early once every item is accounted for
+        timeline = {}
+        expected = {item["expect"] for item in pending.values()}
+        while True:
+            response = client.get_users_tweets(self.user_id, **params)
+            inc("outbox_reconcile_requests_total")
+            for tweet in response.data or []:
+                timeline.setdefault(content_hash(tweet.text), str(tweet.id))
+            next_token = (response.meta or {}).get("next_token")
+            if not next_token or expected <= timeline.keys():
+                break
+            params["pagination_token"] = next_token
+
+        found = 0
+        for key, item in pending.items():
+            tweet_id = timeline.get(item["expect"])
+            if tweet_id is None:
+                self.items[key].update(state=QUEUED, updated=clock.time())
+                continue
+            found += 1
+            if item["expect"] == key:
+                self.items[key].update(state=POSTED, tweet_ids=item["tweet_ids"] or [tweet_id], updated=clock.time())
+                inc("outbox_posted_total")
+            else:
+                if on_thread_part:
+                    on_thread_part(item["text"], tweet_id)
+                self.items[key].update(state=QUEUED, updated=clock.time())
+        self._commit()
+        inc("outbox_reconciled_total", found)
+        logger.info(f"Reconciled {len(pending)} in-flight tweets: {found} found on the timeline")
+        return {"found": found, "requeued": len(pending) - found}
@@ -0,0 +1,209 @@
+"""
+Generation Output Format
+One place that decides how generated posts are requested from an LLM and
+parsed back: structured JSON where the provider supports it, otherwise
+labelled text ("Post 1:", "**Tweet 2:**", ...) or a single raw tweet, all
+read by one compiled tolerant parser.
+"""
+
+import re
+import json
+import logging
+
+from utils.metrics import timed, inc
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("json", "text", "raw")
+
+# Providers/models with a native JSON output mode
+JSON_CAPABLE = {
+    "gemini": None,  # every model: generation_config response_mime_type
+    "openai": ("gpt-3.5-turbo", "gpt-4-turbo", "gpt-4o"),  # response_format json_object
+}
+
+# Shape of a JSON response; validate_posts() checks it in one pass
+POST_SCHEMA = {
+    "type": "object",
+    "required": ["posts"],
+    "properties": {
+        "posts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["text"],
+                "properties": {
+                    "text": {"type": "string"},
+                    "image_suggestion": {"type": ["string", "null"]},
+                },
+            },
+        }
+    },
+}
+
+# "Post 3:", "Tweet #3 -", "**Post 3:**", "## Tweet 3)", "Tweet:" at the start of a line
+HEADER_PATTERN = re.compile(
+    r"^[ \t]*(?:[*_#>]+[ \t]*)?(?:post|tweet)"
+    r"(?:[ \t]*#?\d+[ \t]*[*_]*[ \t]*[:.)\-–]|[ \t]*[*_]*[ \t]*:)"
+    r"[ \t]*[*_]*[ \t]*",
+    re.IGNORECASE | re.MULTILINE)
+FENCE_PATTERN = re.compile(r"^[ \t]*(?:-{3,}|```[a-z]*)[ \t]*$", re.IGNORECASE | re.MULTILINE)
+HASHTAG_LINE = re.compile(r"^(?:#\w+[ \t]*)+$")
+
+
+def select_format(provider, model=None, requested="auto"):
+    """
+    Output format for a provider
+
+    Args:
+        provider (str): 'gemini', 'openai', ...
+        model (str): Model name, for providers where only some models have a JSON mode
+        requested (str): 'auto', or a format from FORMATS to force
+
+    Returns:
+        str: 'json' or 'text' for auto; the requested format otherwise
+    """
+    if requested != "auto":
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown output format: {requested}")
+        return requested
+    if provider not in JSON_CAPABLE:
+        return "text"
+    models = JSON_CAPABLE[provider]
+    if models is None or (model and model.startswith(models)):
+        return "json"
+    return "text"
+
+
+def format_instructions(fmt, count=5, label="Post"):
+    """Prompt suffix asking for count posts in fmt"""
+    if fmt == "json":
+        return (
+            f"\nRespond with JSON only, no prose or code fences, exactly {count} posts in this shape:\n"
+            '{"posts": [{"text": "<post>", "image_suggestion": "<short image idea, or null>"}]}\n'
+        )
+    if fmt == "raw":
+        return ""
+    example = "\n\n".join(f"{label} {i}:\n[Your engaging tech post here]" for i in range(1, min(count, 3) + 1))
+    return f"\nFormat your output exactly like this, numbering posts sequentially:\n---\n{example}\n---\n"
+
+
+def generation_config(fmt):
+    """Gemini generation_config for fmt, or None when plain text is wanted"""
+    return {"response_mime_type": "application/json"} if fmt == "json" else None
+
+
+def _clean(text):
+    if "---" in text or "```" in text:
+        text = FENCE_PATTERN.sub("", text)
+    return text.strip()
+
+
+def validate_posts(data):
+    """
+    Check decoded JSON against POST_SCHEMA in one pass
+
+    A bare list of posts, a {"tweets": [...]} wrapper and plain strings
+    instead of post objects are accepted too.
+
+    Returns:
+        tuple: (posts as {'text', 'image_suggestion'} dicts, list of error strings)
+    """
+    if isinstance(data, dict):
+        data = data.get("posts", data.get("tweets"))
+    if not isinstance(data, list):
+        return [], ["expected a 'posts' array"]
+    posts, errors = [], []
+    for i, item in enumerate(data):
+        if isinstance(item, str):
+            item = {"text": item}
+        if not isinstance(item, dict):
+            errors.append(f"posts[{i}]: expected an object")
+            continue
+        text = item.get("text")
+        if not isinstance(text, str) or not text.strip():
+            errors.append(f"posts[{i}].text: expected a non-empty string")
+            continue
+        image = item.get("image_suggestion")
+        if image is not None and not isinstance(image, str):
+            errors.append(f"posts[{i}].image_suggestion: expected a string or null")
+            image = None
+        posts.append({"text": text.strip(), "image_suggestion": image or None})
+    return posts, errors
+
+
+def parse_json(text):
+    """Posts from a JSON response, tolerating code fences and surrounding prose; [] if undecodable"""
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return []
+    end = max(text.rfind("}"), text.rfind("]"))
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+    posts, errors = validate_posts(data)
+    if errors:
+        inc("output_schema_errors_total", len(errors))
+        logger.warning(f"Dropped {len(errors)} invalid posts: {'; '.join(errors[:3])}")
+    return posts
+
+
+def parse_labeled(text):
+    """Posts between 'Post N:' / 'Tweet N:' headers; text on the header line belongs to the post"""
+    headers = list(HEADER_PATTERN.finditer(text))
+    posts = []
+    for header, following in zip(headers, headers[1:] + [None]):
+        body = _clean(text[header.end():following.start() if following else len(text)])
+        if body:
+            posts.append(body)
+    return posts
+
+
+def normalize_hashtag_gap(text, gap_lines=2):
+    """Put trailing hashtag lines on one line, gap_lines blank lines below the content"""
+    lines = text.rstrip().split("\n")
+    split = len(lines)
+    while split > 0 and (HASHTAG_LINE.match(lines[split - 1].strip()) or not lines[split - 1].strip()):
+        split -= 1
+    content = "\n".join(lines[:split]).rstrip()
+    tags = " ".join(line.strip() for line in lines[split:] if line.strip())
+    if not content or not tags:
+        return text.strip()
+    return content + "\n" * (gap_lines + 1) + tags
+
+
+@timed("output_parse_seconds")
+def parse_posts(text, fmt="text"):
+    """
+    Parse an LLM response into posts
+
+    Every format falls through to the next more tolerant one, so a model
+    that ignores JSON mode still yields its labelled posts and a raw reply
+    with no labels is one post.
+
+    Args:
+        text (str): Raw LLM response
+        fmt (str): Format that was requested
+
+    Returns:
+        list: {'text', 'image_suggestion'} dicts, possibly empty
+    """
+    if fmt == "json":
+        posts = parse_json(text)
+        if posts:
+            inc("parsed_posts_total", len(posts), format="json")
+            return posts
+    bodies = parse_labeled(text)
+    if fmt == "raw":
+        bodies = [normalize_hashtag_gap(body) for body in bodies]
+    posts = [{"text": body, "image_suggestion": None} for body in bodies]
+    if posts:
+        inc("parsed_posts_total", len(posts), format="text")
+        return posts
+    if fmt == "raw":
+        body = _clean(text).strip("\"'“”").strip()
+        if body:
+            inc("parsed_posts_total", format="raw")
+            return [{"text": normalize_hashtag_gap(body), "image_suggestion": None}]
+    return []
@@ -0,0 +1,213 @@
+"""
+Post Queue
+Priority classes for queued content (manual > campaign > scheduled >
+fallback) with aging, and a daily quota ledger that reserves part of the
+daily limit per class. Each class is a binary heap keyed by enqueue time
+plus a per-class offset, so an item waiting aging_seconds longer than a
+newer item one class above overtakes it, nothing starves, and push/pop are
+O(log n) without ever re-keying the heap.
+"""
+
+import heapq
+import logging
+import itertools
+from datetime import datetime
+
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CLASSES = ("manual", "campaign", "scheduled", "fallback")
+DEFAULT_CLASS = "scheduled"
+# An item overtakes newer items one class above after waiting this long
+AGING_SECONDS = 6 * 3600
+SCHEDULE_KEY = "scheduled_tweets"
+QUOTA_KEY = "post_quota"
+
+
+def priority_of(tweet):
+    priority = tweet.get("priority") or DEFAULT_CLASS
+    return priority if priority in PRIORITY_CLASSES else DEFAULT_CLASS
+
+
+def aged_key(tweet, aging_seconds=AGING_SECONDS):
+    """Dequeue order of a tweet with 'priority' and 'enqueued' set: lowest first"""
+    return tweet["enqueued"] + PRIORITY_CLASSES.index(tweet["priority"]) * aging_seconds
+
+
+class PostQueue:
+    def __init__(self, tweets=(), aging_seconds=AGING_SECONDS):
+        """
+        Initialize post queue
+
+        Args:
+            tweets (list): Tweet dicts ('text', 'image_suggestion', optional 'priority' and
+                'enqueued' epoch seconds; items without one are stamped now); 'blocked' ones are held
+            aging_seconds (float): Wait that lifts an item one class
+        """
+        self.aging_seconds = aging_seconds
+        self._seq = itertools.count()
+        self.heaps = {priority: [] for priority in PRIORITY_CLASSES}
+        # Tweets the screening policy blocked (bot/screening.py) stay stored but are never popped
+        self.held = []
+        now = clock.time()
+        for tweet in tweets:
+            tweet = {**tweet, "priority": priority_of(tweet), "enqueued": tweet.get("enqueued", now)}
+            if tweet.get("blocked"):
+                self.held.append(tweet)
+                continue
+            self.heaps[tweet["priority"]].append(self._entry(tweet))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def _entry(self, tweet):
+        return (aged_key(tweet, self.aging_seconds), next(self._seq), tweet)
+
+    def push(self, tweet, priority=None):
+        """
+        Add a tweet; one put back after pop() keeps its enqueue time and so its place
+
+        Args:
+            tweet (dict): Tweet dict
+            priority (str): One of PRIORITY_CLASSES; the tweet's own 'priority' (or scheduled) if None
+
+        Returns:
+            dict: The queued tweet, with 'priority' and 'enqueued' set
+        """
+        tweet = {**tweet, "priority": priority or priority_of(tweet), "enqueued": tweet.get("enqueued", clock.time())}
+        if tweet["priority"] not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {tweet['priority']}")
+        heapq.heappush(self.heaps[tweet["priority"]], self._entry(tweet))
+        return tweet
+
+    def _best(self, allowed=None):
+        heads = [heap[0] + (priority,) for priority, heap in self.heaps.items()
+                 if heap and (allowed is None or priority in allowed)]
+        return min(heads)[-1] if heads else None
+
+    def peek(self, allowed=None):
+        priority = self._best(allowed)
+        return self.heaps[priority][0][2] if priority else None
+
+    def pop(self, allowed=None):
+        """
+        Remove the tweet with the lowest aged key
+
+        Args:
+            allowed (iterable): Classes that may be taken (those with quota left); all if None
+
+        Returns:
+            dict: The tweet, or None if no allowed class has one
+        """
+        priority = self._best(allowed)
+        return heapq.heappop(self.heaps[priority])[2] if priority else None
+
+    def __len__(self):
+        return sum(len(heap) for heap in self.heaps.values())
+
+    def counts(self):
+        return {priority: len(heap) for priority, heap in self.heaps.items()}
+
+    def tweets(self):
+        """Every queued tweet in dequeue order (without quota limits), then the held ones, for saving"""
+        return [entry[2] for entry in sorted(itertools.chain(*self.heaps.values()))] + self.held
+
+
+class QuotaBook:
+    def __init__(self, day, daily_limit, reservations=None, used=None, released=False):
+        """
+        Initialize a day's quota ledger
+
+        A class may post while the daily limit minus what other classes still
+        hold in reserve has room; its own reservation is always usable. Once
+        released, unused reservations are open to every class, so slots held
+        for manual posts that never came are not lost for the day.
+
+        Args:
+            day (str): Local date the ledger is for
+            daily_limit (int): Posts per day across all classes
+            reservations (dict): Class -> slots held back for it each day
+            used (dict): Class -> posts already made today
+            released (bool): Reservations no longer hold slots back
+        """
+        self.day = day
+        self.daily_limit = daily_limit
+        self.released = released
+        self.reservations = {priority: int(n) for priority, n in (reservations or {}).items()
+                             if priority in PRIORITY_CLASSES}
+        self.used = dict.fromkeys(PRIORITY_CLASSES, 0)
+        self.used.update({priority: n for priority, n in (used or {}).items() if priority in PRIORITY_CLASSES})
+
+    @classmethod
+    def from_config(cls, store, config=None, now=None):
+        """
+        Today's ledger (in the scheduling timezone) with limits from the 'posting_limits' config
+        section and posts already recorded in store (none if store is None)
+        """
+        from config.settings import get_bot_config
+        from bot.slots import SlotPlanner, parse_clock
+
+        defaults = get_bot_config()
+        limits = (config or defaults).get("posting_limits", defaults["posting_limits"])
+        planner, daily_limit = SlotPlanner.from_config(config)
+        now = now if now is not None else clock.time()
+        day = planner.today(now)
+        release = planner.tz.localize(datetime.combine(day, parse_clock(limits.get("reservations_release", "16:00"))))
+        data = (store.load_json(QUOTA_KEY) if store else None) or {}
+        used = data.get("used") if data.get("day") == day.isoformat() else None
+        return cls(day.isoformat(), daily_limit, limits.get("reservations"), used, now >= release.timestamp())
+
+    def save(self, store):
+        store.save_json(QUOTA_KEY, {"day": self.day, "used": self.used})
+
+    def remaining(self, priority):
+        """Posts the class can still make today"""
+        held = 0 if self.released else sum(max(reserved - self.used[other], 0)
+                                           for other, reserved in self.reservations.items() if other != priority)
+        return max(self.daily_limit - sum(self.used.values()) - held, 0)
+
+    def allowed(self):
+        return {priority for priority in PRIORITY_CLASSES if self.remaining(priority) > 0}
+
+    def record(self, priority, count=1):
+        self.used[priority_of({"priority": priority})] += count
+
+    def report(self):
+        return {"day": self.day, "daily_limit": self.daily_limit, "released": self.released, "used": self.used,
+                "remaining": {priority: self.remaining(priority) for priority in PRIORITY_CLASSES}}
+
+
+def enqueue(store, tweet, priority):
+    """Add a tweet to the stored queue (the scheduled_tweets document) under a priority class"""
+    data = store.load_json(SCHEDULE_KEY) or {}
+    queue = PostQueue(data.get("tweets", []))
+    queued = queue.push(tweet, priority)
+    store.save_json(SCHEDULE_KEY, {"date": data.get("date", ""), "tweets": queue.tweets()})
+    return queued
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    from bot.state_store import get_state_backend
+
+    parser = argparse.ArgumentParser(description="Inspect or add to the posting queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="Queue sizes per class and today's quota")
+    add = sub.add_parser("add", help="Queue a tweet")
+    add.add_argument("text")
+    add.add_argument("--priority", choices=PRIORITY_CLASSES, default="campaign")
+    add.add_argument("--image-suggestion")
+    args = parser.parse_args()
+
+    state = get_state_backend()
+    try:
+        if args.command == "add":
+            enqueue(state, {"text": args.text, "image_suggestion": args.image_suggestion}, args.priority)
+            print(f"✅ Queued as {args.priority}")
+        queue = PostQueue((state.load_json(SCHEDULE_KEY) or {}).get("tweets", []))
+        print(json.dumps({"queued": queue.counts(), "held": len(queue.held),
+                          "quota": QuotaBook.from_config(state).report()}, indent=2))
+    finally:
+        state.close()
@@ -0,0 +1,227 @@
+"""
+Provider Router
+Orders LLM providers by expected time-to-success and skips the ones whose
+circuit breaker is open. Success rate and latency are exponentially decayed
+and persisted between runs, so a provider that timed out on the last few
+runs is not tried first (or at all) on the next one.
+"""
+
+import json
+import time
+import logging
+from pathlib import Path
+
+from utils.metrics import inc, set_gauge
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = ".cache/provider_router.json"
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class ProviderHealth:
+    """Decayed stats and circuit breaker state for one provider"""
+
+    __slots__ = ("state", "consecutive_failures", "open_until", "cooldown", "successes", "attempts",
+                 "success_seconds", "failure_seconds", "updated")
+
+    def __init__(self, prior_seconds):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        # Prior worth one success out of two attempts, so new providers are neither trusted nor dismissed
+        self.successes = 1.0
+        self.attempts = 2.0
+        self.success_seconds = prior_seconds
+        self.failure_seconds = prior_seconds
+        self.updated = time.time()
+
+    def decay(self, now, half_life):
+        factor = 0.5 ** (max(now - self.updated, 0.0) / half_life)
+        self.successes *= factor
+        self.attempts *= factor
+        self.updated = now
+
+    @property
+    def success_rate(self):
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    def expected_seconds(self):
+        """Expected seconds spent per success: cost of one attempt divided by its success chance"""
+        rate = max(self.success_rate, 0.01)
+        return (rate * self.success_seconds + (1 - rate) * self.failure_seconds) / rate
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data, prior_seconds):
+        health = cls(prior_seconds)
+        for name in cls.__slots__:
+            if name in data:
+                setattr(health, name, data[name])
+        return health
+
+
+class ProviderRouter:
+    def __init__(self, state_file=DEFAULT_STATE_FILE, failure_threshold=2, cooldown_seconds=600,
+                 max_cooldown_seconds=6 * 3600, half_life_seconds=24 * 3600, latency_alpha=0.3,
+                 prior_seconds=5.0):
+        """
+        Initialize provider router
+
+        Args:
+            state_file (str): JSON file the stats are persisted to
+            failure_threshold (int): Consecutive failures that open a provider's circuit
+            cooldown_seconds (float): First open period; doubles each time a half-open probe fails
+            max_cooldown_seconds (float): Upper bound for the open period
+            half_life_seconds (float): Half-life of the success/attempt counts
+            latency_alpha (float): EWMA weight of the newest latency sample
+            prior_seconds (float): Assumed latency for a provider without history
+        """
+        self.state_file = Path(state_file)
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.half_life_seconds = half_life_seconds
+        self.latency_alpha = latency_alpha
+        self.prior_seconds = prior_seconds
+        self.providers = {}
+        self._load()
+
+    def _load(self):
+        if not self.state_file.exists():
+            return
+        try:
+            with self.state_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.providers = {name: ProviderHealth.from_dict(entry, self.prior_seconds)
+                              for name, entry in data.items()}
+        except (json.JSONDecodeError, OSError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable provider router state: {e}")
+
+    def save(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            json.dump({name: health.to_dict() for name, health in self.providers.items()}, f, indent=2)
+        tmp_file.replace(self.state_file)
+
+    def health(self, name):
+        health = self.providers.get(name)
+        if health is None:
+            health = self.providers[name] = ProviderHealth(self.prior_seconds)
+        return health
+
+    def is_available(self, name, now=None):
+        """Closed circuits are available; an open one becomes half-open (one probe) once its cooldown ends"""
+        health = self.health(name)
+        if health.state == OPEN and (now or time.time()) >= health.open_until:
+            health.state = HALF_OPEN
+        return health.state != OPEN
+
+    def order(self, names):
+        """
+        Providers to try, fastest expected time-to-success first
+
+        Open circuits are skipped. If every circuit is open, all of them are
+        returned ordered by when their cooldown ends, so a run never gives up
+        without making a single attempt.
+
+        Args:
+            names (list): Provider names in configured (tie-break) order
+
+        Returns:
+            list: Provider names to try in order
+        """
+        now = time.time()
+        for name in names:
+            self.health(name).decay(now, self.half_life_seconds)
+        available = [name for name in names if self.is_available(name, now)]
+        self.export_metrics()
+        for name in names:
+            if name not in available:
+                inc("provider_skipped_total", provider=name)
+                logger.info(f"Skipping {name}: circuit open for another "
+                            f"{self.providers[name].open_until - now:.0f}s")
+        if not available:
+            logger.warning("Every provider circuit is open; probing them anyway")
+            return sorted(names, key=lambda name: self.providers[name].open_until)
+        # sorted() is stable, so equal estimates keep the configured order
+        return sorted(available, key=lambda name: self.providers[name].expected_seconds())
+
+    def record(self, name, success, seconds):
+        """Update stats and circuit state after one attempt"""
+        health = self.health(name)
+        health.decay(time.time(), self.half_life_seconds)
+        health.attempts += 1
+        alpha = self.latency_alpha
+        if success:
+            health.successes += 1
+            health.success_seconds += alpha * (seconds - health.success_seconds)
+            health.consecutive_failures = 0
+            health.cooldown = 0.0
+            health.state = CLOSED
+        else:
+            health.failure_seconds += alpha * (seconds - health.failure_seconds)
+            health.consecutive_failures += 1
+            if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+                self._open(name, health)
+        self._export(name, health)
+
+    def _open(self, name, health):
+        health.cooldown = min(health.cooldown * 2 or self.cooldown_seconds, self.max_cooldown_seconds)
+        health.open_until = time.time() + health.cooldown
+        health.state = OPEN
+        inc("provider_circuit_opened_total", provider=name)
+        logger.warning(f"Circuit for {name} opened for {health.cooldown:.0f}s after "
+                       f"{health.consecutive_failures} consecutive failures")
+
+    def call(self, name, generate, *args):
+        """
+        Run one provider attempt and record the outcome
+
+        Args:
+            name (str): Provider name
+            generate: Callable returning the text, or None/raising on failure
+
+        Returns:
+            The generated text, or None if the attempt failed
+        """
+        start = time.perf_counter()
+        try:
+            result = generate(*args)
+        except Exception as e:
+            logger.error(f"{name} raised: {e}")
+            result = None
+        self.record(name, bool(result), time.perf_counter() - start)
+        return result
+
+    def _export(self, name, health):
+        set_gauge("provider_circuit_state", STATE_CODES[health.state], provider=name)
+        set_gauge("provider_success_rate", round(health.success_rate, 4), provider=name)
+        set_gauge("provider_expected_seconds", round(health.expected_seconds(), 3), provider=name)
+
+    def export_metrics(self):
+        for name, health in self.providers.items():
+            self._export(name, health)
+
+    def report(self):
+        """Per-provider state for logs and dashboards"""
+        return {
+            name: {
+                "state": health.state,
+                "success_rate": round(health.success_rate, 3),
+                "success_seconds": round(health.success_seconds, 3),
+                "failure_seconds": round(health.failure_seconds, 3),
+                "expected_seconds": round(health.expected_seconds(), 3),
+                "open_until": health.open_until if health.state != CLOSED else None,
+            }
+            for name, health in self.providers.items()
+        }
+
+
+if __name__ == "__main__":
+    print(json.dumps(ProviderRouter().report(), indent=2))
@@ -0,0 +1,273 @@
+"""
+Rate Limits
+Tracks the X API rate-limit headers (15-minute x-rate-limit-* windows and
+the 24-hour user/app caps) per endpoint and per account from every
+response, so callers can check a window before calling, see when it will
+run out at the current pace, and defer or reorder work instead of letting
+tweepy's wait_on_rate_limit sleep the whole process.
+"""
+
+import re
+import json
+import logging
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+from utils.metrics import inc, set_gauge
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = ".cache/rate_limits.json"
+DEFAULT_ACCOUNT = "default"
+# Header prefix -> scope name
+SCOPES = {"x-rate-limit": "window", "x-user-limit-24hour": "user_24h", "x-app-limit-24hour": "app_24h"}
+# Numeric path segments after the API version (/2/, /1.1/)
+ID_SEGMENT = re.compile(r"(?<=.)/\d+(?=/|$)")
+
+CREATE_TWEET = "POST /2/tweets"
+TWEET_LOOKUP = "GET /2/tweets"
+SEARCH_RECENT = "GET /2/tweets/search/recent"
+USER_MENTIONS = "GET /2/users/:id/mentions"
+USER_TWEETS = "GET /2/users/:id/tweets"
+MEDIA_UPLOAD = "POST /1.1/media/upload.json"
+
+
+def endpoint_key(method, url):
+    """'POST /2/tweets', 'GET /2/users/:id/mentions' - numeric path segments become :id"""
+    return f"{method.upper()} {ID_SEGMENT.sub('/:id', urlparse(url).path)}"
+
+
+class RateLimitDeferred(Exception):
+    """Raised by RateLimitManager.check instead of sleeping until a window resets"""
+
+    def __init__(self, endpoint, account, retry_after):
+        super().__init__(f"{endpoint} rate-limited for {account}; retry in {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.account = account
+        self.retry_after = retry_after
+
+
+class RateLimitWindow:
+    """One limit/remaining/reset triple and how fast it has been spent"""
+
+    __slots__ = ("limit", "remaining", "reset", "first_seen", "first_remaining", "updated")
+
+    def __init__(self, limit, remaining, reset, now):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        # Calls spent before the window was first seen have no timestamps, so pace starts here
+        self.first_seen = now
+        self.first_remaining = remaining
+        self.updated = now
+
+    def pace(self, now):
+        """Calls per second spent since the window was first seen"""
+        elapsed = max(now - self.first_seen, 1.0)
+        return max(self.first_remaining - self.remaining, 0) / elapsed
+
+    def exhausted_at(self, now):
+        """Predicted time remaining reaches 0 at the current pace, or None if the window resets first"""
+        if self.reset <= now:
+            return None
+        if self.remaining <= 0:
+            return now
+        pace = self.pace(now)
+        if pace <= 0:
+            return None
+        at = now + self.remaining / pace
+        return at if at < self.reset else None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        window = cls(data["limit"], data["remaining"], data["reset"], data["first_seen"])
+        window.first_remaining = data.get("first_remaining", window.remaining)
+        window.updated = data.get("updated", window.first_seen)
+        return window
+
+
+class RateLimitManager:
+    def __init__(self, state_file=DEFAULT_STATE_FILE):
+        """
+        Initialize rate-limit manager
+
+        Args:
+            state_file (str): JSON file windows are persisted to between runs, or None
+        """
+        self.state_file = Path(state_file) if state_file else None
+        # (account, endpoint) -> {scope: RateLimitWindow}
+        self.windows = {}
+        # Bot threads share one manager
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.state_file or not self.state_file.exists():
+            return
+        try:
+            with self.state_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            now = clock.time()
+            for entry in data:
+                windows = {scope: RateLimitWindow.from_dict(window) for scope, window in entry["windows"].items()
+                           if window["reset"] > now}
+                if windows:
+                    self.windows[(entry["account"], entry["endpoint"])] = windows
+        except (json.JSONDecodeError, OSError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable rate-limit state: {e}")
+
+    def save(self):
+        if not self.state_file:
+            return
+        now = clock.time()
+        with self._lock:
+            data = [{"account": account, "endpoint": endpoint,
+                     "windows": {scope: window.to_dict() for scope, window in windows.items()}}
+                    for (account, endpoint), windows in self.windows.items()
+                    if any(window.reset > now for window in windows.values())]
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        tmp_file.replace(self.state_file)
+
+    def attach(self, client, account=DEFAULT_ACCOUNT):
+        """
+        Observe every response of a tweepy.Client or tweepy.API
+
+        Both keep a requests.Session; a response hook on it sees the headers
+        of successful calls too, which tweepy does not return.
+
+        Returns:
+            The client, for chaining
+        """
+        def hook(response, *args, **kwargs):
+            self.observe(response, account)
+
+        client.session.hooks["response"].append(hook)
+        return client
+
+    def observe(self, response, account=DEFAULT_ACCOUNT):
+        """Record the rate-limit headers of one requests response"""
+        self.observe_headers(response.request.method, response.url, response.status_code, response.headers, account)
+
+    def observe_headers(self, method, url, status_code, headers, account=DEFAULT_ACCOUNT):
+        """Record rate-limit headers from any HTTP client (aiohttp responses have no .request)"""
+        endpoint = endpoint_key(method, str(url))
+        now = clock.time()
+        seen = False
+        with self._lock:
+            windows = self.windows.setdefault((account, endpoint), {})
+            for prefix, scope in SCOPES.items():
+                remaining = headers.get(f"{prefix}-remaining")
+                reset = headers.get(f"{prefix}-reset")
+                if remaining is None or reset is None:
+                    continue
+                seen = True
+                remaining, reset = int(remaining), float(reset)
+                limit = int(headers.get(f"{prefix}-limit") or max(remaining, 1))
+                window = windows.get(scope)
+                if window is None or reset > window.reset:
+                    windows[scope] = window = RateLimitWindow(limit, remaining, reset, now)
+                window.limit, window.updated = limit, now
+                # Responses can arrive out of order; the lowest count in a window is the current one
+                window.remaining = min(window.remaining, remaining)
+                if status_code == 429:
+                    window.remaining = 0
+                set_gauge("rate_limit_remaining", window.remaining, endpoint=endpoint, account=account, scope=scope)
+            if not seen and status_code == 429:
+                # A 429 without headers: assume the standard 15-minute window
+                windows["window"] = RateLimitWindow(1, 0, now + 15 * 60, now)
+            if not windows:
+                del self.windows[(account, endpoint)]
+        if status_code == 429:
+            inc("rate_limited_total", endpoint=endpoint, account=account)
+            logger.warning(f"{endpoint} rate-limited for {account} for {self.retry_after(endpoint, account):.0f}s")
+
+    def remaining(self, endpoint, account=DEFAULT_ACCOUNT, now=None):
+        """Calls left before the tightest known window resets, or None if nothing is known"""
+        now = now or clock.time()
+        with self._lock:
+            counts = [window.remaining for window in self.windows.get((account, endpoint), {}).values()
+                      if window.reset > now]
+        return min(counts) if counts else None
+
+    def retry_after(self, endpoint, account=DEFAULT_ACCOUNT, calls=1, now=None):
+        """Seconds until calls more requests fit in every window (0 if they fit now)"""
+        now = now or clock.time()
+        with self._lock:
+            waits = [window.reset - now for window in self.windows.get((account, endpoint), {}).values()
+                     if window.reset > now and window.remaining < calls]
+        return max(waits) if waits else 0.0
+
+    def available(self, endpoint, account=DEFAULT_ACCOUNT, calls=1, now=None):
+        return self.retry_after(endpoint, account, calls, now) <= 0
+
+    def check(self, endpoint, account=DEFAULT_ACCOUNT, calls=1):
+        """Raise RateLimitDeferred if calls requests would hit an exhausted window"""
+        wait = self.retry_after(endpoint, account, calls)
+        if wait > 0:
+            inc("rate_limit_deferred_total", endpoint=endpoint, account=account)
+            raise RateLimitDeferred(endpoint, account, wait)
+
+    def exhausted_at(self, endpoint, account=DEFAULT_ACCOUNT, now=None):
+        """Predicted epoch time the endpoint runs out at its current pace, or None if it will not"""
+        now = now or clock.time()
+        with self._lock:
+            times = [window.exhausted_at(now) for window in self.windows.get((account, endpoint), {}).values()]
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+
+    def pick_account(self, endpoint, accounts, calls=1):
+        """Account with room for calls and the most remaining; else the one that frees up first"""
+        now = clock.time()
+        ready = [account for account in accounts if self.available(endpoint, account, calls, now)]
+        if ready:
+            return max(ready, key=lambda account: self.remaining(endpoint, account, now) or float("inf"))
+        return min(accounts, key=lambda account: self.retry_after(endpoint, account, calls, now))
+
+    def order(self, tasks, endpoint_of, account=DEFAULT_ACCOUNT):
+        """
+        Tasks whose endpoint has room first (original order kept), throttled ones after by reset time
+
+        Args:
+            tasks (list): Work items
+            endpoint_of: Callable(task) -> endpoint key the task needs
+
+        Returns:
+            list: Reordered tasks
+        """
+        now = clock.time()
+        return sorted(tasks, key=lambda task: self.retry_after(endpoint_of(task), account, now=now))
+
+    def wait_for(self, endpoint, account=DEFAULT_ACCOUNT, minimum=1.0):
+        """tenacity wait callable: sleep until the endpoint's window resets"""
+        return lambda retry_state: max(self.retry_after(endpoint, account), minimum)
+
+    def report(self):
+        """Per-endpoint windows for logs and dashboards"""
+        now = clock.time()
+        with self._lock:
+            items = list(self.windows.items())
+        report = {}
+        for (account, endpoint), windows in items:
+            report.setdefault(account, {})[endpoint] = {
+                scope: {
+                    "limit": window.limit,
+                    "remaining": window.remaining,
+                    "reset_in": round(max(window.reset - now, 0.0), 1),
+                    "exhausted_in": (round(window.exhausted_at(now) - now, 1)
+                                     if window.exhausted_at(now) is not None else None),
+                }
+                for scope, window in windows.items()
+            }
+        return report
+
+
+if __name__ == "__main__":
+    print(json.dumps(RateLimitManager().report(), indent=2))
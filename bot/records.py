@@ -0,0 +1,190 @@
+"""
+Compact Records
+Slotted records and array-backed columnar batches for tweets and sentiment
+results, for queues and history that grow to hundreds of thousands of
+items. Each record converts to and from the dict shape used elsewhere.
+"""
+
+import sys
+from array import array
+from enum import Enum, IntEnum
+from datetime import datetime
+from dataclasses import dataclass
+
+from utils import clock
+
+
+class Sentiment(IntEnum):
+    NEGATIVE = -1
+    NEUTRAL = 0
+    POSITIVE = 1
+
+    @classmethod
+    def from_label(cls, label):
+        return cls[label.upper()]
+
+    @property
+    def label(self):
+        return self.name.lower()
+
+
+class TweetType(str, Enum):
+    INTELLIGENT_V2 = "intelligent_v2"
+    SCHEDULED = "scheduled"
+    FALLBACK = "fallback"
+    THREAD = "thread"
+    REPLY = "reply"
+    MANUAL = "manual"
+
+    @classmethod
+    def coerce(cls, value):
+        """Enum member for known types; unknown types become interned strings so copies share memory"""
+        try:
+            return cls(value)
+        except ValueError:
+            return sys.intern(str(value))
+
+
+def to_epoch(value):
+    """Integer epoch seconds from a datetime, ISO string, number or None (now)"""
+    if value is None:
+        return int(clock.time())
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+    return int(value)
+
+
+@dataclass(slots=True)
+class TweetRecord:
+    id: int
+    content: str
+    type: TweetType
+    timestamp: int
+
+    @classmethod
+    def create(cls, tweet_id, content, tweet_type="intelligent_v2", timestamp=None):
+        return cls(int(tweet_id), content, TweetType.coerce(tweet_type), to_epoch(timestamp))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls.create(data["id"], data["content"], data.get("type", "intelligent_v2"), data.get("timestamp"))
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "content": self.content,
+            "type": getattr(self.type, "value", self.type),
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class SentimentRecord:
+    sentiment: Sentiment
+    confidence: float
+    combined_score: float
+    textblob_polarity: float
+    vader_neg: float
+    vader_neu: float
+    vader_pos: float
+    vader_compound: float
+
+    @classmethod
+    def from_result(cls, result):
+        """From a SentimentAnalyzer.analyze_sentiment() result dict"""
+        vader = result.get("vader_scores") or {}
+        return cls(Sentiment.from_label(result["sentiment"]), result["confidence"],
+                   result.get("combined_score", 0.0), result.get("textblob_polarity", 0.0),
+                   vader.get("neg", 0.0), vader.get("neu", 0.0), vader.get("pos", 0.0), vader.get("compound", 0.0))
+
+    def to_dict(self):
+        return {
+            "sentiment": self.sentiment.label,
+            "confidence": self.confidence,
+            "vader_scores": {"neg": self.vader_neg, "neu": self.vader_neu,
+                             "pos": self.vader_pos, "compound": self.vader_compound},
+            "textblob_polarity": self.textblob_polarity,
+            "combined_score": self.combined_score,
+        }
+
+    def scores(self):
+        """Component scores as bot.screening.raw_scores() stores them; VADER's neg/neu/pos sum to 1, so
+        all three at zero means the result had no VADER scores (the distilled backend)"""
+        scores = {"combined_score": round(self.combined_score, 4)}
+        if self.vader_neg or self.vader_neu or self.vader_pos:
+            scores["vader_compound"] = round(self.vader_compound, 4)
+            scores["textblob_polarity"] = round(self.textblob_polarity, 4)
+        return scores
+
+    def __getitem__(self, key):
+        """Read like the result dict, so callers indexing ['sentiment'] keep working"""
+        if key == "sentiment":
+            return self.sentiment.label
+        if key == "vader_scores":
+            return self.to_dict()["vader_scores"]
+        return getattr(self, key)
+
+
+class TweetColumns:
+    """Columnar TweetRecord batch: ids and timestamps in int64 arrays, types as one-byte codes"""
+
+    def __init__(self, records=()):
+        self.ids = array("q")
+        self.timestamps = array("q")
+        self.type_codes = array("B")
+        self.contents = []
+        self._types = []
+        self._type_index = {}
+        for record in records:
+            self.append(record)
+
+    def append(self, record):
+        code = self._type_index.get(record.type)
+        if code is None:
+            code = self._type_index[record.type] = len(self._types)
+            self._types.append(record.type)
+        self.ids.append(record.id)
+        self.timestamps.append(record.timestamp)
+        self.type_codes.append(code)
+        self.contents.append(record.content)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        return TweetRecord(self.ids[index], self.contents[index], self._types[self.type_codes[index]],
+                           self.timestamps[index])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class SentimentColumns:
+    """Columnar SentimentRecord batch in float32/int8 arrays"""
+
+    FIELDS = ("confidence", "combined_score", "textblob_polarity", "vader_neg", "vader_neu", "vader_pos",
+              "vader_compound")
+
+    def __init__(self, records=()):
+        self.sentiments = array("b")
+        for field in self.FIELDS:
+            setattr(self, field, array("f"))
+        for record in records:
+            self.append(record)
+
+    def append(self, record):
+        self.sentiments.append(record.sentiment)
+        for field in self.FIELDS:
+            getattr(self, field).append(getattr(record, field))
+
+    def __len__(self):
+        return len(self.sentiments)
+
+    def __getitem__(self, index):
+        return SentimentRecord(Sentiment(self.sentiments[index]),
+                               *(getattr(self, field)[index] for field in self.FIELDS))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
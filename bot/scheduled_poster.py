@@ -0,0 +1,368 @@
+"""
+Scheduled Poster
+Posts queued tweets claimed from the shared lease queue (bot/leases.py)
+through the outbox, with thread splitting and optional generated images.
+post_scheduled_tweet.py, `python -m bot.leases work` and the resident bot's
+slot thread all post through it, each passing in its own clients,
+rate-limit manager and state store.
+"""
+
+import os
+import socket
+import random
+import logging
+import tempfile
+from datetime import datetime
+
+import requests
+import tweepy
+from tenacity import Retrying, retry, retry_if_exception, stop_after_attempt, wait_fixed
+
+from bot.threads import ThreadPublisher, ThreadProgress, thread_key, split_thread, weighted_length, MAX_WEIGHTED_LENGTH
+from bot.outbox import Outbox, IN_FLIGHT, POSTED, is_ambiguous, is_duplicate
+from bot.rate_limits import RateLimitManager, CREATE_TWEET, MEDIA_UPLOAD
+from bot.llm_cache import LLMCache
+from bot.slots import SlotPlanner
+from bot.engagement import EngagementCollector
+from bot.leases import LeaseQueue, Heartbeat, QUEUED
+from utils.metrics import timed, timer, inc, record_retry_wait
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+LOG_NAME = "tweet_post_log"
+THREAD_PROGRESS_FILE = "thread_progress.json"
+MAX_IMAGES_PER_RUN = 2
+IMAGE_PROBABILITY = 0.2  # ~20% chance for tweets with image suggestions
+MAX_RATE_LIMIT_WAIT = 60  # a later reset leaves the rest of the queue for the next run
+REQUIRED_ENV = ("TWITTER_CONSUMER_KEY", "TWITTER_CONSUMER_SECRET",
+                "TWITTER_ACCESS_TOKEN", "TWITTER_ACCESS_TOKEN_SECRET")
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_fixed(5), sleep=clock.sleep,
+       before_sleep=record_retry_wait("generate_image"))
+@timed("image_generate_seconds")
+def generate_image(prompt):
+    """Generate image with DALL-E and return temporary file path."""
+    import openai
+
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    try:
+        response = openai.Image.create(
+            prompt=prompt,
+            n=1,
+            size="1024x1024"
+        )
+        url = response['data'][0]['url']
+        r = requests.get(url, timeout=20)
+        r.raise_for_status()
+        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
+        tmp_file.write(r.content)
+        tmp_file.close()
+        return tmp_file.name, url
+    except Exception as e:
+        print(f"❌ Image generation failed: {e}")
+        raise
+
+
+class ScheduledPoster:
+    def __init__(self, client, store, rate_limits, api_v1=None, images=False):
+        """
+        Initialize scheduled poster
+
+        Args:
+            client (tweepy.Client): v2 client tweets are posted with
+            store: State backend holding the queue document, outbox, thread progress, quota and log
+            rate_limits (RateLimitManager): Manager the clients report to; shared with the caller
+            api_v1 (tweepy.API): v1.1 client for media uploads; no images without it
+            images (bool): Generate images for tweets with suggestions (needs OPENAI_API_KEY)
+        """
+        self.client = client
+        self.store = store
+        self.rate_limits = rate_limits
+        self.api_v1 = api_v1
+        self.images = bool(images and api_v1 is not None)
+        self.image_probability = IMAGE_PROBABILITY
+        self.max_images_per_run = MAX_IMAGES_PER_RUN
+        # Only a 429 whose window resets soon is retried; timeouts and 5xx go through the
+        # outbox's timeline check instead
+        self.retrying = Retrying(retry=retry_if_exception(self._short_throttle), stop=stop_after_attempt(3),
+                                 wait=rate_limits.wait_for(CREATE_TWEET), sleep=clock.sleep,
+                                 before_sleep=record_retry_wait("create_tweet"), reraise=True)
+
+    @classmethod
+    def from_env(cls, store, rate_limits_file=".state/rate_limits.json"):
+        """
+        Poster with clients from the TWITTER_* environment variables
+
+        Raises:
+            ValueError: If one of them is missing
+        """
+        for env in REQUIRED_ENV:
+            if not os.getenv(env):
+                raise ValueError(f"Missing environment variable: {env}")
+        credentials = {
+            "consumer_key": os.getenv("TWITTER_CONSUMER_KEY"),
+            "consumer_secret": os.getenv("TWITTER_CONSUMER_SECRET"),
+            "access_token": os.getenv("TWITTER_ACCESS_TOKEN"),
+            "access_token_secret": os.getenv("TWITTER_ACCESS_TOKEN_SECRET"),
+        }
+        # Rate limits are read from response headers rather than slept through (wait_on_rate_limit)
+        rate_limits = RateLimitManager(rate_limits_file)
+        api_v1 = rate_limits.attach(tweepy.API(tweepy.OAuth1UserHandler(**credentials)))
+        client = rate_limits.attach(tweepy.Client(**credentials))
+        return cls(client, store, rate_limits, api_v1, images=bool(os.getenv("OPENAI_API_KEY")))
+
+    def log_event(self, message):
+        self.store.append_log(LOG_NAME, f"{clock.utcnow()}: {message}")
+
+    def _short_throttle(self, error):
+        """Only a 429 certainly did not post, and only one whose window resets soon is worth waiting for"""
+        return (isinstance(error, tweepy.TooManyRequests) and
+                self.rate_limits.retry_after(CREATE_TWEET) <= MAX_RATE_LIMIT_WAIT)
+
+    @timed("create_tweet_seconds")
+    def _create_tweet(self, text, media_ids=None, in_reply_to_tweet_id=None):
+        try:
+            params = {"text": text}
+            if media_ids:
+                params["media_ids"] = media_ids
+            if in_reply_to_tweet_id:
+                params["in_reply_to_tweet_id"] = in_reply_to_tweet_id
+            return self.client.create_tweet(**params)
+        except Exception as e:
+            print(f"❌ Tweet posting failed: {e}")
+            raise
+
+    def post_tweet(self, text, media_ids=None, in_reply_to_tweet_id=None):
+        """Post a tweet with optional media, optionally as a reply."""
+        return self.retrying(self._create_tweet, text, media_ids, in_reply_to_tweet_id)
+
+    def upload_image(self, image_suggestion):
+        """Generate an image for the suggestion and upload it; returns media_ids."""
+        img_path, img_url = generate_image(image_suggestion)
+        with timer("media_upload_seconds"):
+            media = self.api_v1.media_upload(img_path)
+        os.unlink(img_path)
+        print(f"✅ Generated image: {img_url}")
+        self.log_event(f"Generated image: {img_url}")
+        return [media.media_id]
+
+    def reconcile(self, outbox, progress):
+        outbox.reconcile(self.client, on_thread_part=lambda text, tweet_id: progress.record(thread_key(text), tweet_id))
+
+    def post_tweets(self, count):
+        """Post tweets claimed from the lease queue; returns how many went out (see post_batch)"""
+        return self.post_batch(count)["posted"]
+
+    def post_batch(self, count):
+        """
+        Post tweets claimed from the lease queue by priority class, with images for ~20% of those with suggestions
+
+        Args:
+            count (int): Most tweets to attempt
+
+        Returns:
+            dict: 'posted' and 'failed' attempts, and 'held' - why the run stopped early: 'empty',
+                'quota', 'rate_limit', 'in_flight' (an ambiguous post waits for a timeline check) or None
+        """
+        outbox = Outbox(self.store)
+        progress = ThreadProgress(THREAD_PROGRESS_FILE, store=self.store)
+
+        # Settle whatever an earlier run left in flight (crash, timeout) with one timeline lookup
+        try:
+            self.reconcile(outbox, progress)
+        except Exception as e:
+            print(f"⚠️ Outbox reconcile failed, in-flight tweets stay parked: {e}")
+            self.log_event(f"Outbox reconcile failed: {e}")
+
+        # Runs that overlap (the hourly job, a manual dispatch, python -m bot.leases work) share one
+        # queue; each posts only what it has leased, and manual posts count against the same quota
+        queue = LeaseQueue(ledger=self.store)
+        try:
+            queue.sync(self.store, also=outbox.queued())
+            result = self._post_claimed(queue, outbox, progress, count)
+            # Prunes what was posted from the document
+            queue.sync(self.store, also=outbox.queued())
+            return result
+        finally:
+            queue.close()
+
+    def _post_claimed(self, queue, outbox, progress, count):
+        if not queue.counts().get(QUEUED):
+            print("❌ No scheduled tweets found.")
+            self.log_event("No scheduled tweets found")
+            return {"posted": 0, "failed": 0, "held": "empty"}
+
+        budget = self.rate_limits.remaining(CREATE_TWEET)
+        if budget is not None and budget < count:
+            print(f"⚠️ Only {budget} tweet request(s) left in the current rate-limit window.")
+            self.log_event(f"Only {budget} tweet requests left in the current rate-limit window")
+
+        owner = f"{socket.gethostname()}-{os.getpid()}"
+        # Failed items go back in line for the next run, not the rest of this one
+        failed = []
+        held = None
+        errors = 0
+        posted_count = 0
+        images_posted = 0
+        attempts = 0
+        try:
+            llm_cache = LLMCache.from_env()
+        except Exception as e:
+            print(f"⚠️ LLM cache unavailable: {e}")
+            llm_cache = None
+
+        def settle_ambiguous(key):
+            """The request may have gone through: look before posting again"""
+            try:
+                self.reconcile(outbox, progress)
+            except Exception as reconcile_error:
+                print(f"⚠️ Could not check the timeline, leaving tweet in flight: {reconcile_error}")
+                return None
+            if outbox.items[key]["state"] == POSTED:
+                print("✅ Tweet was posted despite the error.")
+                return True
+            return False
+
+        def mark_done(lease):
+            inc("tweets_posted_total")
+            queue.complete(lease)
+            if llm_cache:
+                llm_cache.mark_posted(lease["tweet"]["text"])
+
+        while attempts < count:
+            leases = queue.claim(owner, 1, skip=failed)
+            if not leases:
+                # Anything still queued besides this run's failures is held back by the quota
+                left = sum(queue.counts().get(QUEUED, {}).values())
+                if left > len(failed):
+                    held = "quota"
+                    print(f"⏸️ Daily quota used up ({queue.quota()['used']}); leaving {left} queued tweet(s).")
+                    self.log_event(f"Daily quota used up; {left} tweets left queued")
+                break
+            lease = leases[0]
+            tweet = lease["tweet"]
+            text = tweet["text"]
+            if outbox.state(text) == IN_FLIGHT:
+                # An earlier attempt may have posted it and the timeline could not be checked
+                queue.release(lease, attempted=False)
+                held = "in_flight"
+                print("⏸️ Tweet still in flight from an earlier run; leaving the rest until it is settled.")
+                break
+            if outbox.state(text) == POSTED:
+                queue.complete(lease, record=False)
+                print(f"⏭️ Skipping already posted tweet: {text[:50]}...")
+                continue
+            # Defer instead of sleeping through a spent window; the item keeps its place in line
+            wait = self.rate_limits.retry_after(CREATE_TWEET, calls=len(split_thread(text)))
+            if wait > MAX_RATE_LIMIT_WAIT:
+                queue.release(lease, attempted=False)
+                held = "rate_limit"
+                print(f"⏸️ Tweet rate limit reached, resets in {wait:.0f}s; leaving the rest for the next run.")
+                self.log_event(f"Tweet rate limit reached, resets in {wait:.0f}s; deferred remaining tweets")
+                inc("rate_limit_deferred_total", endpoint=CREATE_TWEET, account="default")
+                break
+            key = outbox.begin(tweet)
+            attempts += 1
+            image_suggestion = tweet.get("image_suggestion")
+            want_image = (self.images and image_suggestion and
+                          images_posted < self.max_images_per_run and
+                          self.rate_limits.available(MEDIA_UPLOAD) and
+                          random.random() < self.image_probability)
+
+            # The lease is renewed while the tweet (and any throttle waits) goes out
+            with Heartbeat(queue, leases):
+                # Long posts go out as a reply chain; the image is prepared while part 1 is queued
+                if weighted_length(text) > MAX_WEIGHTED_LENGTH:
+                    uploaded = []
+
+                    def load_media(suggestion=image_suggestion):
+                        media_ids = self.upload_image(suggestion)
+                        uploaded.append(media_ids)
+                        return media_ids
+
+                    def send_part(part, media_ids, reply_to, key=key):
+                        outbox.expect(key, part)
+                        return self.post_tweet(part, media_ids, reply_to)
+
+                    result = ThreadPublisher(send_part, progress).publish(text, {0: load_media} if want_image else None)
+                    images_posted += len(uploaded)
+                    error = None if result['success'] else result.get('exception') or result['error']
+                else:
+                    media_ids = None
+                    if want_image:
+                        try:
+                            media_ids = self.upload_image(image_suggestion)
+                            images_posted += 1
+                        except Exception as e:
+                            print(f"❌ Image upload failed: {e}")
+                            self.log_event(f"Image upload failed: {e}")
+                    try:
+                        # Includes tenacity retries and their waits
+                        with timer("post_tweet_total_seconds"):
+                            response = self.post_tweet(text, media_ids)
+                        result = {"success": True, "tweet_ids": [response.data['id']]}
+                        error = None
+                    except Exception as e:
+                        error = e
+
+            if error is None:
+                outbox.mark_posted(key, result['tweet_ids'])
+                mark_done(lease)
+                if len(result['tweet_ids']) > 1:
+                    print(f"✅ Posted thread: {text[:50]}... (IDs: {', '.join(result['tweet_ids'])})")
+                    self.log_event(f"Posted thread: {text} (IDs: {', '.join(result['tweet_ids'])})")
+                else:
+                    print(f"✅ Posted: {text} (ID: {result['tweet_ids'][0]})")
+                    self.log_event(f"Posted tweet: {text} (ID: {result['tweet_ids'][0]})")
+                posted_count += 1
+                continue
+            if is_duplicate(error):
+                outbox.mark_posted(key)
+                queue.complete(lease, record=False)
+                print(f"⏭️ X already has this tweet: {text[:50]}...")
+                continue
+            inc("tweets_failed_total")
+            settled = settle_ambiguous(key) if is_ambiguous(error) else False
+            if settled:
+                mark_done(lease)
+                posted_count += 1
+                continue
+            errors += 1
+            if settled is None:
+                # Parked in flight: the next run's reconcile decides, so the lease is not retried now
+                queue.release(lease)
+                held = "in_flight"
+                break
+            outbox.release(key, error)
+            queue.release(lease)
+            failed.append(lease["key"])
+            if weighted_length(text) > MAX_WEIGHTED_LENGTH:
+                # The next run resumes after the last posted part
+                print(f"❌ Thread stopped after {len(result['tweet_ids'])} part(s): {error}")
+                self.log_event(f"Thread stopped after {len(result['tweet_ids'])} part(s): {error}")
+                break
+            print(f"❌ Error posting tweet: {error}")
+            self.log_event(f"Error posting tweet: {error}")
+
+        print(f"📢 Finished posting {posted_count} tweet(s), {images_posted} with images.")
+        self.log_event(f"Finished posting {posted_count} tweet(s), {images_posted} with images")
+        return {"posted": posted_count, "failed": errors, "held": held}
+
+    def post_due_slots(self, count):
+        """Post as many tweets as today's planned slots have come due (at most count)"""
+        planner, quota = SlotPlanner.from_config()
+        # Busier posting hours (from collected engagement) get more of tomorrow's slots
+        weights = EngagementCollector(self.store).hourly_weights(planner.tz)
+        timetable = planner.load_or_plan(self.store, quota, weights or None)
+        due = timetable.due()
+        if not due:
+            next_slot = timetable.next_slot()
+            when = datetime.fromtimestamp(next_slot or planner.next_window_start()).astimezone(planner.tz)
+            print(f"⏭️ No slot due; next at {when.strftime('%Y-%m-%d %H:%M %Z')}.")
+            return 0
+        posted = self.post_tweets(min(due, count))
+        timetable.consume(posted)
+        planner.save(self.store, timetable)
+        return posted
@@ -0,0 +1,173 @@
+"""
+Screening Policy
+The sentiment gate that decides whether content may be posted, in one
+place, and re-applying it to queued content. Queued tweets keep the raw
+component scores they were analyzed with (VADER compound and TextBlob
+polarity, or the distilled backend's combined score), so a policy change
+is one vectorized pass over those stored columns instead of analyzing
+every text again. NumPy is imported only for that pass; without it the
+policy is applied item by item.
+"""
+
+import logging
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+SCORES_KEY = "sentiment_scores"
+BLOCKED_KEY = "blocked"
+COMPONENTS = ("vader_compound", "textblob_polarity", "combined_score")
+
+
+def raw_scores(result):
+    """The stored form of an analyze_sentiment() result: its component scores only"""
+    scores = {"combined_score": round(float(result.get("combined_score", 0.0)), 4)}
+    vader = result.get("vader_scores") or {}
+    if "compound" in vader:
+        scores["vader_compound"] = round(float(vader["compound"]), 4)
+        scores["textblob_polarity"] = round(float(result.get("textblob_polarity", 0.0)), 4)
+    return scores
+
+
+def score_columns(rows):
+    """Component name -> float64 array over rows of stored scores, NaN where a row lacks it"""
+    import numpy as np
+
+    return {name: np.array([row.get(name, np.nan) for row in rows], dtype=np.float64) for name in COMPONENTS}
+
+
+@dataclass(frozen=True)
+class ScreeningPolicy:
+    """
+    Content is negative when its combined score is at or below -label_threshold, and is
+    blocked when it is negative with a confidence (|combined score|) above block_confidence.
+    The combined score weighs VADER against TextBlob by vader_weight; content scored by the
+    distilled backend has no components and uses its stored combined score.
+    """
+    label_threshold: float = 0.1
+    block_confidence: float = 0.5
+    block_negative: bool = True
+    vader_weight: float = 0.5
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Policy from the 'sentiment_analysis' config section"""
+        from config.settings import get_bot_config
+
+        defaults = get_bot_config()
+        section = (config or defaults).get("sentiment_analysis", defaults["sentiment_analysis"])
+        return cls(section.get("confidence_threshold", cls.label_threshold),
+                   section.get("block_confidence", cls.block_confidence),
+                   section.get("block_negative", cls.block_negative),
+                   section.get("vader_weight", cls.vader_weight))
+
+    def combined(self, columns):
+        import numpy as np
+
+        mixed = self.vader_weight * columns["vader_compound"] + (1 - self.vader_weight) * columns["textblob_polarity"]
+        return np.where(np.isnan(mixed), columns["combined_score"], mixed)
+
+    def blocked(self, columns):
+        """Boolean array of the items this policy keeps from posting; unscored items pass"""
+        import numpy as np
+
+        combined = np.nan_to_num(self.combined(columns))
+        if not self.block_negative:
+            return np.zeros(len(combined), dtype=bool)
+        return (combined <= -self.label_threshold) & (-combined > self.block_confidence)
+
+    def blocks_scores(self, scores):
+        """blocked() for one item's stored scores, without NumPy"""
+        if "vader_compound" in scores and "textblob_polarity" in scores:
+            weight = self.vader_weight
+            combined = weight * scores["vader_compound"] + (1 - weight) * scores["textblob_polarity"]
+        else:
+            combined = scores.get("combined_score", 0.0)
+        return self.block_negative and combined <= -self.label_threshold and -combined > self.block_confidence
+
+    def blocks(self, result):
+        """Whether one analyze_sentiment() result is kept from posting"""
+        return self.blocks_scores(raw_scores(result))
+
+
+def rescreen(tweets, policy):
+    """
+    Apply a policy to queued tweets from their stored scores, setting or clearing 'blocked'
+
+    Args:
+        tweets (list): Tweet dicts, updated in place
+        policy (ScreeningPolicy): Policy to apply
+
+    Returns:
+        dict: Counts of items, unscored items, blocked items and items that changed state
+    """
+    rows = [tweet.get(SCORES_KEY) or {} for tweet in tweets]
+    try:
+        blocked = policy.blocked(score_columns(rows)).tolist()
+    except ImportError:
+        blocked = [policy.blocks_scores(row) for row in rows]
+    newly_blocked = unblocked = 0
+    for tweet, block in zip(tweets, blocked):
+        if block and not tweet.get(BLOCKED_KEY):
+            tweet[BLOCKED_KEY] = True
+            newly_blocked += 1
+        elif not block and tweet.get(BLOCKED_KEY):
+            tweet.pop(BLOCKED_KEY, None)
+            unblocked += 1
+    return {
+        "items": len(tweets),
+        "unscored": sum(not row for row in rows),
+        "blocked": sum(blocked),
+        "newly_blocked": newly_blocked,
+        "unblocked": unblocked,
+    }
+
+
+def score_missing(tweets, analyzer):
+    """Analyze the tweets that have no stored scores yet (queued before scores were kept); returns how many"""
+    missing = [tweet for tweet in tweets if not tweet.get(SCORES_KEY)]
+    if missing:
+        for tweet, result in zip(missing, analyzer.analyze_batch([tweet["text"] for tweet in missing])):
+            tweet[SCORES_KEY] = raw_scores(result)
+    return len(missing)
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+    from dataclasses import asdict, replace
+
+    from bot.post_queue import SCHEDULE_KEY
+    from bot.state_store import get_state_backend
+
+    parser = argparse.ArgumentParser(description="Re-apply the sentiment policy to queued tweets from stored scores")
+    parser.add_argument("--label-threshold", type=float)
+    parser.add_argument("--block-confidence", type=float)
+    parser.add_argument("--vader-weight", type=float)
+    parser.add_argument("--allow-negative", action="store_true", help="Block nothing")
+    parser.add_argument("--score-missing", action="store_true",
+                        help="Analyze tweets queued without stored scores first")
+    parser.add_argument("--dry-run", action="store_true", help="Report without saving the queue")
+    args = parser.parse_args()
+
+    policy = ScreeningPolicy.from_config()
+    overrides = {"label_threshold": args.label_threshold, "block_confidence": args.block_confidence,
+                 "vader_weight": args.vader_weight}
+    policy = replace(policy, **{name: value for name, value in overrides.items() if value is not None})
+    if args.allow_negative:
+        policy = replace(policy, block_negative=False)
+
+    state = get_state_backend()
+    try:
+        data = state.load_json(SCHEDULE_KEY) or {}
+        tweets = data.get("tweets", [])
+        scored = 0
+        if args.score_missing:
+            from bot.sentiment_analyzer import SentimentAnalyzer
+            scored = score_missing(tweets, SentimentAnalyzer())
+        report = rescreen(tweets, policy)
+        if not args.dry_run and (scored or report["newly_blocked"] or report["unblocked"]):
+            state.save_json(SCHEDULE_KEY, {**data, "tweets": tweets})
+        print(json.dumps({"policy": asdict(policy), "analyzed": scored, **report}, indent=2))
+    finally:
+        state.close()
@@ -1,26 +1,52 @@
 
 """
 Sentiment Analysis Module
-Provides sentiment analysis functionality using VADER and TextBlob
+Provides sentiment analysis functionality using VADER and TextBlob, or the
+distilled linear model in bot.distilled_sentiment (SENTIMENT_BACKEND=distilled)
 """
 
+import os
 import logging
 from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from utils.metrics import timed
 
 logger = logging.getLogger(__name__)
 
 class SentimentAnalyzer:
-    def __init__(self):
-        """Initialize sentiment analyzer with VADER and TextBlob"""
+    def __init__(self, backend=None, model_file=None):
+        """
+        Initialize sentiment analyzer with VADER and TextBlob
+
+        Args:
+            backend (str): 'lexicon' (VADER + TextBlob) or 'distilled'; SENTIMENT_BACKEND if None
+            model_file (str): Distilled weights; SENTIMENT_MODEL or models/sentiment_distilled.npz if None
+        """
         self.vader_analyzer = SentimentIntensityAnalyzer()
-        logger.info("Sentiment analyzer initialized")
+        self.backend = (backend or os.getenv("SENTIMENT_BACKEND", "lexicon")).lower()
+        self.distilled = None
+        if self.backend == "distilled":
+            try:
+                from bot.distilled_sentiment import DistilledSentiment, DEFAULT_MODEL_FILE
+                self.distilled = DistilledSentiment.load(model_file or os.getenv("SENTIMENT_MODEL", DEFAULT_MODEL_FILE))
+            except (ImportError, OSError) as e:
+                logger.warning(f"Distilled sentiment model unavailable ({e}); using VADER and TextBlob")
+                self.backend = "lexicon"
+        elif self.backend != "lexicon":
+            raise ValueError(f"Unknown sentiment backend: {self.backend}")
+        logger.info(f"Sentiment analyzer initialized ({self.backend})")
     
+    @timed("sentiment_analyze_seconds")
     def analyze_sentiment(self, text):
         """
         Analyze sentiment using both VADER and TextBlob
         Returns sentiment classification and confidence score
         """
+        if self.distilled:
+            result = self.distilled.analyze_batch([text])[0]
+            logger.info(f"Sentiment analysis result: {result['sentiment']} (confidence: {result['confidence']:.3f})")
+            return result
+
         if not text or not text.strip():
             return {
                 'sentiment': 'neutral',
@@ -62,6 +88,13 @@ class SentimentAnalyzer:
         logger.info(f"Sentiment analysis result: {sentiment} (confidence: {confidence:.3f})")
         return result
     
+    @timed("sentiment_batch_seconds")
+    def analyze_batch(self, texts):
+        """analyze_sentiment for many texts; one vectorized pass with the distilled backend"""
+        if self.distilled:
+            return self.distilled.analyze_batch(texts)
+        return [self.analyze_sentiment(text) for text in texts]
+
     def is_positive(self, text, threshold=0.1):
         """Check if text has positive sentiment above threshold"""
         result = self.analyze_sentiment(text)
@@ -0,0 +1,201 @@
+"""
+Slot Planner
+Builds the day's posting timetable in the configured timezone (the daily
+quota spread over the posting window, optionally weighted by hourly
+engagement) and persists it in the state store, so a scheduler finds the
+next slot with a bisect instead of waking up every hour to decide.
+"""
+
+import bisect
+import logging
+from itertools import accumulate
+from datetime import datetime, timedelta
+
+import pytz
+
+from config.settings import get_bot_config
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+SLOTS_KEY = "post_slots"
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+
+
+def parse_clock(value):
+    """'HH:MM' -> datetime.time"""
+    return datetime.strptime(value, "%H:%M").time()
+
+
+class Timetable:
+    """One local day's slots as sorted epoch seconds, plus how many have been used"""
+
+    def __init__(self, day, timezone, slots, consumed=0):
+        self.day = day
+        self.timezone = timezone
+        self.slots = sorted(slots)
+        self.consumed = consumed
+
+    def next_slot(self, now=None):
+        """First slot after now, or None once the day's slots are over"""
+        index = bisect.bisect_right(self.slots, now if now is not None else clock.time())
+        return self.slots[index] if index < len(self.slots) else None
+
+    def due(self, now=None):
+        """Slots that have passed but not been used"""
+        passed = bisect.bisect_right(self.slots, now if now is not None else clock.time())
+        return max(passed - self.consumed, 0)
+
+    def consume(self, count=1):
+        self.consumed = min(self.consumed + count, len(self.slots))
+
+    def local_times(self):
+        tz = pytz.timezone(self.timezone)
+        return [datetime.fromtimestamp(slot, tz).strftime("%H:%M") for slot in self.slots]
+
+    def to_dict(self):
+        return {"day": self.day, "timezone": self.timezone, "slots": self.slots, "consumed": self.consumed}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["day"], data["timezone"], data["slots"], data.get("consumed", 0))
+
+
+class SlotPlanner:
+    def __init__(self, timezone=DEFAULT_TIMEZONE, window_start="08:00", window_end="22:00", min_gap_minutes=30):
+        """
+        Initialize slot planner
+
+        Args:
+            timezone (str): IANA zone the posting window is in
+            window_start (str): Local 'HH:MM' of the first possible slot
+            window_end (str): Local 'HH:MM' after which nothing is scheduled; at or before
+                window_start, the window runs overnight into the next day
+            min_gap_minutes (int): Minimum spacing between slots, shrunk if the quota needs it
+        """
+        self.timezone = timezone
+        self.tz = pytz.timezone(timezone)
+        self.window_start = parse_clock(window_start)
+        self.window_end = parse_clock(window_end)
+        self.overnight = self.window_end <= self.window_start
+        self.min_gap = min_gap_minutes * 60
+
+    @classmethod
+    def from_config(cls, config=None):
+        """Planner and daily quota from the 'scheduling' and 'posting_limits' config sections"""
+        defaults = get_bot_config()
+        config = config or defaults
+        scheduling = config.get("scheduling", defaults["scheduling"])
+        limits = config.get("posting_limits", defaults["posting_limits"])
+        planner = cls(scheduling.get("default_timezone", DEFAULT_TIMEZONE),
+                      scheduling.get("window_start", "08:00"), scheduling.get("window_end", "22:00"),
+                      scheduling.get("min_gap_minutes", 30))
+        return planner, limits.get("daily_limit", 16)
+
+    def today(self, now=None):
+        return datetime.fromtimestamp(now if now is not None else clock.time(), self.tz).date()
+
+    def window_day(self, now=None):
+        """Local date of the window now is in or before; yesterday's while an overnight window runs"""
+        now = now if now is not None else clock.time()
+        day = self.today(now)
+        if self.overnight and now < self.window(day - timedelta(days=1))[1]:
+            return day - timedelta(days=1)
+        return day
+
+    def window(self, day):
+        """(start, end) epoch seconds of the posting window that opens on a local date"""
+        # localize() picks the right UTC offset for that date, DST included
+        start = self.tz.localize(datetime.combine(day, self.window_start))
+        end_day = day + timedelta(days=1) if self.overnight else day
+        end = self.tz.localize(datetime.combine(end_day, self.window_end))
+        return start.timestamp(), end.timestamp()
+
+    def plan(self, day, quota, weights=None):
+        """
+        Build the timetable for a local date
+
+        Slots sit at evenly spaced quantiles of the window's weight, so with
+        no weights they are spread evenly and with hourly engagement weights
+        busy hours get more of them.
+
+        Args:
+            day (date): Local date
+            quota (int): Number of slots
+            weights (dict): Local hour (0-23, int or str) -> engagement score, optional
+
+        Returns:
+            Timetable
+        """
+        start, end = self.window(day)
+        minutes = max(int((end - start) // 60), 1)
+        quota = max(min(quota, minutes), 0)
+        density = [1.0] * minutes
+        if weights:
+            hourly = {int(hour): max(float(score), 0.0) for hour, score in weights.items()}
+            density = [hourly.get(datetime.fromtimestamp(start + m * 60, self.tz).hour, 0.0)
+                       for m in range(minutes)]
+            if not any(density):
+                density = [1.0] * minutes
+        cumulative = list(accumulate(density))
+        total = cumulative[-1]
+
+        gap = min(self.min_gap, (end - start) / quota) if quota else 0
+        slots = []
+        for i in range(quota):
+            minute = bisect.bisect_left(cumulative, (i + 0.5) / quota * total)
+            slot = start + minute * 60
+            if slots and slot < slots[-1] + gap:
+                slot = slots[-1] + gap
+            slots.append(slot)
+        # Pushing slots apart can run past the window; pull the tail back in
+        for i in range(len(slots) - 1, -1, -1):
+            latest = end - (len(slots) - 1 - i) * gap
+            if slots[i] > latest:
+                slots[i] = latest
+        return Timetable(day.isoformat(), self.timezone, [round(slot) for slot in slots])
+
+    def load(self, store, now=None):
+        """The current window's persisted timetable, or None if it has not been planned yet; never writes"""
+        data = store.load_json(SLOTS_KEY)
+        if data and data.get("day") == self.window_day(now).isoformat() and data.get("timezone") == self.timezone:
+            return Timetable.from_dict(data)
+        return None
+
+    def load_or_plan(self, store, quota, weights=None, now=None):
+        """The current window's persisted timetable, planning and saving a new one on the first call for it"""
+        timetable = self.load(store, now)
+        if timetable is not None:
+            return timetable
+        timetable = self.plan(self.window_day(now), quota, weights)
+        self.save(store, timetable)
+        logger.info(f"Planned {len(timetable.slots)} slots for {timetable.day}: {', '.join(timetable.local_times())}")
+        return timetable
+
+    def save(self, store, timetable):
+        store.save_json(SLOTS_KEY, timetable.to_dict())
+
+    def next_window_start(self, now=None):
+        """Epoch seconds of the next window's start, for sleeping once the current slots are over"""
+        return self.window(self.window_day(now) + timedelta(days=1))[0]
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print a day's posting slots")
+    parser.add_argument("--quota", type=int, help="Slots per day (default: posting_limits.daily_limit)")
+    parser.add_argument("--weights", help="JSON file mapping local hour -> engagement score")
+    parser.add_argument("--day", help="Local date YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    planner, quota = SlotPlanner.from_config()
+    weights = None
+    if args.weights:
+        with open(args.weights, "r", encoding="utf-8") as f:
+            weights = json.load(f)
+    day = datetime.strptime(args.day, "%Y-%m-%d").date() if args.day else planner.window_day()
+    timetable = planner.plan(day, args.quota or quota, weights)
+    print(json.dumps({"day": timetable.day, "timezone": timetable.timezone,
+                      "slots": timetable.local_times()}, indent=2))
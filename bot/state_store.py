@@ -0,0 +1,365 @@
+"""
+State Store
+Pluggable persistence for the scheduled workflow's queue, progress and logs,
+so runs no longer have to commit state back to git.
+
+Backends (STATE_BACKEND):
+    file    JSON and log files in the working directory (the original layout)
+    sqlite  one SQLite database; logs are capped to the newest lines
+    object  object-store layout (base snapshot + small delta objects per key,
+            one log segment per run, kept for a week) on a bucket-like client; LocalObjectStore
+            is a directory stand-in, and any client with get/put/list/delete
+            (e.g. an S3 wrapper) can replace it
+"""
+
+import os
+import copy
+import json
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("file", "sqlite", "object")
+
+
+def make_delta(old, new):
+    """
+    Compact change from old to new, or None if they are equal
+
+    Dicts produce per-key patches; a list whose head was consumed and/or tail
+    extended (the tweet queue) produces drop/append; anything else is replaced.
+    """
+    if old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        delta = {}
+        removed = [key for key in old if key not in new]
+        if removed:
+            delta["del"] = removed
+        for key, value in new.items():
+            if key not in old:
+                delta.setdefault("set", {})[key] = value
+                continue
+            sub = make_delta(old[key], value)
+            if sub is not None:
+                delta.setdefault("patch", {})[key] = sub
+        return delta
+    if isinstance(old, list) and isinstance(new, list):
+        for drop in range(len(old) + 1):
+            kept = len(old) - drop
+            if old[drop:] == new[:kept]:
+                return {"drop": drop, "append": new[kept:]}
+    return {"replace": new}
+
+
+def apply_delta(value, delta):
+    if "replace" in delta:
+        return delta["replace"]
+    if "drop" in delta:
+        return value[delta["drop"]:] + delta["append"]
+    value = dict(value)
+    for key in delta.get("del", []):
+        value.pop(key, None)
+    value.update(delta.get("set", {}))
+    for key, sub in delta.get("patch", {}).items():
+        value[key] = apply_delta(value[key], sub)
+    return value
+
+
+class FileBackend:
+    def __init__(self, root="."):
+        """
+        Initialize file state backend
+
+        Args:
+            root (str): Directory holding <key>.json and <log>.txt files
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def load_json(self, key, default=None):
+        path = self.root / f"{key}.json"
+        if not path.exists():
+            return default
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.warning(f"Corrupted state file {path}")
+            return default
+
+    def save_json(self, key, value):
+        path = self.root / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(value, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    def delete(self, key):
+        (self.root / f"{key}.json").unlink(missing_ok=True)
+
+    def append_log(self, name, line):
+        with (self.root / f"{name}.txt").open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def read_log(self, name, limit=100):
+        path = self.root / f"{name}.txt"
+        if not path.exists():
+            return []
+        with path.open("r", encoding="utf-8") as f:
+            return f.read().splitlines()[-limit:]
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend:
+    def __init__(self, path=".state/bot_state.sqlite3", max_log_lines=5000):
+        """
+        Initialize SQLite state backend
+
+        Args:
+            path (str): Database file
+            max_log_lines (int): Newest entries kept per log
+        """
+        self.path = Path(path)
+        self.max_log_lines = max_log_lines
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                        "updated REAL NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS logs (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                        "line TEXT NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS logs_name ON logs (name, id)")
+        self.db.commit()
+
+    def load_json(self, key, default=None):
+        row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def save_json(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO state (key, value, updated) VALUES (?, ?, ?)",
+                        (key, json.dumps(value, ensure_ascii=False), time.time()))
+        self.db.commit()
+
+    def delete(self, key):
+        self.db.execute("DELETE FROM state WHERE key = ?", (key,))
+        self.db.commit()
+
+    def append_log(self, name, line):
+        self.db.execute("INSERT INTO logs (name, line) VALUES (?, ?)", (name, line))
+        self.db.commit()
+
+    def read_log(self, name, limit=100):
+        rows = self.db.execute("SELECT line FROM logs WHERE name = ? ORDER BY id DESC LIMIT ?",
+                               (name, limit)).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def close(self):
+        # Trim logs once per run rather than on every append
+        for (name,) in self.db.execute("SELECT DISTINCT name FROM logs").fetchall():
+            self.db.execute("DELETE FROM logs WHERE name = ? AND id <= (SELECT id FROM logs WHERE name = ? "
+                            "ORDER BY id DESC LIMIT 1 OFFSET ?)", (name, name, self.max_log_lines))
+        self.db.commit()
+        self.db.close()
+
+
+class LocalObjectStore:
+    """Directory standing in for an object-store bucket"""
+
+    def __init__(self, root=".state/bucket"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key):
+        path = self.root / key
+        return path.read_bytes() if path.exists() else None
+
+    def put(self, key, data):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+    def list(self, prefix):
+        base = self.root / prefix
+        if not base.exists():
+            return []
+        return sorted(str(path.relative_to(self.root)) for path in base.rglob("*")
+                      if path.is_file() and not path.name.endswith(".tmp"))
+
+    def delete(self, key):
+        (self.root / key).unlink(missing_ok=True)
+
+
+class ObjectStoreBackend:
+    def __init__(self, store=None, compact_every=24, run_id=None, log_retention_days=7):
+        """
+        Initialize object-store state backend
+
+        Each key is a base snapshot plus numbered delta objects; a save writes
+        one delta, and every compact_every deltas are folded into a new base,
+        so a run reads and writes a bounded number of small objects. Every load
+        re-reads the base and lists the deltas, so a value another run saved
+        since is picked up: only its new deltas are fetched while the base is
+        the same. Saves are not atomic across runs; two runs saving one key at
+        the same moment race, last writer wins (the posting path serializes on
+        bot/leases.py).
+
+        Args:
+            store: Bucket client with get/put/list/delete; LocalObjectStore if None
+            compact_every (int): Deltas kept before a new base snapshot is written
+            run_id (str): Names this run's log segment; defaults to a timestamp
+            log_retention_days (int): Days of log segments kept; older ones are deleted on close
+        """
+        self.store = store or LocalObjectStore()
+        self.compact_every = compact_every
+        self.log_retention_days = log_retention_days
+        self.run_id = run_id or os.getenv("GITHUB_RUN_ID") or datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        # key -> (value, seq, delta object names), and the base seq that value was built on
+        self._state = {}
+        self._bases = {}
+        self._logs = {}
+
+    def _load(self, key):
+        """(value, seq, delta object names) for key, brought up to date with what other runs saved"""
+        raw = self.store.get(f"state/{key}/base.json")
+        base = json.loads(raw) if raw else {"seq": 0, "value": None}
+        if key in self._state and self._bases.get(key) == base["seq"]:
+            value, seq, _ = self._state[key]
+        else:
+            value, seq = base["value"], base["seq"]
+        deltas = [name for name in self.store.list(f"state/{key}/")
+                  if name.rsplit("/", 1)[-1].startswith("delta-")]
+        for name in deltas:
+            delta_seq = int(name.rsplit("-", 1)[-1].split(".")[0])
+            if delta_seq > seq:
+                raw = self.store.get(name)
+                if raw is None:
+                    # Another run compacted between the list and the get; its new base has this delta
+                    self._state.pop(key, None)
+                    return self._load(key)
+                record = json.loads(raw)
+                value = apply_delta(value, record["delta"]) if record["delta"] is not None else None
+                seq = delta_seq
+        self._bases[key] = base["seq"]
+        self._state[key] = (value, seq, deltas)
+        return self._state[key]
+
+    def load_json(self, key, default=None):
+        value = self._load(key)[0]
+        # Callers mutate what they load (tweets.pop); the cached copy must stay the delta base
+        return default if value is None else copy.deepcopy(value)
+
+    def save_json(self, key, value):
+        old, seq, deltas = self._load(key)
+        value = json.loads(json.dumps(value))
+        if old is not None and len(deltas) < self.compact_every:
+            delta = make_delta(old, value)
+            if delta is None:
+                return
+            seq += 1
+            name = f"state/{key}/delta-{seq:08d}.json"
+            self.store.put(name, json.dumps({"delta": delta}, ensure_ascii=False).encode("utf-8"))
+            self._state[key] = (value, seq, deltas + [name])
+            return
+        self._compact(key, value, seq + 1, deltas)
+
+    def _compact(self, key, value, seq, deltas):
+        self.store.put(f"state/{key}/base.json",
+                       json.dumps({"seq": seq, "value": value}, ensure_ascii=False).encode("utf-8"))
+        for name in deltas:
+            self.store.delete(name)
+        self._bases[key] = seq
+        self._state[key] = (value, seq, [])
+
+    def delete(self, key):
+        _, seq, deltas = self._load(key)
+        self._compact(key, None, seq + 1, deltas)
+
+    def append_log(self, name, line):
+        self._logs.setdefault(name, []).append(line)
+
+    def read_log(self, name, limit=100):
+        lines = []
+        for segment in reversed(self.store.list(f"logs/{name}/")):
+            lines[:0] = self.store.get(segment).decode("utf-8").splitlines()
+            if len(lines) >= limit:
+                break
+        return (lines + self._logs.get(name, []))[-limit:]
+
+    def close(self):
+        """
+        Write this run's buffered log lines as one segment per log, under logs/<name>/<date>/,
+        and delete segments older than the retention, like the SQLite backend's log cap
+        """
+        now = datetime.utcnow()
+        day = now.strftime("%Y-%m-%d")
+        for name, lines in self._logs.items():
+            if lines:
+                self.store.put(f"logs/{name}/{day}/{self.run_id}.txt", ("\n".join(lines) + "\n").encode("utf-8"))
+        self._logs.clear()
+        cutoff = (now - timedelta(days=self.log_retention_days)).strftime("%Y-%m-%d")
+        for segment in self.store.list("logs/"):
+            parts = segment.split("/")
+            # logs/<name>/<date>/<run>.txt; ISO dates compare as strings
+            if len(parts) == 4 and parts[2] < cutoff:
+                self.store.delete(segment)
+
+
+def get_state_backend(backend=None):
+    """
+    Backend selected by STATE_BACKEND (file, sqlite or object)
+
+    STATE_DIR sets the file backend's directory, STATE_DB the SQLite file
+    and STATE_BUCKET_DIR the local object-store root.
+    """
+    backend = (backend or os.getenv("STATE_BACKEND", "file")).lower()
+    if backend == "file":
+        return FileBackend(os.getenv("STATE_DIR", "."))
+    if backend == "sqlite":
+        return SQLiteBackend(os.getenv("STATE_DB", ".state/bot_state.sqlite3"))
+    if backend == "object":
+        return ObjectStoreBackend(LocalObjectStore(os.getenv("STATE_BUCKET_DIR", ".state/bucket")))
+    raise ValueError(f"Unknown state backend: {backend}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or seed the configured state backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="Print a key's current value")
+    show.add_argument("key")
+    seed = sub.add_parser("seed", help="Load a JSON file into a key once; later calls are no-ops")
+    seed.add_argument("key")
+    seed.add_argument("file")
+    args = parser.parse_args()
+
+    state = get_state_backend()
+    try:
+        if args.command == "show":
+            print(json.dumps(state.load_json(args.key), indent=2, ensure_ascii=False))
+        elif state.load_json(f"seeded_{args.key}") or state.load_json(args.key) is not None:
+            # A drained queue is deleted, so "empty" alone would re-seed already posted tweets
+            print(f"{args.key} already seeded; skipping")
+        else:
+            data = None
+            if Path(args.file).exists():
+                with open(args.file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            # An earlier day's queue would be replaced by the generator anyway, and with the state
+            # cache evicted nothing remembers it was posted; only a queue for today is seeded
+            if isinstance(data, dict) and data.get("date", "9999") < datetime.utcnow().strftime("%Y-%m-%d"):
+                print(f"{args.file} is for {data['date']}; not seeding a stale queue")
+            elif data is not None:
+                state.save_json(args.key, data)
+                print(f"Seeded {args.key} from {args.file}")
+            state.save_json(f"seeded_{args.key}", True)
+    finally:
+        state.close()
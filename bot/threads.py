@@ -0,0 +1,236 @@
+"""
+Thread Module
+Splits long posts into a numbered reply chain using X's weighted character
+count and publishes it with resumable progress
+"""
+
+import re
+import json
+import hashlib
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import timer, inc
+
+logger = logging.getLogger(__name__)
+
+MAX_WEIGHTED_LENGTH = 280
+URL_LENGTH = 23
+URL_PATTERN = re.compile(r"https?://\S+")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Code point ranges X counts as one; everything else (emoji, CJK, arrows like →) counts as two
+LIGHT_RANGES = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+
+
+def _char_weight(char):
+    code = ord(char)
+    for low, high in LIGHT_RANGES:
+        if low <= code <= high:
+            return 1
+    return 2
+
+
+def weighted_length(text):
+    """Tweet length as X counts it: weighted code points, URLs fixed at 23"""
+    length = 0
+    last = 0
+    for match in URL_PATTERN.finditer(text):
+        length += sum(_char_weight(c) for c in text[last:match.start()]) + URL_LENGTH
+        last = match.end()
+    return length + sum(_char_weight(c) for c in text[last:])
+
+
+def _split_units(text):
+    """
+    Lines first (keeps → bullets intact), then sentences within each line
+
+    Returns:
+        list: (unit, starts_line) tuples
+    """
+    units = []
+    for line in text.splitlines():
+        sentences = [s for s in SENTENCE_BREAK.split(line.strip()) if s]
+        units.extend((sentence, i == 0) for i, sentence in enumerate(sentences))
+    return units
+
+
+def _split_token(word, limit):
+    """Hard split of one word (a long hash, an unbroken string) that alone exceeds the limit"""
+    chunks, current, length = [], "", 0
+    for char in word:
+        weight = _char_weight(char)
+        if current and length + weight > limit:
+            chunks.append(current)
+            current, length = "", 0
+        current += char
+        length += weight
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_words(unit, limit):
+    """Last resort for a single sentence longer than the limit"""
+    parts, current = [], ""
+    words = [piece for word in unit.split()
+             for piece in ([word] if weighted_length(word) <= limit else _split_token(word, limit))]
+    for word in words:
+        candidate = f"{current} {word}".strip()
+        if current and weighted_length(candidate) > limit:
+            parts.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_thread(text, limit=MAX_WEIGHTED_LENGTH, numbered=True):
+    """
+    Split text into thread parts that each fit within limit
+
+    Args:
+        text (str): Post content of any length
+        limit (int): Weighted length limit per part
+        numbered (bool): Append ' i/n' counters to each part
+
+    Returns:
+        list: Thread parts; a single part if the text already fits
+    """
+    text = text.strip()
+    if weighted_length(text) <= limit:
+        return [text]
+
+    # Room for the ' 99/99' counter
+    budget = limit - 6 if numbered else limit
+    parts, current = [], ""
+    for unit, starts_line in _split_units(text):
+        pieces = [unit] if weighted_length(unit) <= budget else _split_words(unit, budget)
+        for n, piece in enumerate(pieces):
+            joiner = "\n" if starts_line and n == 0 else " "
+            candidate = f"{current}{joiner}{piece}" if current else piece
+            if current and weighted_length(candidate) > budget:
+                parts.append(current)
+                current = piece
+            else:
+                current = candidate
+    if current:
+        parts.append(current)
+
+    if numbered and len(parts) > 1:
+        total = len(parts)
+        parts = [f"{part} {i}/{total}" for i, part in enumerate(parts, start=1)]
+    return parts
+
+
+def thread_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class ThreadProgress:
+    """Posted tweet IDs per thread, saved after every part so a rerun resumes"""
+
+    def __init__(self, progress_file="thread_progress.json", store=None):
+        self.progress_file = Path(progress_file)
+        # A bot.state_store backend replaces the file when given
+        self.store = store
+        self.threads = {}
+        if store is not None:
+            self.threads = store.load_json("thread_progress", {})
+        elif self.progress_file.exists():
+            try:
+                with self.progress_file.open("r", encoding="utf-8") as f:
+                    self.threads = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Ignoring unreadable thread progress: {e}")
+
+    def posted_ids(self, key):
+        return list(self.threads.get(key, []))
+
+    def record(self, key, tweet_id):
+        self.threads.setdefault(key, []).append(str(tweet_id))
+        self._save()
+
+    def finish(self, key):
+        if self.threads.pop(key, None) is not None:
+            self._save()
+
+    def _save(self):
+        if self.store is not None:
+            if self.threads:
+                self.store.save_json("thread_progress", self.threads)
+            else:
+                self.store.delete("thread_progress")
+            return
+        if not self.threads:
+            self.progress_file.unlink(missing_ok=True)
+            return
+        tmp_file = self.progress_file.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            json.dump(self.threads, f, indent=2)
+        tmp_file.replace(self.progress_file)
+
+
+class ThreadPublisher:
+    def __init__(self, post, progress=None, prefetch_workers=2):
+        """
+        Initialize thread publisher
+
+        Args:
+            post: Callable(text, media_ids, in_reply_to_tweet_id) -> tweepy Response
+            progress (ThreadProgress): Resume state; a default file is used if None
+            prefetch_workers (int): Threads preparing media while earlier parts post
+        """
+        self.post = post
+        self.progress = progress or ThreadProgress()
+        self.prefetch_workers = prefetch_workers
+
+    def publish(self, text, media_loaders=None):
+        """
+        Post text as a reply chain, resuming after the last part already posted
+
+        Args:
+            text (str): Full post content
+            media_loaders (dict): Part index -> callable returning media_ids (or None)
+
+        Returns:
+            dict: success, tweet_ids, and error/exception if a part failed
+        """
+        parts = split_thread(text)
+        key = thread_key(text)
+        posted = self.progress.posted_ids(key)
+        if posted:
+            logger.info(f"Resuming thread {key} after {len(posted)}/{len(parts)} parts")
+        media_loaders = media_loaders or {}
+
+        with ThreadPoolExecutor(max_workers=self.prefetch_workers) as executor:
+            # Start media for every remaining part up front so uploads overlap with posting
+            media_futures = {i: executor.submit(loader) for i, loader in media_loaders.items()
+                             if i >= len(posted)}
+            for index in range(len(posted), len(parts)):
+                media_ids = None
+                future = media_futures.get(index)
+                if future:
+                    try:
+                        media_ids = future.result()
+                    except Exception as e:
+                        logger.error(f"Media for thread part {index + 1} failed, posting without it: {e}")
+                reply_to = posted[-1] if posted else None
+                try:
+                    with timer("thread_part_seconds"):
+                        response = self.post(parts[index], media_ids, reply_to)
+                except Exception as e:
+                    inc("thread_failures_total")
+                    logger.error(f"Thread {key} stopped at part {index + 1}/{len(parts)}: {e}")
+                    for pending in media_futures.values():
+                        pending.cancel()
+                    return {'success': False, 'tweet_ids': posted, 'error': str(e), 'exception': e}
+                tweet_id = str(response.data['id'])
+                posted.append(tweet_id)
+                self.progress.record(key, tweet_id)
+
+        self.progress.finish(key)
+        inc("threads_posted_total")
+        return {'success': True, 'tweet_ids': posted}
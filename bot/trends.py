@@ -0,0 +1,183 @@
+"""
+Trend Ingestion Module
+Fetches trend snapshots, caches them with TTL and ETag revalidation, and
+keeps incrementally decayed topic scores for prompt building
+"""
+
+import os
+import json
+import math
+import heapq
+import logging
+import argparse
+from pathlib import Path
+import requests
+
+from utils import clock
+
+logger = logging.getLogger(__name__)
+
+X_TRENDS_URL = "https://api.x.com/2/trends/by/woeid/{woeid}"
+WORLDWIDE_WOEID = 1
+
+
+class XTrendSource:
+    """GET /2/trends/by/woeid/:woeid with conditional requests"""
+
+    def __init__(self, bearer_token, woeid=WORLDWIDE_WOEID, timeout=15):
+        self.bearer_token = bearer_token
+        self.url = X_TRENDS_URL.format(woeid=woeid)
+        self.timeout = timeout
+
+    def fetch(self, etag=None):
+        """
+        Fetch the current trends
+
+        Returns:
+            tuple: (topics or None if not modified, etag)
+        """
+        headers = {"Authorization": f"Bearer {self.bearer_token}"}
+        if etag:
+            headers["If-None-Match"] = etag
+        resp = requests.get(self.url, headers=headers, timeout=self.timeout)
+        if resp.status_code == 304:
+            return None, etag
+        resp.raise_for_status()
+        topics = [
+            {"name": t["trend_name"], "volume": t.get("tweet_count") or 0}
+            for t in resp.json().get("data", [])
+        ]
+        return topics, resp.headers.get("ETag")
+
+
+class TopicScorer:
+    """Exponentially decayed topic scores, updated only for topics in each new snapshot"""
+
+    def __init__(self, half_life_hours=6.0, scores=None):
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        # name -> [score, last_update_epoch]
+        self.scores = scores or {}
+
+    def _decayed(self, name, now):
+        score, updated = self.scores[name]
+        return score * math.exp(-self.decay_rate * (now - updated))
+
+    def update(self, topics, now):
+        """Fold a snapshot in; rank 1 weighs most, volume adds a log bonus"""
+        for rank, topic in enumerate(topics, start=1):
+            name = topic["name"]
+            weight = 1.0 / rank + math.log1p(topic.get("volume") or 0) / 10
+            current = self._decayed(name, now) if name in self.scores else 0.0
+            self.scores[name] = [current + weight, now]
+
+    def top(self, k, now):
+        return heapq.nlargest(k, self.scores, key=lambda name: self._decayed(name, now))
+
+    def prune(self, now, min_score=0.01):
+        """Drop topics that have decayed to nothing"""
+        for name in [n for n in self.scores if self._decayed(n, now) < min_score]:
+            del self.scores[name]
+
+
+class TrendCache:
+    def __init__(self, source, cache_file="trend_snapshot.json", ttl_seconds=3600, half_life_hours=6.0):
+        """
+        Initialize trend cache
+
+        Args:
+            source: Object with fetch(etag) -> (topics or None, etag)
+            cache_file (str): JSON file holding the snapshot, ETag and scores
+            ttl_seconds (int): Age after which the snapshot is revalidated
+            half_life_hours (float): Half-life of topic scores
+        """
+        self.source = source
+        self.cache_file = Path(cache_file)
+        self.ttl_seconds = ttl_seconds
+        self.half_life_hours = half_life_hours
+        self.fetches = 0
+        self._load()
+
+    def _load(self):
+        state = {}
+        if self.cache_file.exists():
+            try:
+                with self.cache_file.open("r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Ignoring unreadable trend cache: {e}")
+        self.topics = state.get("topics", [])
+        self.etag = state.get("etag")
+        self.fetched_at = state.get("fetched_at", 0)
+        self.scorer = TopicScorer(self.half_life_hours, state.get("scores"))
+
+    def _save(self):
+        tmp_file = self.cache_file.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            json.dump({
+                "topics": self.topics,
+                "etag": self.etag,
+                "fetched_at": self.fetched_at,
+                "scores": self.scorer.scores
+            }, f, indent=2, ensure_ascii=False)
+        tmp_file.replace(self.cache_file)
+
+    def is_fresh(self, now=None):
+        now = now or clock.time()
+        return bool(self.topics) and now - self.fetched_at < self.ttl_seconds
+
+    def refresh(self, force=False, now=None):
+        """Revalidate the snapshot if it is stale (or forced); keeps the old one on errors"""
+        now = now or clock.time()
+        if not force and self.is_fresh(now):
+            return self.topics
+        try:
+            self.fetches += 1
+            topics, etag = self.source.fetch(self.etag if self.topics else None)
+        except Exception as e:
+            logger.error(f"Trend fetch failed, using cached snapshot: {e}")
+            return self.topics
+        if topics is not None:
+            self.topics = topics
+            self.scorer.update(topics, now)
+            self.scorer.prune(now)
+            logger.info(f"Fetched trend snapshot with {len(topics)} topics")
+        else:
+            logger.info("Trend snapshot not modified")
+        self.etag = etag
+        self.fetched_at = now
+        self._save()
+        return self.topics
+
+    def top_topics(self, k=5, now=None):
+        now = now or clock.time()
+        self.refresh(now=now)
+        return self.scorer.top(k, now)
+
+
+def format_trend_context(topics):
+    """Prompt fragment listing the current top topics"""
+    if not topics:
+        return ""
+    return "\nCurrently trending topics (use one if it fits naturally): " + ", ".join(topics) + "\n"
+
+
+def get_trend_cache(cache_file="trend_snapshot.json"):
+    """Trend cache backed by the X API, or None without a bearer token"""
+    bearer_token = os.getenv("TWITTER_BEARER_TOKEN")
+    if not bearer_token:
+        return None
+    return TrendCache(XTrendSource(bearer_token), cache_file=cache_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the cached trend snapshot")
+    parser.add_argument("--force", action="store_true", help="Revalidate even if the snapshot is fresh")
+    parser.add_argument("--top", type=int, default=5, help="Number of top topics to print")
+    args = parser.parse_args()
+
+    cache = get_trend_cache()
+    if not cache:
+        print("❌ Missing environment variable: TWITTER_BEARER_TOKEN")
+        exit(1)
+    cache.refresh(force=args.force)
+    print(f"📈 Top topics: {', '.join(cache.top_topics(args.top))}")
@@ -4,32 +4,57 @@ Twitter Bot Module
 Main bot functionality for posting and automation
 """
 
+import time
 import tweepy
 import logging
+import threading
 from datetime import datetime
 from .sentiment_analyzer import SentimentAnalyzer
+from .hashtag_monitor import HashtagMonitor
+from .auto_reply import AutoReplyEngine
+from .events import MentionIntake
+from .screening import ScreeningPolicy
+from .rate_limits import RateLimitManager, RateLimitDeferred, CREATE_TWEET, SEARCH_RECENT
+from .slots import SlotPlanner
+from .engagement import EngagementCollector
+from .state_store import get_state_backend
 from config.settings import get_api_credentials, get_bot_config
+from config.github_settings import get_github_config
+from utils.metrics import timer, inc
 
 logger = logging.getLogger(__name__)
 
 class TwitterBot:
-    def __init__(self):
+    HASHTAG_POLL_INTERVAL = 15 * 60  # one recent-search window
+    # Pause before retrying a slot whose post failed, doubled per failure up to the maximum
+    POST_RETRY_SECONDS = 60
+    MAX_POST_RETRY_SECONDS = 30 * 60
+
+    def __init__(self, config=None, shutdown_event=None, rate_limits=None):
         """Initialize Twitter bot with API credentials and sentiment analyzer"""
         self.sentiment_analyzer = SentimentAnalyzer()
-        self.config = get_bot_config()
+        self.config = config or get_bot_config()
+        self.screening = ScreeningPolicy.from_config(self.config)
+        self.shutdown_event = shutdown_event or threading.Event()
         self.credentials = get_api_credentials()
+        # Throttled endpoints are skipped until their window resets instead of sleeping every thread
+        self.rate_limits = rate_limits or RateLimitManager()
         self.client = self._initialize_twitter_api()
+        self.hashtag_monitor = None
+        self.auto_reply_engine = None
+        self.post_backoff = 0
         
     def _initialize_twitter_api(self):
         """Initialize Twitter API v2 Client"""
         try:
             client = tweepy.Client(
+                bearer_token=self.credentials.get('bearer_token') or None,
                 consumer_key=self.credentials['consumer_key'],
                 consumer_secret=self.credentials['consumer_secret'],
                 access_token=self.credentials['access_token'],
-                access_token_secret=self.credentials['access_token_secret'],
-                wait_on_rate_limit=True
+                access_token_secret=self.credentials['access_token_secret']
             )
+            self.rate_limits.attach(client)
             
             # Test authentication
             me = client.get_me()
@@ -66,8 +91,7 @@ class TwitterBot:
             sentiment_result = self.sentiment_analyzer.analyze_sentiment(content)
             
             # Block negative sentiment posts
-            if (sentiment_result['sentiment'] == 'negative' and 
-                sentiment_result['confidence'] > 0.5):
+            if self.screening.blocks(sentiment_result):
                 return {
                     'success': False,
                     'error': 'Blocked due to negative sentiment',
@@ -75,9 +99,12 @@ class TwitterBot:
                 }
         
         try:
+            self.rate_limits.check(CREATE_TWEET)
             # Post the tweet
-            response = self.client.create_tweet(text=content)
+            with timer("create_tweet_seconds"):
+                response = self.client.create_tweet(text=content)
             tweet_id = response.data['id']
+            inc("tweets_posted_total")
             
             logger.info(f"Tweet posted successfully! ID: {tweet_id}")
             
@@ -89,6 +116,13 @@ class TwitterBot:
                 'timestamp': datetime.now().isoformat()
             }
             
+        except (RateLimitDeferred, tweepy.TooManyRequests) as e:
+            logger.warning(f"Tweet deferred: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'retry_after': self.rate_limits.retry_after(CREATE_TWEET)
+            }
         except Exception as e:
             logger.error(f"Failed to post tweet: {e}")
             return {
@@ -111,3 +145,121 @@ class TwitterBot:
         except Exception as e:
             logger.error(f"Failed to get user info: {e}")
             return None
+
+    def start_hashtag_monitoring(self):
+        """Poll the configured hashtags in a background thread until shutdown"""
+        if not self.client:
+            logger.error("Cannot start hashtag monitoring - Twitter API not initialized")
+            return None
+
+        hashtags = get_github_config()['hashtags']['monitor']
+        self.hashtag_monitor = HashtagMonitor(self.client, hashtags, rate_limits=self.rate_limits)
+
+        def run():
+            while not self.shutdown_event.is_set():
+                if self.rate_limits.available(SEARCH_RECENT):
+                    self.hashtag_monitor.poll()
+                self.shutdown_event.wait(max(self.HASHTAG_POLL_INTERVAL, self.rate_limits.retry_after(SEARCH_RECENT)))
+
+        thread = threading.Thread(target=run, name="hashtag-monitor", daemon=True)
+        thread.start()
+        logger.info(f"Hashtag monitoring started for {len(hashtags)} hashtags")
+        return thread
+
+    def start_auto_replies(self):
+        """Answer keyword mentions in a background thread until shutdown"""
+        if not self.client:
+            logger.error("Cannot start auto replies - Twitter API not initialized")
+            return None
+
+        user_info = self.get_user_info()
+        if not user_info:
+            logger.error("Cannot start auto replies - unknown user")
+            return None
+
+        bot_config = get_github_config()['bot']
+        self.auto_reply_engine = AutoReplyEngine(
+            self.client,
+            self.sentiment_analyzer,
+            bot_config['reply_keywords'],
+            max_daily_replies=bot_config['max_daily_replies'],
+            screening=self.screening
+        )
+
+        # Webhook-pushed mentions when a port is configured, polling with backoff otherwise
+        intake = MentionIntake(self.auto_reply_engine, user_info['id'], self.shutdown_event,
+                               self.config.get('event_intake', get_bot_config()['event_intake']),
+                               self.credentials.get('consumer_secret'), self.rate_limits, persist_state=True)
+        thread = intake.start()
+        logger.info("Auto replies started")
+        return thread
+
+    def _post_next_queued(self, poster):
+        """
+        Post the best queued tweet today's quota allows, the way the hourly job does: claimed
+        from the shared lease queue and sent through the outbox, so a timeout that did post is
+        found on the timeline, and a failed tweet is retried later rather than dropped
+
+        Args:
+            poster (ScheduledPoster): Poster on this bot's client, rate limits and state store
+
+        Returns:
+            float: Seconds before trying the slot again - until the tweet endpoint's window resets,
+                or a growing backoff after a failed attempt - or 0 once the slot is used (posted,
+                or nothing is left to post today)
+        """
+        result = poster.post_batch(1)
+        if result["posted"]:
+            self.post_backoff = 0
+            return 0
+        if result["held"] == "rate_limit":
+            return self.rate_limits.retry_after(CREATE_TWEET)
+        if result["failed"] or result["held"] == "in_flight":
+            # The slot is kept, so a failure does not leave the day's quota short
+            self.post_backoff = min(max(self.post_backoff * 2, self.POST_RETRY_SECONDS), self.MAX_POST_RETRY_SECONDS)
+            logger.warning(f"Scheduled post failed; retrying the slot in {self.post_backoff}s")
+            return self.post_backoff
+        return 0
+
+    def start_scheduled_posting(self):
+        """Post queued tweets at the day's planned slots in a background thread until shutdown"""
+        if not self.client:
+            logger.error("Cannot start scheduled posting - Twitter API not initialized")
+            return None
+
+        planner, quota = SlotPlanner.from_config(self.config)
+
+        def run():
+            # Kept out of module import, like the worker's scripts: the poster needs tenacity
+            from .scheduled_poster import ScheduledPoster
+
+            # Opened in this thread (the SQLite backend's connection is per-thread); posts go out
+            # on the bot's own client, so get_status() sees the quota they use
+            store = get_state_backend()
+            poster = ScheduledPoster(self.client, store, self.rate_limits)
+            try:
+                while not self.shutdown_event.is_set():
+                    weights = EngagementCollector(store).hourly_weights(planner.tz)
+                    timetable = planner.load_or_plan(store, quota, weights or None)
+                    if timetable.due():
+                        retry_after = self._post_next_queued(poster)
+                        if retry_after:
+                            self.shutdown_event.wait(retry_after)
+                            continue
+                        # Slots missed while down collapse into one post rather than a burst
+                        timetable.consume(timetable.due())
+                        planner.save(store, timetable)
+                        continue
+                    # Sleep straight to the next slot (or tomorrow's window) instead of polling
+                    wake_at = timetable.next_slot() or planner.next_window_start()
+                    self.shutdown_event.wait(max(wake_at - time.time(), 1))
+            except Exception:
+                logger.exception("Scheduled posting stopped")
+            finally:
+                self.rate_limits.save()
+                store.close()
+
+        thread = threading.Thread(target=run, name="scheduled-posting", daemon=True)
+        thread.start()
+        logger.info(f"Scheduled posting started: {quota} slots per day in {planner.timezone}")
+        return thread
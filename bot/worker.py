@@ -0,0 +1,179 @@
+"""
+Resident Worker
+Keeps the sentiment analyzer, the tweepy client, the provider router and the
+LLM cache loaded and runs generate/screen/post commands sent over a local
+Unix socket, so post_tweet.py and generate_fallback_tweet.py (thin clients
+via utils.worker_client) answer in milliseconds instead of paying imports
+and lexicon loading on every invocation. Commands run one at a time; what
+a command prints is captured and sent back for the client to print.
+
+Start it with the same environment (API keys, LLM_CACHE_MODE, ...) the
+scripts would get:
+
+    python -m bot.worker serve
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import socketserver
+from contextlib import redirect_stdout
+
+from utils.metrics import inc, timer
+from utils.worker_client import request, socket_path, WorkerError
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = ("ping", "screen", "generate", "post", "stats", "shutdown")
+
+
+class BotWorker:
+    def __init__(self):
+        """Initialize worker: load everything the scripts would load per run"""
+        # Imported here so the repo root (where the scripts live) is on sys.path first
+        from bot.sentiment_analyzer import SentimentAnalyzer
+        from bot.provider_router import ProviderRouter
+        from bot.rate_limits import RateLimitManager
+        from generate_fallback_tweet import open_llm_cache, open_hashtag_index
+        from post_tweet import make_client
+
+        self.sentiment_analyzer = SentimentAnalyzer()
+        self.rate_limits = RateLimitManager()
+        self.client = self.rate_limits.attach(make_client())
+        self.router = ProviderRouter()
+        self.llm_cache = open_llm_cache()
+        self.hashtag_index = open_hashtag_index()
+        self.started = time.time()
+        self.handled = {}
+        self.stopping = False
+
+    def ping(self):
+        return 0, {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1)}
+
+    def screen(self, content=None, texts=None, force=False):
+        """Sentiment for a batch of texts, or the post/no-post decision for one"""
+        if texts is not None:
+            return 0, self.sentiment_analyzer.analyze_batch(texts)
+        from post_tweet import screen
+        allowed, _ = screen(content or "", self.sentiment_analyzer, force)
+        return (0 if allowed else 1), allowed
+
+    def generate(self, prompt):
+        from generate_fallback_tweet import generate_tweet
+        tweet = generate_tweet(prompt, router=self.router, llm_cache=self.llm_cache,
+                               hashtag_index=self.hashtag_index)
+        return (0 if tweet else 1), tweet
+
+    def post(self, content, force=False):
+        from post_tweet import post_content
+        code = post_content(content, force, sentiment_analyzer=self.sentiment_analyzer,
+                            client=self.client, llm_cache=self.llm_cache)
+        self.rate_limits.save()
+        if code == 0 and self.hashtag_index:
+            # Keep the warm index current; the next cold run folds the post in from the log anyway
+            self.hashtag_index.add(content)
+        return code, None
+
+    def stats(self):
+        return 0, {"uptime": round(time.time() - self.started, 1), "handled": self.handled,
+                   "rate_limits": self.rate_limits.report(), "providers": self.router.report()}
+
+    def shutdown(self):
+        self.stopping = True
+        return 0, None
+
+    def run(self, command, args):
+        """
+        Run one command with its printed output captured
+
+        Returns:
+            dict: code, output and result, as utils.worker_client.request returns them
+        """
+        output = io.StringIO()
+        with redirect_stdout(output):
+            if command not in COMMANDS:
+                print(f"❌ Unknown worker command: {command}")
+                code, result = 2, None
+            else:
+                try:
+                    with timer("worker_command_seconds", command=command):
+                        code, result = getattr(self, command)(**args)
+                except Exception as e:
+                    logger.exception(f"Worker command {command} failed")
+                    print(f"❌ {command} failed: {e}")
+                    code, result = 1, None
+        self.handled[command] = self.handled.get(command, 0) + 1
+        inc("worker_commands_total", command=command, code=code)
+        return {"code": code, "output": output.getvalue(), "result": result}
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.readline())
+            reply = self.server.worker.run(message["command"], message.get("args") or {})
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {"code": 2, "output": f"❌ Bad worker request: {e}\n", "result": None}
+        self.wfile.write(json.dumps(reply, default=str).encode("utf-8") + b"\n")
+
+
+def serve(path=None):
+    """Run the worker until a shutdown command, SIGTERM or Ctrl-C"""
+    path = path or socket_path()
+    if os.path.exists(path):
+        if request("ping", timeout=5, path=path) is not None:
+            print(f"⚠️ A worker is already listening on {path}")
+            return 1
+        os.unlink(path)
+
+    worker = BotWorker()
+    # Commands can post as the bot account; only this user may connect. The socket is
+    # created owner-only, so there is no window between bind and chmod
+    umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(path, WorkerHandler)
+    finally:
+        os.umask(umask)
+    server.worker = worker
+    os.chmod(path, 0o600)
+    server.timeout = 1.0
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"✅ Worker {os.getpid()} listening on {path}")
+    try:
+        while not worker.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        worker.rate_limits.save()
+        print(f"⏹️ Worker stopped after {sum(worker.handled.values())} commands")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resident worker for post_tweet.py and generate_fallback_tweet.py")
+    parser.add_argument("command", choices=["serve", "ping", "stats", "stop"])
+    parser.add_argument("--socket", help="Socket path (default: BOT_WORKER_SOCKET or /tmp/twitter-bot-worker.sock)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "serve":
+        sys.exit(serve(args.socket))
+    try:
+        reply = request({"stop": "shutdown"}.get(args.command, args.command), timeout=10, path=args.socket)
+    except WorkerError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if reply is None:
+        print("❌ No worker running")
+        sys.exit(1)
+    print(json.dumps(reply["result"], indent=2) if reply["result"] is not None else "✅ Worker stopping")
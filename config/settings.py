@@ -37,22 +37,47 @@ def get_bot_config() -> Dict[str, Any]:
         'posting_limits': {
             'daily_limit': 16,
             'monthly_limit': 500,
-            'respect_limits': True
+            'respect_limits': True,
+            # Slots of daily_limit held for a class (bot/post_queue.py) until it uses them
+            # or the local release time passes
+            'reservations': {'manual': 2, 'campaign': 2},
+            'reservations_release': '16:00'
         },
+        # The posting gate (bot/screening.py); change it, then re-apply it to the queue with
+        # python -m bot.screening, which works from the scores stored with each queued tweet
         'sentiment_analysis': {
             'enabled': True,
             'block_negative': True,
-            'confidence_threshold': 0.1
+            # |combined score| at which content counts as positive or negative
+            'confidence_threshold': 0.1,
+            # Negative content above this confidence is not posted
+            'block_confidence': 0.5,
+            # Combined score = vader_weight * VADER compound + (1 - vader_weight) * TextBlob polarity
+            'vader_weight': 0.5
         },
         'scheduling': {
             'enabled': True,
             'default_timezone': 'Asia/Kolkata',
-            'daily_post_time': '10:00'
+            # posting_limits.daily_limit slots are planned between these local times (bot/slots.py)
+            'window_start': '08:00',
+            'window_end': '22:00',
+            'min_gap_minutes': 30
         },
         'monitoring': {
             'hashtag_monitoring': True,
             'auto_replies': True,
             'trend_analysis': True
+        },
+        # Mentions pushed to a webhook (bot/events.py); without a port, or if it cannot be bound,
+        # they are polled every poll_interval seconds, backing off to max_poll_interval when quiet
+        'event_intake': {
+            'webhook_port': int(os.getenv('WEBHOOK_PORT')) if os.getenv('WEBHOOK_PORT') else None,
+            'webhook_host': os.getenv('WEBHOOK_HOST', '0.0.0.0'),
+            'queue_size': 1000,
+            'poll_interval': 60,
+            'max_poll_interval': 900,
+            # Poll that catches mentions the webhook missed while it is running
+            'reconcile_interval': 900
         }
     }
 
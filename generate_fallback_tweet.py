@@ -1,39 +1,63 @@
+from utils.profiling import profile_from_argv
+if __name__ == "__main__":
+    profile_from_argv()
+
 import os
-import requests
 import json
 import sys
+from utils.metrics import timer, inc
+from utils.worker_client import run_or_fallback
+
+HASHTAG_INSTRUCTION = ("Include trending hashtags. MAKE SURE TO LEAVE TWO LINE GAPS BEFORE HASHTAGS. THERE SHOULD BE TWO LINE GAP "
+                       "BETWEEN CONTENT AND HASHTAG tweet should be like tweet content ______  leave two line gaps then two hashtags ")
 
-def get_openai_tweet(api_key, prompt):
+def tweet_request(prompt, hashtags=True):
+    """The instruction sent to every provider; hashtags=False when the local hashtag index adds them instead"""
+    return (f"Write a concise, engaging tweet about: {prompt}. Do not repeat the topic/prompt text directly. "
+            f"{HASHTAG_INSTRUCTION if hashtags else 'Do not include hashtags. '}"
+            "less than 280 characters engaging humourous search across internet for latest fact can include nividia "
+            "or other famous companies names in it doesnt necessarily have to use nividia just make it humourous or "
+            "techy dont osund robotic")
+
+def get_openai_tweet(api_key, prompt, hashtags=True):
+    # Imported per call: a thin-client run that hands off to the worker never needs it
+    import requests
     try:
         headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
         data = {
             "model": "gpt-3.5-turbo",
-            "messages": [{"role": "user", "content": f"Write a concise, engaging tweet about: {prompt}.  Do not repeat the topic/prompt text directly.Include trending hashtags.MAKE SURE TO LEAVE TWO LINE GAPS BEFORE HASHTAGS. THERE SHOULD BE TWO LINE GAP BETWEEN CONTENT AND HASHTAG tweet should be like tweet content ______  leave TWO line gaps then two hashtags less than 280- characters engaging humourous search across internet for latest fact can include nividia or other famous companies names in it doesnt necessarily have to use nividia just make it humourous or techy dont osund robotic"}]
+            "messages": [{"role": "user", "content": tweet_request(prompt, hashtags)}]
         }
-        resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data, timeout=15)
+        with timer("llm_request_seconds", provider="openai"):
+            resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data, timeout=15)
         resp.raise_for_status()
         return resp.json()["choices"][0]["message"]["content"].strip()
     except Exception as e:
+        inc("llm_failures_total", provider="openai")
         print(f"OpenAI failed: {e}")
         return None
 
-def get_claude_tweet(api_key, prompt):
+def get_claude_tweet(api_key, prompt, hashtags=True):
+    import requests
     try:
         headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
         data = {
             "model": "claude-3-sonnet-20240229",
             "max_tokens": 150,
-            "messages": [{"role": "user", "content": f"Write a concise, engaging tweet about: {prompt}. Do not repeat the topic/prompt text directly. Include trending hashtags.MAKE SURE TO LEAVE TWO LINE GAPS BEFORE HASHTAGS. THERE SHOULD BE TWO LINE GAP BETWEEN CONTENT AND HASHTAG tweet should be like tweet content ______  leave two line gaps then two hashtags less than 28- characters engaging humourous search across internet for latest fact can include nividia or other famous companies names in it doesnt necessarily have to use nividia just make it humourous or techy dont osund robotic"}]
+            "messages": [{"role": "user", "content": tweet_request(prompt, hashtags)}]
         }
-        resp = requests.post("https://api.anthropic.com/v1/messages", headers=headers, json=data, timeout=15)
+        with timer("llm_request_seconds", provider="claude"):
+            resp = requests.post("https://api.anthropic.com/v1/messages", headers=headers, json=data, timeout=15)
         resp.raise_for_status()
         # Adjust below if Claude's response structure is different
         return resp.json()["choices"][0]["message"]["content"].strip()
     except Exception as e:
+        inc("llm_failures_total", provider="claude")
         print(f"Claude failed: {e}")
         return None
 
-def get_openrouter_tweet(api_key, prompt):
+def get_openrouter_tweet(api_key, prompt, hashtags=True):
+    import requests
     try:
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -43,70 +67,166 @@ def get_openrouter_tweet(api_key, prompt):
         }
         data = {
             "model": "anthropic/claude-3-sonnet:beta",
-            "messages": [{"role": "user", "content": f"Write a concise, engaging tweet about: {prompt}. Do not repeat the topic/prompt text directly. Include trending hashtags.MAKE SURE TO LEAVE TWO LINE GAPS BEFORE HASHTAGS. THERE SHOULD BE TWO LINE GAP BETWEEN CONTENT AND HASHTAG tweet should be like tweet content ______  leave two line gaps then two hashtags less than 28- characters engaging humourous search across internet for latest fact can include nividia or other famous companies names in it doesnt necessarily have to use nividia just make it humourous or techy dont osund robotic"}]
+            "messages": [{"role": "user", "content": tweet_request(prompt, hashtags)}]
         }
-        resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data, timeout=15)
+        with timer("llm_request_seconds", provider="openrouter"):
+            resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data, timeout=15)
         resp.raise_for_status()
         return resp.json()["choices"][0]["message"]["content"].strip()
     except Exception as e:
+        inc("llm_failures_total", provider="openrouter")
         print(f"OpenRouter failed: {e}")
         return None
 
-def get_gemini_tweet(api_key, prompt):
+def get_gemini_tweet(api_key, prompt, model="gemini-1.5-flash-latest", hashtags=True):
+    import requests
     if not api_key:
         print("No Google Gemini API key provided.")
         return None
     endpoint_template = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
-    models = [
-        "gemini-1.5-flash-latest",
-        "gemini-1.5-pro-latest"
-    ]
     headers = {"Content-Type": "application/json"}
     body = {
-        "contents": [{"role": "user", "parts": [{"text": f"Write a concise, engaging tweet about: {prompt}. Do not repeat the topic/prompt text directly. Include trending hashtags. MAKE SURE TO LEAVE TWO LINE GAPS BEFORE HASHTAGS. THERE SHOULD BE TWO LINE GAP BETWEEN CONTENT AND HASHTAGtweet should be like tweet content ______  leave two line gaps then two hashtags less than 28- characters engaging humourous search across internet for latest fact can include nividia or other famous companies names in it doesnt necessarily have to use nividia just make it humourous or techy dont osund robotic"}]}]
+        "contents": [{"role": "user", "parts": [{"text": tweet_request(prompt, hashtags)}]}]
     }
-    for model in models:
-        try:
-            url = endpoint_template.format(model=model, api_key=api_key)
+    try:
+        url = endpoint_template.format(model=model, api_key=api_key)
+        with timer("llm_request_seconds", provider="gemini", model=model):
             resp = requests.post(url, headers=headers, json=body, timeout=15)
-            if resp.status_code == 200:
-                data = resp.json()
-                # Google's Gemini response structure
-                return data["candidates"][0]["content"]["parts"][0]["text"].strip()
-            else:
-                print(f"Gemini {model} failed: {resp.status_code} {resp.text}")
-        except Exception as e:
-            print(f"Gemini {model} exception: {e}")
-    print("All Gemini models failed.")
+        if resp.status_code == 200:
+            data = resp.json()
+            # Google's Gemini response structure
+            return data["candidates"][0]["content"]["parts"][0]["text"].strip()
+        inc("llm_failures_total", provider="gemini", model=model)
+        print(f"Gemini {model} failed: {resp.status_code} {resp.text}")
+    except Exception as e:
+        inc("llm_failures_total", provider="gemini", model=model)
+        print(f"Gemini {model} exception: {e}")
     return None
 
-prompt = os.environ["PROMPT"]
+def with_trend_context(prompt):
+    """Point the model at real current trends instead of asking it to search the internet"""
+    try:
+        from bot.trends import get_trend_cache, format_trend_context
+        trend_cache = get_trend_cache()
+        if trend_cache:
+            prompt += format_trend_context(trend_cache.top_topics(3))
+    except Exception as e:
+        print(f"Trend snapshot unavailable: {e}")
+    return prompt
+
+def configured_providers():
+    """Providers with an API key set, in configured order (the tie-break)"""
+    # (route name, provider, model, API key env var, generator)
+    providers = [
+        ("openai", "openai", "gpt-3.5-turbo", "OPENAI_API_KEY", get_openai_tweet),
+        ("openai-samapi", "openai", "gpt-3.5-turbo", "OPENAI_SAMAPI_KEY", get_openai_tweet),
+        ("claude", "claude", "claude-3-sonnet-20240229", "CLAUDE_API_KEY", get_claude_tweet),
+        ("openrouter", "openrouter", "anthropic/claude-3-sonnet:beta", "OPENROUTER_API_KEY", get_openrouter_tweet),
+        ("gemini-flash", "gemini", "gemini-1.5-flash-latest", "GOOGLE_GEMINI",
+         lambda key, text, hashtags=True: get_gemini_tweet(key, text, "gemini-1.5-flash-latest", hashtags)),
+        ("gemini-pro", "gemini", "gemini-1.5-pro-latest", "GOOGLE_GEMINI",
+         lambda key, text, hashtags=True: get_gemini_tweet(key, text, "gemini-1.5-pro-latest", hashtags)),
+    ]
+    return {p[0]: p for p in providers if os.environ.get(p[3])}
+
+def open_llm_cache():
+    from bot.llm_cache import LLMCache
+    try:
+        return LLMCache.from_env()
+    except Exception as e:
+        print(f"LLM cache unavailable: {e}")
+        return None
+
+def open_hashtag_index():
+    """Hashtag index brought up to date with the logs, or None if disabled in config or unavailable"""
+    from config.github_settings import get_github_config
+    from bot.hashtag_index import HashtagIndex
+    from bot.state_store import get_state_backend
+    if not get_github_config()["hashtags"].get("use_in_posts", True):
+        return None
+    try:
+        store = get_state_backend()
+        try:
+            index = HashtagIndex.load_or_build(store)
+        finally:
+            store.close()
+        return index if index.tags else None
+    except Exception as e:
+        print(f"Hashtag index unavailable: {e}")
+        return None
+
+def generate_tweet(prompt, router=None, llm_cache=None, hashtag_index=None):
+    """
+    Generate one tweet, trying cached candidates first and then providers in router order
+
+    Args:
+        prompt (str): Topic from the workflow input
+        router (ProviderRouter): Kept across calls by the resident worker; loaded from disk if None
+        llm_cache (LLMCache): Kept across calls by the resident worker; opened from the environment if None
+        hashtag_index (HashtagIndex): Kept across calls by the resident worker; loaded from the state store if None
 
-tweet = None
+    Returns:
+        str: Tweet text, or None if every provider failed
+    """
+    from bot.provider_router import ProviderRouter
+    from bot.output_format import parse_posts
+    from config.github_settings import get_github_config
 
-# Try OpenAI (primary)
-tweet = get_openai_tweet(os.environ.get("OPENAI_API_KEY"), prompt) if os.environ.get("OPENAI_API_KEY") else None
+    prompt = with_trend_context(prompt)
+    providers = configured_providers()
+    if llm_cache is None:
+        llm_cache = open_llm_cache()
+    if hashtag_index is None:
+        hashtag_index = open_hashtag_index()
+    max_tags = get_github_config()["hashtags"].get("max_per_tweet", 3)
 
-# Try OpenAI (secondary)
-if not tweet:
-    tweet = get_openai_tweet(os.environ.get("OPENAI_SAMAPI_KEY"), prompt) if os.environ.get("OPENAI_SAMAPI_KEY") else None
+    tweet = None
 
-# Try Claude
-if not tweet:
-    tweet = get_claude_tweet(os.environ.get("CLAUDE_API_KEY"), prompt) if os.environ.get("CLAUDE_API_KEY") else None
+    # The model writes hashtags only without an index, so the two kinds of response are cached apart
+    variant = "index-hashtags" if hashtag_index else None
+
+    # A cached, not yet posted tweet for this prompt costs nothing, so check every provider first
+    if llm_cache:
+        for _, provider, model, _, _ in providers.values():
+            tweet = llm_cache.get(provider, model, prompt, variant=variant)
+            if tweet:
+                print(f"Reusing cached {provider} tweet")
+                return tweet
+
+    # Skip providers whose circuit is open and try the fastest expected success first
+    router = router or ProviderRouter()
+    for name in router.order(list(providers)):
+        _, provider, model, key_env, generate = providers[name]
+        # With a hashtag index the model writes only the content and the index picks the hashtags
+        tweet = router.call(name, generate, os.environ.get(key_env), prompt, hashtag_index is None)
+        if tweet:
+            # Strip labels/quotes and enforce the two-line gap before hashtags before caching
+            posts = parse_posts(tweet, "raw")
+            tweet = posts[0]["text"] if posts else tweet
+            if hashtag_index:
+                tweet = hashtag_index.decorate(tweet, max_tags)
+            if llm_cache:
+                llm_cache.put(provider, model, prompt, tweet, variant=variant)
+            break
+    try:
+        router.save()
+    except OSError as e:
+        print(f"Could not save provider router state: {e}")
+    print(f"Provider health: {json.dumps(router.report())}")
+    return tweet
 
-# Try OpenRouter
-if not tweet:
-    tweet = get_openrouter_tweet(os.environ.get("OPENROUTER_API_KEY"), prompt) if os.environ.get("OPENROUTER_API_KEY") else None
+def main():
+    prompt = os.environ["PROMPT"]
+    # A resident worker (python -m bot.worker serve) has the router and cache open already
+    _, tweet = run_or_fallback("generate", lambda: (0, generate_tweet(prompt)), prompt=prompt)
 
-# Try Gemini
-if not tweet:
-    tweet = get_gemini_tweet(os.environ.get("GOOGLE_GEMINI"), prompt) if os.environ.get("GOOGLE_GEMINI") else None
+    if tweet:
+        print(f"Generated Tweet: {tweet}")
+        with open("generated_tweet.txt", "w") as f:
+            f.write(tweet)
+    else:
+        print("All AI providers failed.")
+        sys.exit(1)
 
-if tweet:
-    print(f"Generated Tweet: {tweet}")
-    with open("generated_tweet.txt", "w") as f:
-        f.write(tweet)
-else:
-    print("All AI providers failed.")
-    sys.exit(1)
+if __name__ == "__main__":
+    main()
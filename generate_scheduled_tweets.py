@@ -1,39 +1,36 @@
+from utils.profiling import profile_from_argv
+if __name__ == "__main__":
+    profile_from_argv()
+
 import os
-import json
-import re
-import time
 import argparse
-from datetime import datetime
-from pathlib import Path
-import nltk
-
-# Ensure required NLTK data
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon')
-
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from utils.metrics import timer, inc
+from utils import clock
+from bot.llm_cache import LLMCache
+from bot.post_queue import priority_of
+from bot.screening import ScreeningPolicy, rescreen, score_missing
+from bot.sentiment_analyzer import SentimentAnalyzer
+from bot.state_store import get_state_backend
+from bot.output_format import select_format, format_instructions, generation_config, parse_posts
 
 # Parse command line arguments
 parser = argparse.ArgumentParser()
 parser.add_argument("--batch-size", type=int, default=5, help="Number of tweets to generate per batch")
 parser.add_argument("--max-tweets", type=int, default=50, help="Maximum number of tweets to generate")
+parser.add_argument("--output-format", choices=["auto", "json", "text"], default=os.getenv("OUTPUT_FORMAT", "auto"),
+                    help="LLM output format; auto uses JSON where the provider supports it")
 args = parser.parse_args()
 
-# Path to store tweets
-output_file = Path("scheduled_tweets.json")
-today = datetime.utcnow().strftime("%Y-%m-%d")
+# The queue lives in the STATE_BACKEND store (scheduled_tweets.json in the working directory by default)
+state = get_state_backend()
+SCHEDULE_KEY = "scheduled_tweets"
+today = clock.utcnow().strftime("%Y-%m-%d")
+existing_data = state.load_json(SCHEDULE_KEY, {})
 
 # Check if we already have enough tweets for today
-if output_file.exists():
-    try:
-        existing = json.load(output_file.open())
-        if existing.get("date") == today and len(existing.get("tweets", [])) >= args.max_tweets:
-            print(f"✅ Already have {len(existing.get('tweets', []))} tweets for today.")
-            exit(0)
-    except json.JSONDecodeError:
-        print("⚠️ Corrupted JSON file. Will overwrite.")
+if existing_data.get("date") == today and len(existing_data.get("tweets", [])) >= args.max_tweets:
+    print(f"✅ Already have {len(existing_data.get('tweets', []))} tweets for today.")
+    exit(0)
 
 # Updated prompt for tech-focused content
 prompt = """
@@ -61,38 +58,38 @@ DeepMind's AlphaEvolve: AI designing better AI
 DeepMind's AlphaEvolve is rewriting algorithms better than humans—even improving decades-old solutions like the Strassen matrix algorithm. 
 WIRED
 Wikipedia
-
-Format your output exactly like this, numbering posts sequentially:
----
-Post 1:
-[Your engaging tech post here]
-
-Post 2:
-[Your engaging tech post here]
-
-Post 3:
-[Your engaging tech post here]
----
 """
 
+# Add current top trends to the prompt; every batch reuses this one snapshot
+try:
+    from bot.trends import get_trend_cache, format_trend_context
+    trend_cache = get_trend_cache()
+    if trend_cache:
+        top_topics = trend_cache.top_topics(5)
+        prompt += format_trend_context(top_topics)
+        print(f"📈 Using trending topics: {', '.join(top_topics)}")
+except Exception as e:
+    print(f"⚠️ Trend snapshot unavailable: {e}")
+
 # Initialize sentiment analyzer
-sia = SentimentIntensityAnalyzer()
+sentiment_analyzer = SentimentAnalyzer()
 all_tweets = []
+kept = []
 seen = set()
 batch_size = args.batch_size
 max_tweets = args.max_tweets
 num_batches = (max_tweets + batch_size - 1) // batch_size
 
 # If we already have some tweets, load them
-if output_file.exists():
-    try:
-        existing_data = json.load(output_file.open())
-        if existing_data.get("date") == today:
-            all_tweets = existing_data.get("tweets", [])
-            seen = set(tweet["text"] for tweet in all_tweets)
-            print(f"📊 Loaded {len(all_tweets)} existing tweets for today.")
-    except json.JSONDecodeError:
-        print("⚠️ Corrupted JSON file. Starting fresh.")
+if existing_data.get("date") == today:
+    all_tweets = existing_data.get("tweets", [])
+    seen = set(tweet["text"] for tweet in all_tweets)
+    print(f"📊 Loaded {len(all_tweets)} existing tweets for today.")
+else:
+    # Yesterday's generated posts are replaced, but queued manual and campaign posts stay
+    kept = [tweet for tweet in existing_data.get("tweets", []) if priority_of(tweet) in ("manual", "campaign")]
+    if kept:
+        print(f"📌 Keeping {len(kept)} queued manual/campaign tweet(s).")
 
 # Validate environment variables
 required_env = ["GOOGLE_GEMINI", "OPENAI_API_KEY"]
@@ -107,6 +104,7 @@ try:
     import google.generativeai as genai
     genai.configure(api_key=os.getenv("GOOGLE_GEMINI"))
     model = genai.GenerativeModel("gemini-1.5-pro-latest")
+    provider_name, model_name = "gemini", "gemini-1.5-pro-latest"
     print("✅ Using Google Gemini API")
 except Exception as e:
     print(f"⚠️ Gemini setup failed: {e}")
@@ -116,6 +114,7 @@ if 'model' not in locals():
     try:
         import openai
         openai.api_key = os.getenv("OPENAI_API_KEY")
+        provider_name, model_name = "openai", "gpt-4"
         if not openai.api_key:
             raise ValueError("Missing OPENAI_API_KEY environment variable")
         print("✅ Using OpenAI API")
@@ -123,23 +122,51 @@ if 'model' not in locals():
         print(f"❌ Both Gemini and OpenAI setup failed: {e}")
         exit(1)
 
+# Output format instructions go last so they are the model's final instruction
+output_format = select_format(provider_name, model_name, args.output_format)
+base_prompt = prompt
+prompt = base_prompt + format_instructions(output_format, batch_size)
+print(f"🧾 Requesting {output_format} output")
+
 # Batch generation
+# Re-runs first drain cached responses that have not been posted yet
+try:
+    llm_cache = LLMCache.from_env()
+except Exception as e:
+    print(f"⚠️ LLM cache unavailable: {e}")
+    llm_cache = None
+
 for batch in range(num_batches):
     if len(all_tweets) >= max_tweets:
         break
         
     print(f"Generating batch {batch + 1}/{num_batches}...")
+    cached_text = llm_cache.get(provider_name, model_name, prompt) if llm_cache else None
     try:
-        if 'model' in locals():
-            response = model.generate_content(prompt)
+        if cached_text:
+            raw_text = cached_text
+            print(f"♻️ Batch {batch + 1} reused a cached response.")
+        elif 'model' in locals():
+            with timer("llm_request_seconds", provider="gemini"):
+                try:
+                    response = model.generate_content(prompt, generation_config=generation_config(output_format))
+                except (TypeError, ValueError) as e:
+                    # Older SDKs reject response_mime_type locally, before any request is made
+                    if output_format != "json":
+                        raise
+                    print(f"⚠️ Gemini JSON mode unavailable ({e}); switching to text output.")
+                    output_format = "text"
+                    prompt = base_prompt + format_instructions(output_format, batch_size)
+                    response = model.generate_content(prompt)
             raw_text = response.text.strip()
             print(f"✅ Gemini batch {batch + 1} successful.")
         else:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=2000
-            )
+            with timer("llm_request_seconds", provider="openai"):
+                response = openai.ChatCompletion.create(
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=2000
+                )
             raw_text = response.choices[0].message.content.strip()
             print(f"✅ OpenAI batch {batch + 1} successful.")
     except Exception as e:
@@ -147,25 +174,30 @@ for batch in range(num_batches):
         continue
 
     # Log raw response for debugging
-    with open("raw_response_log.txt", "a", encoding="utf-8") as f:
-        f.write(f"{datetime.utcnow()}: Batch {batch + 1} response:\n{raw_text}\n\n")
+    state.append_log("raw_response_log", f"{clock.utcnow()}: Batch {batch + 1} response:\n{raw_text}\n")
 
     # Extract tweets
-    pattern = re.compile(r"Post \d+:\s*\n((?:.*\n)*?)(?=\nPost \d+:\s*\n|\Z)", re.DOTALL)
-    matches = pattern.findall(raw_text)
+    posts = parse_posts(raw_text, output_format)
 
-    if not matches:
+    if not posts:
+        inc("batch_parse_failures_total")
         print(f"❌ Failed to parse posts in batch {batch + 1}.")
         continue
 
-    # Filter tweets
-    for post_text in matches:
-        tweet_text = post_text.strip()
-        if (tweet_text and 
-            len(tweet_text) <= 600 and  # Increased character limit
-            len(tweet_text) >= 400 and  # Minimum length
-            tweet_text not in seen):
-            all_tweets.append({"text": tweet_text, "image_suggestion": None})
+    # Filter tweets: 400-600 characters (increased limit)
+    posts = [post for post in posts if post["text"] and 400 <= len(post["text"]) <= 600]
+
+    if llm_cache and not cached_text:
+        # Stored with its usable post count, so it is retired only once every one of them has gone out
+        llm_cache.put(provider_name, model_name, prompt, raw_text, parts=len(posts))
+    elif cached_text:
+        posts = [post for post in posts if not llm_cache.is_posted(post["text"])]
+
+    for post in posts:
+        tweet_text = post["text"]
+        if tweet_text not in seen:
+            all_tweets.append({"text": tweet_text, "image_suggestion": post["image_suggestion"],
+                               "priority": "scheduled", "enqueued": clock.time()})
             seen.add(tweet_text)
             print(f"➕ Added tweet: {tweet_text[:50]}...")
 
@@ -182,21 +214,31 @@ default_tweets = [
     "Apple's on-device AI breakthrough: New model runs complex LLMs on iPhone with 5x efficiency improvement. Privacy-focused AI could be the next battleground. The Verge"
 ]
 
-while len(all_tweets) < max_tweets:
-    fallback = default_tweets[len(all_tweets) % len(default_tweets)]
+# Each fallback is used at most once; looping until max_tweets never ends once they are all seen
+for fallback in default_tweets:
+    if len(all_tweets) >= max_tweets:
+        break
     if fallback not in seen:
-        all_tweets.append({"text": fallback, "image_suggestion": None})
+        all_tweets.append({"text": fallback, "image_suggestion": None, "priority": "fallback", "enqueued": clock.time()})
         seen.add(fallback)
         print(f"➕ Added fallback tweet: {fallback}")
 
+# Keep each tweet's component sentiment scores with it, so a policy change can re-screen
+# the queue from them (python -m bot.screening) instead of analyzing every text again
+queued = kept + all_tweets[:max_tweets]
+analyzed = score_missing(queued, sentiment_analyzer)
+screened = rescreen(queued, ScreeningPolicy.from_config())
+print(f"🧪 Scored {analyzed} tweet(s); {screened['blocked']} held back by the sentiment policy.")
+
 # Save to JSON
 try:
-    with output_file.open("w", encoding="utf-8") as f:
-        json.dump({
-            "date": today,
-            "tweets": all_tweets[:max_tweets]
-        }, f, indent=2, ensure_ascii=False)
-    print(f"✅ Saved {len(all_tweets[:max_tweets])} tweets to '{output_file.name}'.")
+    state.save_json(SCHEDULE_KEY, {
+        "date": today,
+        "tweets": queued
+    })
+    print(f"✅ Saved {len(all_tweets[:max_tweets])} tweets to '{SCHEDULE_KEY}'.")
 except Exception as e:
     print(f"❌ Failed to save tweets: {e}")
     exit(1)
+finally:
+    state.close()
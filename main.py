@@ -4,6 +4,10 @@ Twitter Automation Bot - Main Entry Point
 A comprehensive Twitter bot with scheduled posting, auto-replies, hashtag monitoring, and sentiment analysis.
 """
 
+from utils.profiling import profile_from_argv
+if __name__ == "__main__":
+    profile_from_argv()
+
 import os
 import sys
 import time
@@ -13,6 +17,7 @@ from threading import Thread, Event
 from bot.twitter_bot import TwitterBot
 from utils.logger import setup_logger
 from config.settings import load_config
+from utils.metrics import start_http_server
 
 # Global event for graceful shutdown
 shutdown_event = Event()
@@ -32,6 +37,8 @@ def main():
                        default='full', help='Bot operation mode')
     parser.add_argument('--verbose', '-v', action='store_true', 
                        help='Enable verbose logging')
+    parser.add_argument('--metrics-port', type=int, 
+                       help='Serve Prometheus metrics on this port')
     
     args = parser.parse_args()
     
@@ -46,6 +53,9 @@ def main():
             logger.error("Failed to load configuration. Exiting.")
             sys.exit(1)
         
+        if args.metrics_port:
+            start_http_server(args.metrics_port)
+        
         # Initialize the Twitter bot
         bot = TwitterBot(config, shutdown_event)
         
@@ -1,39 +1,124 @@
+from utils.profiling import profile_from_argv
+if __name__ == '__main__':
+    profile_from_argv()
+
 import os
-import tweepy
-from bot.sentiment_analyzer import SentimentAnalyzer
-from config.settings import get_api_credentials
+from utils.worker_client import run_or_fallback
 
-def main():
-    content = os.getenv('TWEET_CONTENT', '')
-    force = os.getenv('FORCE_POST', 'false').lower() == 'true'
+def make_client():
+    import tweepy
+    from config.settings import get_api_credentials
 
-    sentiment_analyzer = SentimentAnalyzer()
     credentials = get_api_credentials()
-    client = tweepy.Client(
+    return tweepy.Client(
         consumer_key=credentials['consumer_key'],
         consumer_secret=credentials['consumer_secret'],
         access_token=credentials['access_token'],
         access_token_secret=credentials['access_token_secret']
     )
 
+def mark_posted(content, llm_cache=None):
+    """Stop the LLM cache from offering this tweet to later runs"""
+    from bot.llm_cache import LLMCache
+    try:
+        llm_cache = llm_cache or LLMCache.from_env()
+        if llm_cache:
+            llm_cache.mark_posted(content)
+    except Exception as e:
+        print(f'LLM cache update failed: {e}')
+
+def screen(content, sentiment_analyzer, force=False):
+    """Print the sentiment and return whether the content may be posted, and the analysis result"""
+    from bot.screening import ScreeningPolicy
+
     sentiment_result = sentiment_analyzer.analyze_sentiment(content)
     print(f'Content: {content}')
     print(f"Sentiment: {sentiment_result['sentiment']} (confidence: {sentiment_result['confidence']:.3f})")
+    return force or not ScreeningPolicy.from_config().blocks(sentiment_result), sentiment_result
+
+def post_content(content, force=False, sentiment_analyzer=None, client=None, llm_cache=None):
+    """
+    Screen content and post it as a tweet, or as a thread if it is too long; once the day's
+    quota for manual posts is used up it is queued (manual class, first in line) instead
+
+    Args:
+        content (str): Tweet text
+        force (bool): Post even if the sentiment is negative
+        sentiment_analyzer, client, llm_cache: Kept warm by the resident worker; built here if None
+
+    Returns:
+        int: Exit code (0 posted or queued)
+    """
+    from bot.sentiment_analyzer import SentimentAnalyzer
+    from bot.post_queue import QuotaBook, enqueue
+    from bot.screening import raw_scores
+    from bot.state_store import get_state_backend
+
+    sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
 
-    should_post = force or sentiment_result['sentiment'] != 'negative' or sentiment_result['confidence'] < 0.5
+    should_post, sentiment_result = screen(content, sentiment_analyzer, force)
+    if not should_post:
+        print('Tweet not posted due to negative sentiment. Use force_post=true to override.')
+        return 1
+
+    # Manual posts share the scheduled workflow's daily quota (STATE_BACKEND store)
+    state = get_state_backend()
+    try:
+        quota = QuotaBook.from_config(state)
+        if quota.remaining('manual') <= 0:
+            # Stored scores let a policy change re-screen it; a forced post has none, so it always passes
+            queued = {'text': content, 'image_suggestion': None}
+            if not force:
+                queued['sentiment_scores'] = raw_scores(sentiment_result)
+            enqueue(state, queued, 'manual')
+            print(f"Daily quota used up ({quota.report()['used']}); queued as a manual post for the next slot.")
+            return 0
+        code = publish(content, client or make_client(), state, llm_cache)
+        if code == 0:
+            quota.record('manual')
+            quota.save(state)
+        return code
+    finally:
+        state.close()
+
+def publish(content, client, state, llm_cache=None):
+    """Post screened content as a tweet or thread; returns an exit code"""
+    from bot.threads import ThreadPublisher, ThreadProgress, weighted_length, MAX_WEIGHTED_LENGTH
 
-    if should_post:
+    if weighted_length(content) > MAX_WEIGHTED_LENGTH:
+        # Thread progress lives in the STATE_BACKEND store, as for scheduled posts, so a rerun on
+        # another runner resumes the thread instead of posting its first parts again
+        publisher = ThreadPublisher(
+            lambda text, media_ids, reply_to: client.create_tweet(text=text, in_reply_to_tweet_id=reply_to),
+            progress=ThreadProgress(store=state)
+        )
+        result = publisher.publish(content)
+        if not result['success']:
+            print(f"Thread stopped after {len(result['tweet_ids'])} part(s): {result['error']}")
+            return 1
+        mark_posted(content, llm_cache)
+        print(f"Thread posted successfully! IDs: {', '.join(result['tweet_ids'])}")
+        print(f"URL: https://twitter.com/i/web/status/{result['tweet_ids'][0]}")
+    else:
         try:
             response = client.create_tweet(text=content)
             tweet_id = response.data['id']
+            mark_posted(content, llm_cache)
             print(f'Tweet posted successfully! ID: {tweet_id}')
             print(f'URL: https://twitter.com/i/web/status/{tweet_id}')
         except Exception as e:
             print(f'Failed to post: {e}')
-            exit(1)
-    else:
-        print('Tweet not posted due to negative sentiment. Use force_post=true to override.')
-        exit(1)
+            return 1
+    return 0
+
+def main():
+    content = os.getenv('TWEET_CONTENT', '')
+    force = os.getenv('FORCE_POST', 'false').lower() == 'true'
+
+    # A resident worker (python -m bot.worker serve) has the analyzer and client loaded already
+    code, _ = run_or_fallback('post', lambda: (post_content(content, force), None), content=content, force=force)
+    if code:
+        exit(code)
 
 if __name__ == '__main__':
     main()
@@ -4,25 +4,40 @@ Production Twitter Bot V2 - Optimized for Twitter API v2
 Multi-layered sentiment analysis with intelligent posting
 """
 
+from utils.profiling import profile_from_argv
+if __name__ == "__main__":
+    profile_from_argv()
+
 import os
-import time
 import json
+from dataclasses import replace
+
 import tweepy
-from datetime import datetime, timedelta
 from bot.sentiment_analyzer import SentimentAnalyzer
 from bot.analytics import AnalyticsTracker
+from bot.rate_limits import RateLimitManager, RateLimitDeferred, CREATE_TWEET
+from bot.screening import ScreeningPolicy, raw_scores
+from bot.post_queue import enqueue
+from bot.state_store import get_state_backend
 from config.settings import load_config, get_api_credentials
 from utils.logger import get_logger
+from utils.metrics import timer, inc
+from utils import clock
 
 class ProductionBotV2:
     def __init__(self):
         self.logger = get_logger("production_bot_v2")
         self.config = load_config()
         self.sentiment_analyzer = SentimentAnalyzer()
+        self.screening = ScreeningPolicy.from_config(self.config)
+        # Batches from schedule_and_post_content skip every negative item, not only confident ones
+        self.batch_screening = replace(self.screening, block_confidence=0.0)
         self.analytics = AnalyticsTracker()
+        self.rate_limits = RateLimitManager()
         self.client = self._initialize_twitter_api_v2()
         self.monthly_limit = 500
         self.daily_limit = 16  # Conservative: 500/31 days
+        self.post_interval_seconds = 30
         
     def _initialize_twitter_api_v2(self):
         """Initialize Twitter API v2 Client"""
@@ -35,6 +50,7 @@ class ProductionBotV2:
                 access_token=credentials['access_token'],
                 access_token_secret=credentials['access_token_secret']
             )
+            self.rate_limits.attach(client)
             
             # Test authentication
             me = client.get_me()
@@ -47,7 +63,7 @@ class ProductionBotV2:
     
     def _check_posting_limits(self):
         """Check if we can post within daily/monthly limits"""
-        today = datetime.now().date()
+        today = clock.now().date()
         daily_stats = self.analytics.get_daily_stats(today.isoformat())
         
         daily_tweets = daily_stats.get('tweets_posted', 0)
@@ -71,15 +87,17 @@ class ProductionBotV2:
         # Analyze sentiment first
         sentiment_result = self.sentiment_analyzer.analyze_sentiment(content)
         
-        # Only post if sentiment is positive or high-confidence neutral
-        if sentiment_result['sentiment'] == 'negative' and sentiment_result['confidence'] > 0.5:
+        if self.screening.blocks(sentiment_result):
             self.logger.info(f"Skipping negative sentiment tweet")
             return False
         
         try:
+            self.rate_limits.check(CREATE_TWEET)
             # Post with API v2
-            response = self.client.create_tweet(text=content)
+            with timer("create_tweet_seconds"):
+                response = self.client.create_tweet(text=content)
             tweet_id = response.data['id']
+            inc("tweets_posted_total")
             
             # Record analytics
             self.analytics.record_tweet(
@@ -97,8 +115,8 @@ class ProductionBotV2:
             
             return True
             
-        except tweepy.TooManyRequests:
-            self.logger.error("Rate limit exceeded")
+        except (RateLimitDeferred, tweepy.TooManyRequests) as e:
+            self.logger.warning(f"Rate limited, deferring tweet: {e}")
             return False
         except Exception as e:
             self.logger.error(f"Failed to post tweet: {e}")
@@ -110,6 +128,7 @@ class ProductionBotV2:
         print("=" * 50)
         
         posted_count = 0
+        deferred = []
         for i, content in enumerate(content_list):
             print(f"\nProcessing content {i+1}/{len(content_list)}:")
             print(f"Content: {content[:80]}{'...' if len(content) > 80 else ''}")
@@ -119,28 +138,68 @@ class ProductionBotV2:
             print(f"Sentiment: {sentiment_result['sentiment']} (confidence: {sentiment_result['confidence']:.3f})")
             
             # Decide whether to post
-            should_post = (
-                sentiment_result['sentiment'] == 'positive' or 
-                (sentiment_result['sentiment'] == 'neutral' and sentiment_result['confidence'] < 0.3)
-            )
+            should_post = not self.batch_screening.blocks(sentiment_result)
             
             if should_post and self._check_posting_limits():
+                if not self.rate_limits.available(CREATE_TWEET):
+                    # Keep screening the rest while the window is spent
+                    deferred.append((content, sentiment_result))
+                    print(f"Deferred: tweet rate limit resets in {self.rate_limits.retry_after(CREATE_TWEET):.0f}s")
+                    continue
                 print("Posting now...")
                 success = self.post_intelligent_tweet(content)
                 if success:
                     posted_count += 1
                     # Wait between posts to avoid rate limits
                     if i < len(content_list) - 1:
-                        print("Waiting 30 seconds before next post...")
-                        time.sleep(30)
+                        print(f"Waiting {self.post_interval_seconds} seconds before next post...")
+                        clock.sleep(self.post_interval_seconds)
+                elif not self.rate_limits.available(CREATE_TWEET):
+                    deferred.append((content, sentiment_result))
+                    print("Deferred: rate limited")
                 else:
                     print("Failed to post")
             else:
-                reason = "negative sentiment" if sentiment_result['sentiment'] == 'negative' else "daily limit reached"
+                reason = "negative sentiment" if not should_post else "daily limit reached"
                 print(f"Skipped: {reason}")
         
+        posted_count += self._post_deferred(deferred)
         print(f"\nPosting summary: {posted_count}/{len(content_list)} tweets posted")
+        self.rate_limits.save()
         return posted_count
+
+    def _post_deferred(self, deferred):
+        """
+        Post content held back by a spent rate-limit window if it has reset by now; queue the
+        rest (manual class, with its scores) for the scheduled workflow's next slot rather than wait
+
+        Args:
+            deferred (list): (content, sentiment result) pairs, in order
+
+        Returns:
+            int: Tweets posted now
+        """
+        posted = 0
+        while deferred and self.rate_limits.available(CREATE_TWEET) and self._check_posting_limits():
+            content, _ = deferred[0]
+            if self.post_intelligent_tweet(content):
+                posted += 1
+            elif self.rate_limits.available(CREATE_TWEET):
+                print("Failed to post deferred tweet")
+            else:
+                break
+            deferred = deferred[1:]
+        if deferred:
+            state = get_state_backend()
+            try:
+                for content, sentiment_result in deferred:
+                    enqueue(state, {"text": content, "image_suggestion": None,
+                                    "sentiment_scores": raw_scores(sentiment_result)}, "manual")
+            finally:
+                state.close()
+            print(f"{len(deferred)} deferred tweet(s) queued for the next scheduled slot "
+                  f"(rate limit resets in {self.rate_limits.retry_after(CREATE_TWEET):.0f}s)")
+        return posted
     
     def demonstrate_capabilities(self):
         """Demonstrate bot capabilities with real posting"""
@@ -152,7 +211,7 @@ class ProductionBotV2:
             return
             
         # Show current limits
-        today = datetime.now().date()
+        today = clock.now().date()
         daily_stats = self.analytics.get_daily_stats(today.isoformat())
         daily_tweets = daily_stats.get('tweets_posted', 0)
         remaining = max(0, self.daily_limit - daily_tweets)
@@ -161,7 +220,7 @@ class ProductionBotV2:
         
         # Sample content optimized for positive sentiment
         demo_content = [
-            f"Excited to share my Python Twitter automation bot! Multi-layered sentiment analysis with VADER and TextBlob working perfectly! #{datetime.now().strftime('%m%d')} #Python #AI #automation",
+            f"Excited to share my Python Twitter automation bot! Multi-layered sentiment analysis with VADER and TextBlob working perfectly! #{clock.now().strftime('%m%d')} #Python #AI #automation",
             f"Amazing results from my intelligent Twitter bot! The sentiment analysis ensures only positive content gets posted. Love this project! #TwitterBot #Python",
             f"Building the future of social media automation! My bot analyzes sentiment before posting - smart, efficient, and effective! #innovation #tech"
         ]
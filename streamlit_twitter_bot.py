@@ -15,6 +15,9 @@ import json
 import pytz
 from bot.sentiment_analyzer import SentimentAnalyzer
 from bot.analytics import AnalyticsTracker
+from bot.trends import get_trend_cache
+from bot.slots import SlotPlanner
+from bot.state_store import get_state_backend
 from config.settings import get_api_credentials
 from config.github_settings import get_github_config  # Import the GitHub config function
 from utils.logger import get_logger
@@ -87,6 +90,19 @@ def main():
                     else:
                         st.error(message)
 
+    elif page == "Trend-Based Content":
+        st.header("Trend-Based Content")
+
+        trend_cache = get_trend_cache()
+        if not trend_cache:
+            st.warning("Set TWITTER_BEARER_TOKEN to load trending topics")
+        else:
+            top_topics = trend_cache.top_topics(10)
+            fetched = datetime.fromtimestamp(trend_cache.fetched_at, tz=timezone.utc)
+            st.info(f"Snapshot fetched {fetched.strftime('%Y-%m-%d %H:%M UTC')}")
+            for rank, topic in enumerate(top_topics, start=1):
+                st.write(f"{rank}. {topic}")
+
     elif page == "Bot Status":
         st.header("Bot Status")
         
@@ -107,7 +123,21 @@ def main():
         
         # Scheduler Status
         st.success("Scheduler: Running")
-        st.info("Daily posts scheduled at 10:00 AM IST")
+        # Read-only: the posting runs plan (and engagement-weight) the day's timetable
+        planner, _ = SlotPlanner.from_config()
+        store = get_state_backend()
+        try:
+            timetable = planner.load(store)
+        finally:
+            store.close()
+        next_slot = timetable.next_slot() if timetable else None
+        if timetable is None:
+            st.info("Today's post slots are not planned yet; the first scheduled run plans them")
+        elif next_slot:
+            st.info(f"Next post slot: {datetime.fromtimestamp(next_slot, planner.tz).strftime('%H:%M %Z')} "
+                    f"({len(timetable.slots)} slots today: {', '.join(timetable.local_times())})")
+        else:
+            st.info(f"Today's {len(timetable.slots)} post slots are done")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,10 @@
+"""
+Shared pytest setup: the repo root on sys.path, so the tests import bot/,
+utils/ and benchmarks/ (the offline fakes and recorded fixtures) the way
+the benchmarks do
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
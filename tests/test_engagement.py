@@ -0,0 +1,152 @@
+"""EngagementCollector poll schedule and sample storage, replaying the recorded metrics fixture"""
+
+from bot.engagement import EngagementCollector, EngagementSeries, METRICS
+from bot.state_store import FileBackend
+from benchmarks.fake_clients import FakeMetricsClient
+from utils.clock import SimulatedClock, use_clock
+
+POSTED = 1_700_000_000
+
+
+def make_collector(tmp_path, client, tweet_ids, posted=POSTED):
+    collector = EngagementCollector(FileBackend(str(tmp_path)))
+    for tweet_id in tweet_ids:
+        client.register(tweet_id, posted)
+        collector.track(tweet_id, posted, now=posted)
+    return collector
+
+
+def poll_at(collector, client, now):
+    client.now = now
+    return collector.poll(client, now=now)
+
+
+def test_first_sample_waits_one_interval(tmp_path):
+    client = FakeMetricsClient.from_fixture()
+    collector = make_collector(tmp_path, client, ["1"])
+
+    assert poll_at(collector, client, POSTED + 899) == {"due": 0, "requests": 0, "samples": 0, "retired": 0}
+    assert client.calls == []
+    assert poll_at(collector, client, POSTED + 900)["requests"] == 1
+    assert collector.due["1"] == POSTED + 1800
+
+
+def test_poll_interval_thins_out_with_age_then_retires(tmp_path):
+    client = FakeMetricsClient.from_fixture()
+    collector = make_collector(tmp_path, client, ["1"])
+
+    polled = []
+    for now in range(POSTED, POSTED + 8 * 86400 + 1, 900):
+        if poll_at(collector, client, now)["due"]:
+            polled.append(now)
+
+    gaps = [b - a for a, b in zip(polled, polled[1:])]
+    # Every 15 minutes for 6 hours, every 2 hours to 48 hours, daily to a week
+    assert polled[0] == POSTED + 900
+    assert gaps == [900] * 23 + [7200] * 21 + [86400] * 5
+    assert polled[-1] == POSTED + 7 * 86400
+    assert "1" not in collector.due
+    assert "1" in collector.series
+
+
+def test_due_tweets_are_fetched_100_ids_per_request(tmp_path):
+    client = FakeMetricsClient.from_fixture()
+    collector = make_collector(tmp_path, client, [str(i) for i in range(250)])
+
+    stats = poll_at(collector, client, POSTED + 900)
+
+    assert stats["due"] == 250
+    assert stats["requests"] == 3
+    assert [len(ids) for ids in client.calls] == [100, 100, 50]
+    assert len({tweet_id for ids in client.calls for tweet_id in ids}) == 250
+
+
+def test_only_tweets_that_are_due_are_fetched(tmp_path):
+    client = FakeMetricsClient.from_fixture()
+    collector = make_collector(tmp_path, client, ["1", "2"])
+    # A day old: on the 2-hour tier, first due one 15-minute interval after posting
+    client.register("3", POSTED - 86400)
+    collector.track("3", POSTED - 86400, now=POSTED)
+    poll_at(collector, client, POSTED)
+    client.calls.clear()
+
+    poll_at(collector, client, POSTED + 900)
+    poll_at(collector, client, POSTED + 1800)
+
+    assert [sorted(ids) for ids in client.calls] == [["1", "2"], ["1", "2"]]
+    assert collector.due["3"] == POSTED + 7200
+
+
+def test_samples_are_stored_only_when_a_metric_changes(tmp_path):
+    client = FakeMetricsClient.from_fixture()
+    collector = make_collector(tmp_path, client, ["0"])
+    snapshots = client.recorded[0]["snapshots"]
+
+    # Recorded snapshots at 0.25, 0.5, 1 and 2 hours; the 0.75-hour poll sees the 0.5-hour values
+    samples = [poll_at(collector, client, POSTED + minutes * 60)["samples"] for minutes in (15, 30, 45, 60)]
+
+    series = collector.series["0"]
+    assert samples == [1, 1, 0, 1]
+    assert list(series.times) == [POSTED + 900, POSTED + 1800, POSTED + 3600]
+    assert series.latest() == tuple(snapshots[2]["public_metrics"][name] for name in METRICS)
+    assert len(series.values) == 3 * len(METRICS)
+
+
+def test_series_and_schedule_survive_save_and_load(tmp_path):
+    client = FakeMetricsClient.from_fixture()
+    collector = make_collector(tmp_path, client, ["0", "5"])
+    for minutes in (15, 30, 60):
+        poll_at(collector, client, POSTED + minutes * 60)
+    collector.save()
+
+    restored = EngagementCollector(FileBackend(str(tmp_path)))
+
+    assert restored.due == collector.due
+    for tweet_id, series in collector.series.items():
+        assert list(restored.series[tweet_id].times) == list(series.times)
+        assert list(restored.series[tweet_id].values) == list(series.values)
+    # The restored heap picks up where the saved schedule left off
+    client.calls.clear()
+    poll_at(restored, client, POSTED + 4500)
+    assert sorted(client.calls[0]) == ["0", "5"]
+
+
+def test_series_round_trip_packs_offsets_from_posting():
+    series = EngagementSeries(POSTED)
+    series.append(POSTED + 900, {"like_count": 3, "impression_count": 40})
+    series.append(POSTED + 1800, {"like_count": 3, "impression_count": 40})
+    series.append(POSTED + 3600, {"like_count": 5, "retweet_count": 1, "impression_count": 90})
+
+    restored = EngagementSeries.from_dict(series.to_dict())
+
+    assert len(series) == 2
+    assert list(restored.times) == [POSTED + 900, POSTED + 3600]
+    assert restored.latest() == (5, 1, 0, 0, 90)
+
+
+def test_deleted_tweets_are_retired(tmp_path):
+    client = FakeMetricsClient.from_fixture()
+    collector = make_collector(tmp_path, client, ["1"])
+    collector.track("404", POSTED, now=POSTED)
+
+    stats = poll_at(collector, client, POSTED + 900)
+
+    assert stats["retired"] == 1
+    assert "404" not in collector.due
+    assert "1" in collector.due
+
+
+def test_sync_outbox_tracks_posted_items_by_first_tweet(tmp_path):
+    store = FileBackend(str(tmp_path))
+    store.save_json("outbox", {"items": {
+        "a": {"state": "posted", "tweet_ids": ["11", "12"], "updated": POSTED},
+        "b": {"state": "queued", "tweet_ids": [], "updated": POSTED},
+        "c": {"state": "posted", "tweet_ids": ["13"], "updated": POSTED},
+    }})
+    collector = EngagementCollector(store)
+
+    with use_clock(SimulatedClock(POSTED + 60)):
+        assert collector.sync_outbox() == 2
+        assert collector.sync_outbox() == 0
+    assert sorted(collector.series) == ["11", "13"]
+    assert collector.due["11"] == POSTED + 900
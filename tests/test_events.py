@@ -0,0 +1,108 @@
+"""Webhook intake (bot/events.py) driven by the local event emitter: CRC, signature checks, dedup"""
+
+import json
+import queue
+import time
+from collections import Counter
+
+import pytest
+import requests
+
+from benchmarks.fake_clients import FakeTwitterClient
+from bot.auto_reply import AutoReplyEngine
+from bot.events import (MAX_BODY_BYTES, SIGNATURE_HEADER, WEBHOOK_PATH, MentionIntake, WebhookReceiver,
+                        crc_response, emit, sign, tweet_create_event)
+from bot.sentiment_analyzer import SentimentAnalyzer
+
+SECRET = "test-consumer-secret"
+USER_ID = "1"
+KEYWORDS = ["AI", "automation", "python", "bot"]
+
+
+@pytest.fixture
+def receiver():
+    receiver = WebhookReceiver(queue.Queue(maxsize=10), SECRET).start()
+    receiver.url = f"http://127.0.0.1:{receiver.port}{WEBHOOK_PATH}"
+    yield receiver
+    receiver.stop()
+
+
+def queued(receiver):
+    mentions = []
+    while not receiver.events.empty():
+        mentions.append(receiver.events.get_nowait()[0])
+    return mentions
+
+
+def test_crc_challenge_is_answered_with_the_signed_token(receiver):
+    answer = requests.get(receiver.url, params={"crc_token": "abc"}, timeout=5)
+
+    assert answer.status_code == 200
+    assert answer.json() == crc_response("abc", SECRET)
+    assert requests.get(receiver.url, timeout=5).status_code == 404
+
+
+def test_signed_mention_is_queued(receiver):
+    assert emit(receiver.url, tweet_create_event(USER_ID, 3, "hi AI"), SECRET) == 200
+
+    mentions = queued(receiver)
+    assert [(m.id, m.text, m.author_id) for m in mentions] == [("3", "@bot hi AI", "2")]
+
+
+def test_unsigned_forged_and_tampered_posts_are_rejected(receiver):
+    event = tweet_create_event(USER_ID, 1, "hi AI")
+    body = json.dumps(event).encode("utf-8")
+    tampered = body.replace(b"hi AI", b"hi ML")
+
+    assert requests.post(receiver.url, data=body, timeout=5).status_code == 403
+    assert emit(receiver.url, event, "wrong-secret") == 403
+    assert requests.post(receiver.url, data=tampered, timeout=5,
+                         headers={SIGNATURE_HEADER: sign(body, SECRET)}).status_code == 403
+    assert queued(receiver) == []
+
+
+def test_oversized_body_is_refused_unread(receiver):
+    body = b"x" * (MAX_BODY_BYTES + 1)
+
+    status = requests.post(receiver.url, data=body, timeout=5, headers={SIGNATURE_HEADER: sign(body, SECRET)})
+
+    assert status.status_code == 413
+
+
+def test_own_tweets_and_other_accounts_mentions_are_left_out(receiver):
+    own = tweet_create_event(USER_ID, 4, "hi AI", author_id=USER_ID)
+    other = tweet_create_event(USER_ID, 5, "hi AI")
+    other["tweet_create_events"][0]["entities"]["user_mentions"] = [{"id_str": "99", "screen_name": "someone"}]
+
+    assert emit(receiver.url, own, SECRET) == 200
+    assert emit(receiver.url, other, SECRET) == 200
+    assert queued(receiver) == []
+
+
+def test_redelivered_and_polled_mentions_are_answered_once():
+    client = FakeTwitterClient()
+    engine = AutoReplyEngine(client, SentimentAnalyzer(), KEYWORDS, max_daily_replies=100)
+    intake = MentionIntake(engine, USER_ID, secret=SECRET,
+                           receiver_config={"webhook_port": 0, "reconcile_interval": 900})
+    intake.start()
+    url = f"http://127.0.0.1:{intake.receiver.port}{WEBHOOK_PATH}"
+    ids = [str(1960000000000000000 + i) for i in range(3)]
+    try:
+        for mention_id in ids:
+            text = f"Loving this AI thread, thanks! {mention_id}"
+            client.mentions.append({"id": mention_id, "text": text, "author_id": "2"})
+            event = tweet_create_event(USER_ID, mention_id, text)
+            # X retries deliveries it thinks failed, so the same event can arrive twice
+            assert emit(url, event, SECRET) == 200
+            assert emit(url, event, SECRET) == 200
+        deadline = time.time() + 10
+        while len(client.posted) < len(ids) and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        intake.stop()
+    # The reconcile poll sees the same mentions on the timeline
+    intake.poll()
+
+    replies = Counter(str(post["in_reply_to_tweet_id"]) for post in client.posted)
+    assert replies == Counter({mention_id: 1 for mention_id in ids})
+    assert engine.stats["duplicate"] >= len(ids)
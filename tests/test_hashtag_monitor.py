@@ -0,0 +1,93 @@
+"""HashtagMonitor against the recorded recent-search fixture"""
+
+from bot.hashtag_monitor import HashtagMonitor
+from benchmarks.fake_clients import FakeSearchClient
+
+HASHTAGS = ["#Python", "#AI", "#Automation"]
+FIXTURE_MATCHES = {"1955030909670826077", "1955030911111111111", "1955030912222222222",
+                   "1955030913333333333", "1955030917777777777", "1955030918888888888"}
+NEWEST_MATCH = "1955030918888888888"
+# Cursors are kept per normalized hashtag
+TAGS = ["#python", "#ai", "#automation"]
+
+
+def make_monitor(tmp_path, client, **kwargs):
+    return HashtagMonitor(client, HASHTAGS, state_file=str(tmp_path / "state.json"), **kwargs)
+
+
+def publish(client, first_id, count, tag="#Python"):
+    client.publish([{"id": first_id + i, "text": f"New release {tag}", "author_id": "1"} for i in range(count)])
+
+
+def test_first_poll_matches_fixture_with_one_query(tmp_path):
+    client = FakeSearchClient.from_fixture()
+    monitor = make_monitor(tmp_path, client)
+
+    matches = monitor.poll()
+
+    assert {match["id"] for match in matches} == FIXTURE_MATCHES
+    assert len(matches) == len(FIXTURE_MATCHES)
+    assert len(monitor.queries) == 1
+    assert len(client.calls) == 1
+    assert "since_id" not in client.calls[0][1]
+    assert monitor.cursors == {tag: NEWEST_MATCH for tag in TAGS}
+
+
+def test_cursor_advances_and_next_poll_only_sees_new_tweets(tmp_path):
+    client = FakeSearchClient.from_fixture()
+    monitor = make_monitor(tmp_path, client)
+    monitor.poll()
+
+    publish(client, 1956000000000000000, 3)
+    matches = monitor.poll()
+
+    assert [match["id"] for match in matches] == [str(1956000000000000000 + i) for i in (2, 1, 0)]
+    assert len(client.calls) == 2
+    assert client.calls[1][1]["since_id"] == NEWEST_MATCH
+    assert monitor.cursors["#python"] == "1956000000000000002"
+
+
+def test_repeat_polls_suppress_duplicates(tmp_path):
+    client = FakeSearchClient.from_fixture()
+    monitor = make_monitor(tmp_path, client)
+    first = monitor.poll()
+
+    # Nothing new: the cursor filters everything, and a forgotten cursor is caught by the seen set
+    assert monitor.poll() == []
+    monitor.cursors.clear()
+    assert monitor.poll() == []
+    assert len(monitor.recent_matches()) == len(first)
+    assert len(client.calls) == 3
+
+
+def test_cursors_survive_a_restart(tmp_path):
+    client = FakeSearchClient.from_fixture()
+    make_monitor(tmp_path, client).poll()
+
+    restarted = make_monitor(tmp_path, client)
+
+    assert restarted.cursors == {tag: NEWEST_MATCH for tag in TAGS}
+    assert restarted.poll() == []
+    assert client.calls[-1][1]["since_id"] == NEWEST_MATCH
+
+
+def test_walk_cut_short_by_max_pages_resumes_without_skipping(tmp_path):
+    client = FakeSearchClient.from_fixture()
+    monitor = make_monitor(tmp_path, client, max_results=10, max_pages=2)
+    monitor.poll()
+    publish(client, 1956000000000000000, 35)
+
+    first = monitor.poll()
+
+    assert len(first) == 20
+    # Older pages are unfetched, so the cursors stay put and the walk's place is saved
+    assert monitor.cursors["#python"] == NEWEST_MATCH
+    assert monitor.resume
+    assert make_monitor(tmp_path, client).resume == monitor.resume
+
+    second = monitor.poll()
+
+    assert len(second) == 15
+    assert {match["id"] for match in first + second} == {str(1956000000000000000 + i) for i in range(35)}
+    assert monitor.resume == {}
+    assert monitor.cursors["#python"] == "1956000000000000034"
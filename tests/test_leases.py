@@ -0,0 +1,69 @@
+"""LeaseQueue drained by several worker processes (benchmarks/bench_leases.py runs): no double posts"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.bench_leases import make_tweets, run_leases
+from bot.leases import LeaseQueue
+
+ITEMS = 60
+
+
+def options(latency_ms=5.0, failure_rate=0.1, lease_seconds=1.0):
+    return SimpleNamespace(latency_ms=latency_ms, failure_rate=failure_rate, lease_seconds=lease_seconds)
+
+
+def assert_posted_once(run):
+    assert run["duplicates"] == 0
+    assert run["leases_lost"] == 0
+    # Each item is posted exactly once, or given up on after max_attempts failed posts
+    assert run["posted"] + run["left"].get("failed", 0) == run["items"]
+    assert not run["left"].get("queued")
+    assert not run["left"].get("leased")
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_workers_post_each_item_once(tmp_path, workers):
+    run = run_leases("scaling", workers, make_tweets(ITEMS), options(), str(tmp_path))
+
+    assert_posted_once(run)
+
+
+def test_items_of_a_crashed_worker_are_taken_over_once_its_leases_expire(tmp_path):
+    run = run_leases("crash", 4, make_tweets(ITEMS), options(lease_seconds=0.5), str(tmp_path), crash=6)
+
+    assert_posted_once(run)
+
+
+def test_heartbeats_keep_posts_longer_than_the_lease(tmp_path):
+    args = options(failure_rate=0.0, lease_seconds=0.5)
+
+    run = run_leases("heartbeat", 4, make_tweets(8), args, str(tmp_path), latency_ms=2000 * args.lease_seconds)
+
+    assert_posted_once(run)
+    assert run["posted"] == 8
+
+
+def test_daily_limit_caps_parallel_posts_exactly(tmp_path):
+    config = {"posting_limits": {"daily_limit": 20, "reservations": {}}}
+
+    run = run_leases("quota", 4, make_tweets(ITEMS), options(failure_rate=0.0), str(tmp_path), config)
+
+    assert run["duplicates"] == 0
+    assert run["posted"] == 20
+    assert run["left"].get("queued") == ITEMS - 20
+
+
+def test_sync_keeps_outbox_retries_queued_without_their_delivery_state(tmp_path):
+    queue = LeaseQueue(str(tmp_path / "leases.sqlite3"))
+    store = SimpleNamespace(load_json=lambda key: None)
+    retry = {"text": "retried tweet", "image_suggestion": None, "priority": "campaign", "enqueued": 5.0}
+
+    try:
+        assert queue.sync(store, also=[retry])["added"] == 1
+        lease = queue.claim("worker", 1)[0]
+    finally:
+        queue.close()
+
+    assert lease["tweet"] == retry
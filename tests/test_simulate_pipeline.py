@@ -0,0 +1,43 @@
+"""Short benchmarks/simulate_pipeline.py runs: no quota violations and no duplicate posts"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "benchmarks" / "simulate_pipeline.py"
+
+
+def simulate(tmp_path, *args):
+    output = tmp_path / "simulation.json"
+    # Its own process: the simulation swaps the clock, cwd, environment and fake modules
+    run = subprocess.run([sys.executable, str(SCRIPT), "--output", str(output), *args],
+                         capture_output=True, text=True, timeout=300)
+    assert output.exists(), run.stderr
+    return run.returncode, json.loads(output.read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("args", [
+    ["--days", "3"],
+    ["--days", "3", "--tweet-rate-limit", "3"],
+    ["--pipeline", "production", "--days", "2", "--post-count", "3"],
+])
+def test_short_simulation_has_no_violations_or_duplicates(tmp_path, args):
+    code, results = simulate(tmp_path, *args)
+
+    violations = results["violations"]
+    assert violations["days_over_daily_limit"] == {}
+    assert violations["windows_over_monthly_limit"] == []
+    assert violations["x_rate_limited_responses"] == 0
+    assert violations["duplicate_posts"] == 0
+    assert results["posts"] > 0
+    assert results["ok"] and code == 0
+
+
+def test_scheduled_simulation_fills_the_daily_limit(tmp_path):
+    _, results = simulate(tmp_path, "--days", "3")
+
+    assert set(results["daily"].values()) == {results["limits"]["daily"]}
+    assert results["details"]["starved_ticks"] == 0
@@ -9,3 +9,6 @@ def get_logger(name):
         logger.addHandler(handler)
     logger.setLevel(logging.INFO)
     return logger
+
+# Alias used by main.py
+setup_logger = get_logger
@@ -0,0 +1,268 @@
+"""
+Lightweight metrics for the hot paths
+Counters, gauges and latency histograms with Prometheus text and JSON export.
+Set METRICS_JSON / METRICS_PROM to write a summary when the process exits,
+or TWITTER_BOT_METRICS=0 to turn recording off.
+"""
+
+import os
+import json
+import time
+import atexit
+import bisect
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "twitter_bot_"
+# Seconds; covers in-process work (sentiment) up to slow LLM calls and retry waits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items()))) if labels else (name, ())
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-quantile (Prometheus-style estimate)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            if running >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Gauge: last value wins (circuit state, queue depth, ...)"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        self._observe(_key(name, labels), seconds)
+
+    def _observe(self, key, seconds):
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time a block; failures are timed too and counted as <name>_errors_total"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(name + "_errors_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer(); the label key is built once, not per call"""
+        key = _key(name, labels)
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except BaseException:
+                    self.inc(name + "_errors_total", **labels)
+                    raise
+                finally:
+                    self._observe(key, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+        for kind, samples in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({name for (name, _), _ in samples}):
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                for (metric, labels), value in samples:
+                    if metric == name:
+                        lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+        for name in sorted({name for (name, _), _ in histograms}):
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for (metric, labels), histogram in histograms:
+                if metric != name:
+                    continue
+                running = 0
+                for bound, n in zip(histogram.buckets, histogram.counts):
+                    running += n
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, {'le': bound})} {running}")
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {histogram.count}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram.total:.6f}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """JSON-friendly snapshot: counters, gauges, plus count/sum/mean/p50/p99/max per timer"""
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = dict(self.histograms)
+
+        def label(name, labels):
+            return name + _format_labels(labels)
+
+        return {
+            "started": datetime.utcfromtimestamp(self.started).isoformat() + "Z",
+            "finished": datetime.utcnow().isoformat() + "Z",
+            "counters": {label(n, l): v for (n, l), v in sorted(counters.items())},
+            "gauges": {label(n, l): v for (n, l), v in sorted(gauges.items())},
+            "timers": {
+                label(n, l): {
+                    "count": h.count,
+                    "sum_seconds": round(h.total, 6),
+                    "mean_seconds": round(h.total / h.count, 6) if h.count else 0.0,
+                    "p50_seconds": h.quantile(0.5),
+                    "p99_seconds": h.quantile(0.99),
+                    "max_seconds": round(h.max, 6),
+                }
+                for (n, l), h in sorted(histograms.items())
+            }
+        }
+
+    def write_prometheus(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+metrics = MetricsRegistry(enabled=os.getenv("TWITTER_BOT_METRICS", "1") != "0")
+
+# Module-level shortcuts
+inc = metrics.inc
+set_gauge = metrics.set
+observe = metrics.observe
+timer = metrics.timer
+timed = metrics.timed
+
+
+def record_retry_wait(name):
+    """tenacity before_sleep hook: counts retries and the seconds spent waiting on them"""
+    def before_sleep(retry_state):
+        metrics.inc("retries_total", operation=name)
+        metrics.inc("retry_wait_seconds_total", retry_state.next_action.sleep, operation=name)
+    return before_sleep
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve /metrics in Prometheus text format from a daemon thread"""
+    # Kept out of module import: short-lived scripts never serve metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return server
+
+
+def _export_at_exit():
+    json_path = os.getenv("METRICS_JSON")
+    prom_path = os.getenv("METRICS_PROM")
+    try:
+        if json_path:
+            metrics.write_json(json_path)
+        if prom_path:
+            metrics.write_prometheus(prom_path)
+    except OSError as e:
+        logger.error(f"Failed to export metrics: {e}")
+
+
+if os.getenv("METRICS_JSON") or os.getenv("METRICS_PROM"):
+    atexit.register(_export_at_exit)
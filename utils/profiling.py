@@ -0,0 +1,290 @@
+"""
+Profiling mode for the entry points
+`--profile` (or `--profile=DIR`) on main.py, production_bot_v2.py,
+post_tweet.py, post_scheduled_tweet.py, generate_scheduled_tweets.py and
+generate_fallback_tweet.py profiles the whole run, imports and module-level
+work included, and writes to .profiles/ (or DIR) when the process exits:
+
+  <run>.prof       cProfile stats of the main thread (pstats, snakeviz)
+  <run>.collapsed  wall-clock samples of every thread as collapsed stacks,
+                   for flamegraph.pl, speedscope or inferno
+  <run>.json       run metadata (argv, wall and CPU seconds, samples)
+
+`python -m utils.profiling compare A B` diffs two runs, and
+`python -m utils.profiling top RUN` lists a run's most expensive functions.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections import Counter
+
+DEFAULT_DIR = ".profiles"
+# Seconds between wall-clock samples
+SAMPLE_INTERVAL = 0.005
+PROFILE_FLAG = "--profile"
+REPO_ROOT = Path(__file__).resolve().parent.parent.as_posix() + "/"
+
+_labels = {}
+
+
+def short_path(filename):
+    """Path relative to the repo, or from the package root for installed and stdlib modules"""
+    path = filename.replace("\\", "/")
+    for marker in ("/site-packages/", "/dist-packages/"):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    if path.startswith(REPO_ROOT):
+        return path[len(REPO_ROOT):]
+    parts = path.split("/")
+    return "/".join(parts[-2:])
+
+
+def frame_label(filename, lineno, name):
+    """'function (path:first line)', the same for a cProfile entry and a sampled frame"""
+    key = (filename, lineno, name)
+    label = _labels.get(key)
+    if label is None:
+        if filename == "~":
+            # cProfile's built-ins; drop the object address so runs compare
+            label = re.sub(r" at 0x[0-9a-f]+", "", name)
+        else:
+            label = f"{name} ({short_path(filename)}:{lineno})"
+        label = _labels[key] = label.replace(";", ":")
+    return label
+
+
+class Profiler:
+    def __init__(self, name, output_dir=DEFAULT_DIR, interval=SAMPLE_INTERVAL):
+        """
+        Initialize profiler
+
+        Args:
+            name (str): Run name; files are <name>-<timestamp>.*
+            output_dir (str): Directory the files are written to
+            interval (float): Seconds between wall-clock samples
+        """
+        self.name = name
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self.started = datetime.now()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.sampler.start()
+        self.profile.enable()
+        return self
+
+    def stop(self):
+        """Stop profiling and write the run's files; returns their paths"""
+        self.profile.disable()
+        wall_seconds = time.perf_counter() - self.wall_start
+        cpu_seconds = time.process_time() - self.cpu_start
+        self.stopped.set()
+        self.sampler.join()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        base = self.output_dir / f"{self.name}-{self.started.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.profile.dump_stats(f"{base}.prof")
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        meta = {
+            "name": self.name,
+            "argv": sys.argv,
+            "started": self.started.isoformat(),
+            "wall_seconds": round(wall_seconds, 4),
+            "cpu_seconds": round(cpu_seconds, 4),
+            "samples": self.samples,
+            "sample_interval": self.interval,
+            "python": sys.version.split()[0],
+        }
+        with open(f"{base}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return {kind: f"{base}.{kind}" for kind in ("prof", "collapsed", "json")}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def profile_from_argv(name=None):
+    """
+    Start profiling the rest of the process if --profile[=DIR] is on the command line
+
+    Called at the top of an entry point, before its other imports, so import time is
+    profiled too. The flag is taken out of sys.argv so the script's own argument parsing
+    never sees it, and the files are written at exit, whether the script returns or calls exit().
+
+    Args:
+        name (str): Run name; the script's file name if None
+
+    Returns:
+        Profiler: The running profiler, or None without the flag
+    """
+    flags = [arg for arg in sys.argv[1:] if arg == PROFILE_FLAG or arg.startswith(PROFILE_FLAG + "=")]
+    if not flags:
+        return None
+    sys.argv = [sys.argv[0]] + [arg for arg in sys.argv[1:] if arg not in flags]
+    output_dir = flags[-1].partition("=")[2] or os.getenv("PROFILE_DIR", DEFAULT_DIR)
+    profiler = Profiler(name or Path(sys.argv[0]).stem, output_dir)
+
+    def finish():
+        paths = profiler.stop()
+        print(f"Profile written to {paths['prof']} (+ .collapsed, .json)", file=sys.stderr)
+
+    # Registered first, so it runs after every other exit handler (metrics export included)
+    atexit.register(finish)
+    return profiler.start()
+
+
+def load_run(path):
+    """
+    A profiled run from any of its files or their common prefix
+
+    Returns:
+        dict: 'meta', 'functions' (label -> calls, self and cumulative seconds) and 'stacks'
+    """
+    base = str(path)
+    for suffix in (".prof", ".collapsed", ".json"):
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    with open(f"{base}.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    functions = {}
+    for (filename, lineno, name), (_, calls, tottime, cumtime, _) in pstats.Stats(f"{base}.prof").stats.items():
+        functions[frame_label(filename, lineno, name)] = {"calls": calls, "self": tottime, "cumulative": cumtime}
+    stacks = Counter()
+    with open(f"{base}.collapsed", encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            stacks[stack] += int(count)
+    return {"meta": meta, "functions": functions, "stacks": stacks}
+
+
+def wall_by_frame(run):
+    """Seconds of wall-clock time each frame was on a sampled stack, waits included"""
+    per_sample = run["meta"]["wall_seconds"] / max(run["meta"]["samples"], 1)
+    inclusive = Counter()
+    for stack, count in run["stacks"].items():
+        # A recursive frame counts once per sample; the leading entry is the thread name
+        for frame in set(stack.split(";")[1:]):
+            inclusive[frame] += count
+    return {frame: count * per_sample for frame, count in inclusive.items()}
+
+
+def _delta_rows(a, b, top):
+    rows = [{"function": key, "a": round(a.get(key, 0.0), 4), "b": round(b.get(key, 0.0), 4),
+             "delta": round(b.get(key, 0.0) - a.get(key, 0.0), 4)} for key in set(a) | set(b)]
+    rows.sort(key=lambda row: abs(row["delta"]), reverse=True)
+    return rows[:top]
+
+
+def compare(a, b, top=20):
+    """
+    Differences between two loaded runs (b relative to a)
+
+    Returns:
+        dict: Wall and CPU seconds, and the functions whose cProfile cumulative time, call
+            count or sampled wall-clock time changed the most
+    """
+    def change(key):
+        before, after = a["meta"][key], b["meta"][key]
+        return {"a": before, "b": after, "delta": round(after - before, 4),
+                "pct": round((after - before) / before * 100, 1) if before else None}
+
+    cumulative = _delta_rows({k: v["cumulative"] for k, v in a["functions"].items()},
+                             {k: v["cumulative"] for k, v in b["functions"].items()}, top)
+    calls = _delta_rows({k: v["calls"] for k, v in a["functions"].items()},
+                        {k: v["calls"] for k, v in b["functions"].items()}, top)
+    return {
+        "a": a["meta"]["name"] + " " + a["meta"]["started"],
+        "b": b["meta"]["name"] + " " + b["meta"]["started"],
+        "wall_seconds": change("wall_seconds"),
+        "cpu_seconds": change("cpu_seconds"),
+        "cumulative_seconds": cumulative,
+        "calls": [row for row in calls if row["delta"]],
+        "sampled_wall_seconds": _delta_rows(wall_by_frame(a), wall_by_frame(b), top),
+    }
+
+
+def _print_rows(title, rows, unit="s", digits=4):
+    print(f"\n{title}")
+    for row in rows:
+        print(f"  {row['delta']:+12.{digits}f}{unit}  {row['a']:>12.{digits}f} -> {row['b']:<12.{digits}f} "
+              f"{row['function']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and compare --profile runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    top = sub.add_parser("top", help="A run's most expensive functions")
+    top.add_argument("run", help="Any of the run's files, or their common prefix")
+    top.add_argument("--top", type=int, default=20)
+    top.add_argument("--sort", choices=["cumulative", "self", "calls"], default="cumulative")
+    diff = sub.add_parser("compare", help="Diff run B against run A")
+    diff.add_argument("a")
+    diff.add_argument("b")
+    diff.add_argument("--top", type=int, default=20)
+    diff.add_argument("--fail-over", type=float,
+                      help="Exit 1 if B's wall time is more than this many percent above A's")
+    diff.add_argument("--output", help="Write the comparison as JSON to this file")
+    args = parser.parse_args()
+
+    if args.command == "top":
+        run = load_run(args.run)
+        print(f"{run['meta']['name']}: {run['meta']['wall_seconds']} s wall, {run['meta']['cpu_seconds']} s CPU, "
+              f"{run['meta']['samples']} samples")
+        ranked = sorted(run["functions"].items(), key=lambda item: item[1][args.sort], reverse=True)
+        for label, stats in ranked[:args.top]:
+            print(f"  {stats['cumulative']:10.4f}s cum  {stats['self']:10.4f}s self  {stats['calls']:>9} calls  "
+                  f"{label}")
+    else:
+        result = compare(load_run(args.a), load_run(args.b), args.top)
+        wall, cpu = result["wall_seconds"], result["cpu_seconds"]
+        print(f"A: {result['a']}\nB: {result['b']}")
+        print(f"Wall {wall['a']} s -> {wall['b']} s ({wall['pct']:+}%), "
+              f"CPU {cpu['a']} s -> {cpu['b']} s ({cpu['pct']:+}%)")
+        _print_rows("cProfile cumulative time (main thread)", result["cumulative_seconds"])
+        _print_rows("Sampled wall-clock time (all threads, waits included)", result["sampled_wall_seconds"])
+        _print_rows("Call counts", result["calls"][:args.top], unit="", digits=0)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+        if args.fail_over is not None and wall["pct"] is not None and wall["pct"] > args.fail_over:
+            print(f"❌ Wall time regressed {wall['pct']}% (limit {args.fail_over}%)")
+            sys.exit(1)
@@ -0,0 +1,88 @@
+"""
+Worker client
+Thin client for the resident worker (python -m bot.worker serve): sends one
+command over its Unix socket and returns the reply. Only the standard
+library is imported, so a script that finds a worker skips loading the
+analyzer, tweepy and the LLM clients entirely.
+
+BOT_WORKER_SOCKET sets the socket path; BOT_WORKER=off always runs in-process.
+"""
+
+import os
+import json
+import socket
+
+DEFAULT_SOCKET = "/tmp/twitter-bot-worker.sock"
+
+
+class WorkerError(Exception):
+    """The worker accepted a command but no reply came back; it may have run"""
+
+
+def socket_path():
+    return os.getenv("BOT_WORKER_SOCKET", DEFAULT_SOCKET)
+
+
+def request(command, timeout=300, path=None, **args):
+    """
+    Run a command on the resident worker
+
+    Args:
+        command (str): ping, screen, generate, post, stats or shutdown
+        timeout (float): Seconds to wait for the reply
+        path (str): Socket path; BOT_WORKER_SOCKET or the default if None
+        **args: Command arguments (JSON-serializable)
+
+    Returns:
+        dict: code (exit status), output (what the command printed) and result,
+        or None when no worker is listening and the caller should run it itself
+
+    Raises:
+        WorkerError: The connection broke after the command was sent. Callers
+        must not fall back then, since a post may already have gone out.
+    """
+    if os.getenv("BOT_WORKER", "auto").lower() in ("off", "0", "false"):
+        return None
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError:
+            # Stale socket file from a worker that is gone
+            return None
+        sock.sendall(json.dumps({"command": command, "args": args}).encode("utf-8") + b"\n")
+        data = b""
+        try:
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        except OSError as e:
+            raise WorkerError(f"No reply from worker for {command}: {e}") from e
+    finally:
+        sock.close()
+    if not data.endswith(b"\n"):
+        raise WorkerError(f"Worker closed the connection during {command}")
+    return json.loads(data)
+
+
+def run_or_fallback(command, fallback, **args):
+    """
+    Run a command on the worker, or call fallback() in-process if none is running
+
+    The worker's captured output is printed, so the script reads the same
+    either way.
+
+    Returns:
+        tuple: (exit code, result)
+    """
+    reply = request(command, **args)
+    if reply is None:
+        return fallback()
+    print(reply["output"], end="")
+    return reply["code"], reply["result"]